@@ -0,0 +1,516 @@
+"""
+Backtest à origine glissante : MAE et MAPE par compteur, saison et régime météo.
+
+The historical daily counts of every counter are joined with the daily
+weather features, then cut into rolling-origin folds: for each origin, a
+candidate is trained on the days before it (all of them, or the last
+``window`` days) and scored on the ``horizon`` days that follow. Candidates
+are:
+
+- ``FixedModel``: an existing model file, bundle or model registry
+  directory, scored as is (it may have seen the test days during training);
+- ``Retrained``: a forest refitted on each fold's training days, one per
+  counter, with the hyperparameters of ``train.py``.
+
+Each fold's test rows are scored with one ``predict_batch`` call. Fold
+predictions are cached on disk under a fingerprint of the candidate and of
+the fold's input rows: when history grows, only the new folds (and folds
+whose data changed) are recomputed. Uncached folds run in parallel worker
+processes, each holding one copy of the history.
+
+Errors are reported overall and per counter, season and weather regime
+(see ``weather_regime``). MAPE skips days with a zero count.
+
+Usage::
+
+    python backtest.py --counts counts.csv --weather era5_hourly.parquet \\
+        --model data/bike_count_model.pkl --retrain 100
+    python backtest.py --counts counts.csv --weather era5_hourly.parquet --retrain 100 \\
+        --horizon 28 --step 28 --min-train-days 365 --jobs 8 --output backtest.csv
+"""
+
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from features import build_features, to_day_numbers
+from lag_features import LAG_COLUMNS, lag_features
+from predictor import DATE_COLUMN, FEATURE_COLUMNS, BikeCountPredictor
+from train import DATA_DIR, TARGET_COLUMN, _write_atomic, read_table
+
+COUNTER_COLUMN = "counter_id"
+# Counter id of counts that have no counter column (city totals)
+TOTAL_COUNTER = "total"
+
+PREDICTION_COLUMN = "prediction"
+SEASON_COLUMN = "season"
+REGIME_COLUMN = "regime"
+GROUPS = (COUNTER_COLUMN, SEASON_COLUMN, REGIME_COLUMN)
+
+# Meteorological season of each month, January first
+SEASONS = np.array(["winter"] * 2 + ["spring"] * 3 + ["summer"] * 3 + ["autumn"] * 3 + ["winter"])
+
+# Weather regime thresholds, in the units of the daily features
+RAIN_THRESHOLD = 0.001  # tp_total, m (1 mm)
+COLD_THRESHOLD = 5.0  # t2m_max, °C
+HOT_THRESHOLD = 28.0  # t2m_max, °C
+
+# Bump when the stored fold predictions change: every fold is recomputed
+FOLD_CACHE_VERSION = 1
+
+
+def weather_regime(frame):
+    """
+    Classify days by weather, first match wins.
+
+    ``snow`` (snowfall or snow depth), ``rain`` (at least 1 mm), ``cold``
+    (maximum below 5 °C), ``hot`` (maximum of 28 °C or more), else ``dry``.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Daily weather features
+
+    Returns
+    -------
+    np.ndarray of str
+    """
+    conditions = [
+        (frame["sf_max"].to_numpy() > 0) | (frame["sd_total"].to_numpy() > 0),
+        frame["tp_total"].to_numpy() >= RAIN_THRESHOLD,
+        frame["t2m_max"].to_numpy() < COLD_THRESHOLD,
+        frame["t2m_max"].to_numpy() >= HOT_THRESHOLD,
+    ]
+    return np.select(conditions, ["snow", "rain", "cold", "hot"], default="dry")
+
+
+def load_history(counts, hourly, counter_column=COUNTER_COLUMN, time_column="time",
+                 timezone=None, calendar=None):
+    """
+    Join daily counts per counter with the daily weather features.
+
+    Features are built once per day and shared by all counters. Days with a
+    count but no weather are left out.
+
+    Parameters
+    ----------
+    counts : pd.DataFrame
+        ``date``, ``bike_count`` and optionally a counter id column; several
+        rows of the same counter and day are summed
+    hourly : pd.DataFrame
+        Hourly ERA5-style weather, see ``features.daily_weather``
+    counter_column : str, default "counter_id"
+        Counter id column; without it, counts form one ``total`` series
+    time_column : str, default "time"
+        Timestamp column of ``hourly``
+    timezone : str, optional
+        Time zone in which days are cut
+    calendar : french_calendar.FrenchCalendar, optional
+        Calendar of the day flags
+
+    Returns
+    -------
+    pd.DataFrame
+        ``date``, ``counter_id``, the 9 features, the lag features,
+        ``season``, ``regime`` and ``bike_count``, sorted by date then counter
+    """
+    days = to_day_numbers(counts[DATE_COLUMN])
+    if counter_column in counts.columns:
+        counters = counts[counter_column].astype(str).to_numpy()
+    else:
+        counters = np.full(len(counts), TOTAL_COUNTER, dtype=object)
+    totals = (
+        pd.Series(counts[TARGET_COLUMN].to_numpy(dtype=np.float64))
+        .groupby([days, counters]).sum()
+    )
+    row_days = totals.index.get_level_values(0).to_numpy()
+
+    weather_days = np.unique(to_day_numbers(
+        hourly.index if isinstance(hourly.index, pd.DatetimeIndex) else hourly[time_column],
+        timezone,
+    ))
+    feature_days = np.intersect1d(np.unique(row_days), weather_days)
+    features = build_features(
+        feature_days.astype("datetime64[D]"), hourly, calendar=calendar,
+        time_column=time_column, timezone=timezone,
+    )
+    keep = np.isin(row_days, feature_days)
+    row_days = row_days[keep]
+
+    frame = features.iloc[np.searchsorted(feature_days, row_days)].reset_index(drop=True)
+    frame.insert(0, DATE_COLUMN, row_days.astype("datetime64[D]"))
+    frame.insert(1, COUNTER_COLUMN, totals.index.get_level_values(1).to_numpy()[keep])
+    frame[TARGET_COLUMN] = totals.to_numpy()[keep]
+    frame = frame.join(lag_features(frame, counter_column=COUNTER_COLUMN,
+                                    count_column=TARGET_COLUMN))
+    months = frame[DATE_COLUMN].to_numpy().astype("datetime64[M]").astype(np.int64) % 12
+    frame[SEASON_COLUMN] = SEASONS[months]
+    frame[REGIME_COLUMN] = weather_regime(frame)
+    return frame
+
+
+def rolling_origins(dates, horizon=28, step=None, min_train_days=365):
+    """
+    First test day of each fold.
+
+    Parameters
+    ----------
+    dates : array-like of dates
+        Days of the history
+    horizon : int, default 28
+        Test days of each fold
+    step : int, optional
+        Days between origins, ``horizon`` by default (adjacent test windows)
+    min_train_days : int, default 365
+        Days of history before the first origin
+
+    Returns
+    -------
+    np.ndarray of datetime64[D]
+        Origins, oldest first; the last fold may be shorter than ``horizon``
+    """
+    days = pd.to_datetime(np.asarray(dates)).values.astype("datetime64[D]")
+    first, last = days.min(), days.max()
+    return np.arange(first + min_train_days, last + 1, step or horizon)
+
+
+class FixedModel:
+    """An existing model, scored without retraining."""
+
+    uses_training = False
+
+    def __init__(self, path, name=None):
+        """
+        Parameters
+        ----------
+        path : str or Path
+            joblib model, bundle, or directory of per-counter models (see
+            ``model_registry.ModelRegistry``)
+        name : str, optional
+            Label in the report, the file name by default
+        """
+        self.path = Path(path)
+        self.name = name or self.path.name
+        self._predictor = None
+
+    def __getstate__(self):
+        # Workers load the model themselves
+        return {**self.__dict__, "_predictor": None}
+
+    def fingerprint(self):
+        """Identity of the model files, to invalidate cached folds."""
+        files = [self.path] if self.path.is_file() else sorted(self.path.rglob("*"))
+        return "|".join(
+            f"{path.relative_to(self.path.parent)}:{path.stat().st_size}:{path.stat().st_mtime_ns}"
+            for path in files if path.is_file()
+        )
+
+    @property
+    def predictor(self):
+        if self._predictor is None:
+            from forest_engine import BUNDLE_METADATA
+
+            if self.path.is_dir() and not (self.path / BUNDLE_METADATA).exists():
+                from model_registry import ModelRegistry
+
+                self._predictor = ModelRegistry(self.path)
+            else:
+                engine = "compiled" if self.path.is_dir() else "sklearn"
+                self._predictor = BikeCountPredictor(self.path, engine=engine)
+        return self._predictor
+
+    def predict(self, train, test):
+        predictor = self.predictor
+        if hasattr(predictor, "resolve"):
+            return predictor.predict_batch(test, counter_column=COUNTER_COLUMN).astype(np.float64)
+        predictions = np.full(len(test), np.nan)
+        columns = predictor.feature_columns
+        known = test[columns].notna().all(axis=1).to_numpy()
+        predictions[known] = predictor.predict_batch(test.loc[known, columns])
+        return predictions
+
+
+class Retrained:
+    """A forest refitted on each fold, one per counter."""
+
+    uses_training = True
+
+    def __init__(self, n_estimators=100, random_state=42, lags=False, name=None):
+        """
+        Parameters
+        ----------
+        n_estimators : int, default 100
+            Trees of each forest
+        random_state : int, default 42
+            Seed of each forest
+        lags : bool, default False
+            Also train on the lag features, see ``lag_features``
+        name : str, optional
+            Label in the report
+        """
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.lags = lags
+        self.columns = FEATURE_COLUMNS + LAG_COLUMNS if lags else FEATURE_COLUMNS
+        self.name = name or f"retrain-{n_estimators}{'-lags' if lags else ''}"
+
+    def fingerprint(self):
+        import sklearn
+
+        return f"{self.n_estimators}:{self.random_state}:{self.lags}:{sklearn.__version__}"
+
+    def predict(self, train, test):
+        from sklearn.ensemble import RandomForestRegressor
+
+        predictions = np.full(len(test), np.nan)
+        train = train.dropna(subset=self.columns)
+        known = test[self.columns].notna().all(axis=1).to_numpy()
+        for counter, rows in train.groupby(COUNTER_COLUMN, sort=False):
+            target = known & (test[COUNTER_COLUMN] == counter).to_numpy()
+            if not target.any():
+                continue
+            # Folds run in parallel, so each fit uses a single core
+            model = RandomForestRegressor(n_estimators=self.n_estimators,
+                                          random_state=self.random_state, n_jobs=1)
+            model.fit(rows[self.columns], rows[TARGET_COLUMN].to_numpy())
+            predictions[target] = model.predict(test.loc[target, self.columns])
+        return predictions
+
+
+class FoldCache:
+    """Fold predictions on disk, one Parquet file per (candidate, origin)."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, candidate, origin, key):
+        return self.directory / _slug(candidate.name) / f"{origin}-{key}.parquet"
+
+    def get(self, candidate, origin, key, dtypes=None):
+        path = self.path(candidate, origin, key)
+        if path.exists():
+            self.hits += 1
+            predictions = pd.read_parquet(path)
+            # Parquet has no second resolution: datetime64[s] dates come back in ms
+            return predictions if dtypes is None else predictions.astype(dtypes)
+        self.misses += 1
+        return None
+
+    def put(self, candidate, origin, key, predictions):
+        path = self.path(candidate, origin, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Folds of the same origin computed from older data are stale
+        for stale in path.parent.glob(f"{origin}-*.parquet"):
+            stale.unlink(missing_ok=True)
+        _write_atomic(predictions, path)
+
+
+# History and candidates of a worker process, set once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(history, candidates):
+    _WORKER["history"] = history
+    _WORKER["candidates"] = candidates
+
+
+def _score_fold(candidate_index, train_slice, test_slice):
+    """Predictions of one candidate on one fold's test rows."""
+    history = _WORKER["history"]
+    candidate = _WORKER["candidates"][candidate_index]
+    test = history.iloc[test_slice]
+    predictions = candidate.predict(history.iloc[train_slice], test)
+    result = test[[DATE_COLUMN, *GROUPS, TARGET_COLUMN]].reset_index(drop=True)
+    result[PREDICTION_COLUMN] = predictions
+    return result
+
+
+def backtest(history, candidates, origins, horizon=28, window=None, cache=None, jobs=None):
+    """
+    Score candidates on every rolling-origin fold.
+
+    Parameters
+    ----------
+    history : pd.DataFrame
+        See ``load_history``
+    candidates : list of FixedModel or Retrained
+        Models evaluated
+    origins : array-like of datetime64[D]
+        First test day of each fold, see ``rolling_origins``
+    horizon : int, default 28
+        Test days of each fold
+    window : int, optional
+        Training days before each origin; all earlier days by default
+    cache : FoldCache, optional
+        Fold predictions reused across runs
+    jobs : int, optional
+        Worker processes, one per core by default; 1 scores in this process
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per candidate, fold and test row: ``candidate``, ``origin``,
+        ``date``, ``counter_id``, ``season``, ``regime``, ``bike_count`` and
+        ``prediction`` (NaN where the candidate cannot predict)
+    """
+    history = history.sort_values([DATE_COLUMN, COUNTER_COLUMN], ignore_index=True)
+    days = history[DATE_COLUMN].to_numpy().astype("datetime64[D]")
+    # Order-insensitive running hash of the rows, so any fold's rows hash in O(1)
+    row_hashes = np.concatenate(([0], np.cumsum(
+        pd.util.hash_pandas_object(history, index=False).to_numpy(), dtype=np.uint64
+    ))).astype(np.uint64)
+
+    fold_dtypes = history.dtypes[[DATE_COLUMN, *GROUPS, TARGET_COLUMN]].to_dict()
+    tasks, results = [], {}
+    for origin in np.asarray(origins, dtype="datetime64[D]"):
+        start = np.searchsorted(days, origin if window is None else origin - window)
+        split = np.searchsorted(days, origin)
+        end = np.searchsorted(days, origin + horizon)
+        if split == end:
+            continue
+        train_slice = slice(0 if window is None else start, split)
+        test_slice = slice(split, end)
+        for index, candidate in enumerate(candidates):
+            rows = [test_slice, train_slice] if candidate.uses_training else [test_slice]
+            key = _fold_key(candidate, horizon, window, rows, row_hashes)
+            cached = cache.get(candidate, origin, key, fold_dtypes) if cache is not None else None
+            if cached is not None:
+                results[index, origin] = cached
+            else:
+                tasks.append((index, origin, key, train_slice, test_slice))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) <= 1:
+        _init_worker(history, candidates)
+        fold_results = [_score_fold(index, train, test) for index, _, _, train, test in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=_init_worker,
+                                 initargs=(history, candidates)) as pool:
+            fold_results = list(pool.map(
+                _score_fold, *zip(*[(index, train, test) for index, _, _, train, test in tasks])
+            ))
+    for (index, origin, key, _, _), predictions in zip(tasks, fold_results):
+        if cache is not None:
+            cache.put(candidates[index], origin, key, predictions)
+        results[index, origin] = predictions
+
+    frames = []
+    for (index, origin), predictions in sorted(results.items(), key=lambda item: item[0]):
+        predictions = predictions.copy()
+        predictions.insert(0, "candidate", candidates[index].name)
+        predictions.insert(1, "origin", origin)
+        frames.append(predictions)
+    if not frames:
+        raise ValueError("No fold has test days: check the origins and the history span")
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize(predictions, by=None):
+    """
+    MAE and MAPE of each candidate, overall or per group.
+
+    Parameters
+    ----------
+    predictions : pd.DataFrame
+        See ``backtest``
+    by : str, optional
+        Group column, e.g. ``counter_id``, ``season`` or ``regime``
+
+    Returns
+    -------
+    pd.DataFrame
+        ``rows``, ``mae``, ``mape`` (percent, zero counts skipped) and
+        ``bias`` (mean of prediction minus count), indexed by candidate (and
+        group)
+    """
+    scored = predictions.dropna(subset=[PREDICTION_COLUMN])
+    actual = scored[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    error = scored[PREDICTION_COLUMN].to_numpy(dtype=np.float64) - actual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(actual > 0, np.abs(error) / actual * 100.0, np.nan)
+    errors = pd.DataFrame({
+        "absolute": np.abs(error), "relative": relative, "error": error,
+    }, index=scored.index)
+    keys = ["candidate"] + ([by] if by is not None else [])
+    grouped = errors.groupby([scored[key] for key in keys], sort=True)
+    return pd.DataFrame({
+        "rows": grouped["absolute"].size(),
+        "mae": grouped["absolute"].mean(),
+        "mape": grouped["relative"].mean(),
+        "bias": grouped["error"].mean(),
+    })
+
+
+def _fold_key(candidate, horizon, window, slices, row_hashes):
+    """Hash of a candidate, the fold settings and the fold's input rows."""
+    parts = [str(FOLD_CACHE_VERSION), candidate.fingerprint(), str(horizon), str(window)]
+    for rows in slices:
+        digest = (int(row_hashes[rows.stop]) - int(row_hashes[rows.start])) % 2**64
+        parts.append(f"{rows.stop - rows.start}:{digest}")
+    return hashlib.sha1("/".join(parts).encode()).hexdigest()[:16]
+
+
+def _slug(name):
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of bike count models.")
+    parser.add_argument("--counts", type=Path, required=True,
+                        help="daily counts: date, bike_count and optionally counter_id")
+    parser.add_argument("--weather", type=Path, required=True,
+                        help="hourly ERA5 weather: time, t2m, tp, sd, i10fg, sf")
+    parser.add_argument("--model", type=Path, action="append", default=[],
+                        help="model file, bundle or per-counter model directory scored as is "
+                             "(repeatable)")
+    parser.add_argument("--retrain", type=int, action="append", default=[], metavar="TREES",
+                        help="refit a forest of TREES trees on each fold (repeatable)")
+    parser.add_argument("--lags", action="store_true",
+                        help="retrained forests also use the lag features")
+    parser.add_argument("--horizon", type=int, default=28, help="test days per fold")
+    parser.add_argument("--step", type=int, help="days between origins (default: horizon)")
+    parser.add_argument("--min-train-days", type=int, default=365)
+    parser.add_argument("--window", type=int,
+                        help="training days before each origin (default: all history)")
+    parser.add_argument("--timezone", help="time zone in which days are cut (default UTC)")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--cache", type=Path, default=DATA_DIR / "backtest_cache")
+    parser.add_argument("--output", type=Path, help="write every fold prediction to this CSV")
+    args = parser.parse_args()
+
+    candidates = [FixedModel(path) for path in args.model]
+    candidates += [Retrained(trees, lags=args.lags) for trees in args.retrain]
+    if not candidates:
+        parser.error("give at least one --model or --retrain")
+
+    history = load_history(read_table(args.counts), read_table(args.weather),
+                           timezone=args.timezone)
+    origins = rolling_origins(history[DATE_COLUMN], args.horizon, args.step, args.min_train_days)
+    cache = FoldCache(args.cache)
+    predictions = backtest(history, candidates, origins, horizon=args.horizon,
+                           window=args.window, cache=cache, jobs=args.jobs)
+    print(
+        f"{len(origins)} folds x {len(candidates)} candidate(s) on "
+        f"{history[COUNTER_COLUMN].nunique()} counter(s): {cache.misses} computed, "
+        f"{cache.hits} from cache"
+    )
+
+    with pd.option_context("display.float_format", "{:,.1f}".format, "display.width", 120):
+        print(summarize(predictions).to_string())
+        for by in GROUPS:
+            print(f"\nBy {by}")
+            print(summarize(predictions, by).to_string())
+    if args.output is not None:
+        predictions.to_csv(args.output, index=False)
+        print(f"Saved {len(predictions)} fold predictions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Benchmarks du prédicteur, exécutables hors ligne sur un modèle synthétique.
+
+Run from the ``my-streamlit-app`` directory, e.g.::
+
+    python -m benchmarks.bench_engine
+"""
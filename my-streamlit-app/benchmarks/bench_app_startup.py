@@ -0,0 +1,91 @@
+"""
+Premier affichage et coût d'un rerun de streamlit_app.py, par page.
+
+Each page is measured in a fresh interpreter with Streamlit's ``AppTest``:
+the first run stands for the first paint of a new server process (it
+includes importing the app's modules), the following runs for the rerun
+triggered by every widget interaction. The heavy modules loaded after the
+first run are listed, to check what the documentation page pulls in.
+
+The prediction page needs ``data/bike_count_model.pkl``; it is skipped
+when the file is missing.
+
+Usage::
+
+    python -m benchmarks.bench_app_startup --reruns 20
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.session_state.page = sys.argv[2]
+at.session_state.lang = sys.argv[3]
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[4])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+heavy = ("pandas", "numpy", "pyarrow", "joblib", "sklearn", "scipy")
+print(json.dumps({
+    "first_s": first,
+    "rerun_s": sorted(reruns)[len(reruns) // 2] if reruns else None,
+    "errors": [str(e.value) for e in at.exception],
+    "imported": [name for name in heavy if name in sys.modules and name not in before],
+}))
+"""
+
+
+def run_page(page, lang, reruns):
+    """First run and median rerun time of one page, in a new interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(APP_DIR / "streamlit_app.py"), page, lang, str(reruns)],
+        cwd=APP_DIR,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3,
+                        help="fresh interpreters per page (the best first run is kept)")
+    parser.add_argument("--lang", choices=("fr", "en"), default="fr")
+    args = parser.parse_args()
+
+    pages = ["doc"]
+    if (APP_DIR / "data" / "bike_count_model.pkl").exists():
+        pages.append("pred")
+    else:
+        print("data/bike_count_model.pkl not found: prediction page skipped")
+
+    print(f"{'page':>5} {'first run s':>11} {'rerun ms':>9}  heavy modules imported")
+    for page in pages:
+        runs = [run_page(page, args.lang, args.reruns) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run["first_s"])
+        if best["errors"]:
+            print(f"{page:>5} failed: {best['errors']}")
+            continue
+        print(
+            f"{page:>5} {best['first_s']:>11.3f} {1000 * best['rerun_s']:>9.1f}  "
+            f"{', '.join(best['imported']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Temps de démarrage et mémoire : pickle joblib vs bundle memory-mappé.
+
+Each variant runs in a fresh interpreter that imports ``predictor``, loads the
+model and makes one prediction. RSS and private memory come from
+``/proc/self/smaps_rollup`` (Linux); shared pages of a memory-mapped model
+count in RSS but not in private memory, since other processes reuse them.
+
+Usage::
+
+    python -m benchmarks.bench_cold_start --runs 3
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import save_model
+from export_model import export_bundle
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from predictor import BikeCountPredictor
+imported = time.perf_counter()
+predictor = BikeCountPredictor(sys.argv[1], engine=sys.argv[2], mmap_mode=sys.argv[3] or None)
+loaded = time.perf_counter()
+predictor.predict(-5.0, 10.0, 0.001, 0.0, 5.0, 0.0, 0, 0, 0)
+predicted = time.perf_counter()
+memory = {}
+try:
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Private_Clean", "Private_Dirty"):
+                memory[key] = int(rest.split()[0]) / 1024
+except OSError:
+    pass
+print(json.dumps({
+    "import_s": imported - start,
+    "load_s": loaded - imported,
+    "first_predict_s": predicted - loaded,
+    "rss_mb": memory.get("Rss"),
+    "private_mb": memory.get("Private_Clean", 0) + memory.get("Private_Dirty", 0) if memory else None,
+}))
+"""
+
+
+def run_child(model_path, engine, mmap_mode):
+    """Run one cold start in a new interpreter and return its measurements."""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(model_path), engine, mmap_mode or ""],
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        bundle_path = Path(tmp) / "model.bundle"
+        export_bundle(model_path, bundle_path)
+        variants = [
+            ("pickle", model_path, "sklearn", None),
+            ("pickle+mmap", model_path, "sklearn", "r"),
+            ("pickle->compiled", model_path, "compiled", None),
+            ("bundle", bundle_path, "compiled", None),
+        ]
+
+        print(f"{'variant':>17} {'load s':>8} {'1st pred s':>10} {'RSS MB':>8} {'private MB':>10}")
+        for label, path, engine, mmap_mode in variants:
+            runs = [run_child(path, engine, mmap_mode) for _ in range(args.runs)]
+            best = min(runs, key=lambda run: run["load_s"])
+            rss = f"{best['rss_mb']:.0f}" if best["rss_mb"] is not None else "n/a"
+            private = f"{best['private_mb']:.0f}" if best["private_mb"] is not None else "n/a"
+            print(
+                f"{label:>17} {best['load_s']:>8.3f} {best['first_predict_s']:>10.3f} "
+                f"{rss:>8} {private:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
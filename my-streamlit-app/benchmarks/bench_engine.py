@@ -0,0 +1,65 @@
+"""
+Compare le moteur scikit-learn et le moteur compilé de BikeCountPredictor.
+
+Usage::
+
+    python -m benchmarks.bench_engine --trees 100 --rows 1 1000 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import make_features, save_model
+from predictor import BikeCountPredictor
+
+
+def best_of(func, repeat):
+    """Return the best wall time of ``repeat`` calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(
+            Path(tmp) / "model.pkl", n_estimators=args.trees, max_depth=args.max_depth
+        )
+        reference = BikeCountPredictor(model_path, engine="sklearn")
+        compiled = BikeCountPredictor(model_path, engine="compiled")
+
+    print(
+        f"forest: {compiled.compiled.n_trees} trees, {compiled.compiled.n_nodes} nodes, "
+        f"max depth {compiled.compiled.max_depth}"
+    )
+    print(f"{'rows':>10} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8} {'max |diff|':>11}")
+    for n_rows in args.rows:
+        df = make_features(n_rows, seed=n_rows)
+        raw_reference = reference.model.predict(df)
+        raw_compiled = compiled.compiled.predict(df.to_numpy())
+        max_diff = float(np.max(np.abs(raw_reference - raw_compiled)))
+
+        t_reference = best_of(lambda: reference.predict_batch(df), args.repeat)
+        t_compiled = best_of(lambda: compiled.predict_batch(df), args.repeat)
+        print(
+            f"{n_rows:>10} {t_reference * 1e3:>12.2f} {t_compiled * 1e3:>12.2f} "
+            f"{t_reference / t_compiled:>7.1f}x {max_diff:>11.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
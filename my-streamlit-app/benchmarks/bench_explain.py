@@ -0,0 +1,64 @@
+"""
+Benchmark des explications : contributions sur un lot et dépendance partielle.
+
+Times ``ForestExplainer.contributions`` on ``--rows`` rows (leaf table build
+reported separately) and ``partial_dependence`` for each of the 9 features on
+a subsampled background, and checks that bias plus contributions reproduce
+the predictions.
+
+Usage::
+
+    python -m benchmarks.bench_explain --rows 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import make_features, save_model
+from explain import DEFAULT_BACKGROUND_SIZE, ForestExplainer
+from predictor import ENGINES, PREDICTION_COLUMN, BikeCountPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engine", choices=ENGINES, default="sklearn")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--background", type=int, default=DEFAULT_BACKGROUND_SIZE)
+    args = parser.parse_args()
+
+    df = make_features(args.rows, seed=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        predictor = BikeCountPredictor(model_path, engine=args.engine)
+        explainer = ForestExplainer(predictor, background=df, background_size=args.background)
+
+        start = time.perf_counter()
+        explainer._leaf_contributions()
+        table_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        explained = explainer.contributions(df)
+        contribution_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for feature in predictor.feature_columns:
+            explainer.partial_dependence(feature)
+        pd_seconds = time.perf_counter() - start
+
+        raw = predictor.predict_raw(df[predictor.feature_columns].to_numpy())
+        error = np.abs(explained[PREDICTION_COLUMN].to_numpy() - raw).max()
+
+    print(f"leaf table         {table_seconds:.2f} s")
+    print(f"contributions      {contribution_seconds:.2f} s for {args.rows:,} rows")
+    print(f"partial dependence {pd_seconds:.2f} s for 9 features x 50 points "
+          f"x {len(explainer.background)} background rows")
+    print(f"max |sum - prediction| {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
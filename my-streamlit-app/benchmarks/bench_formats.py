@@ -0,0 +1,71 @@
+"""
+CSV vs Parquet vs Arrow IPC de bout en bout pour les prédictions par lots.
+
+Writes the same synthetic batch (features plus a date and a counter column)
+in each format, then times ``BikeCountPredictor.predict_file`` reading,
+scoring and writing it back in the same format.
+
+Usage::
+
+    python -m benchmarks.bench_formats --rows 2000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_features, save_model
+from predictor import BikeCountPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--engine", choices=("sklearn", "compiled"), default="sklearn")
+    args = parser.parse_args()
+
+    df = make_features(args.rows)
+    df.insert(0, "date", pd.Timestamp("2000-01-01") + pd.to_timedelta(np.arange(args.rows) % 9000, unit="D"))
+    df.insert(1, "counter_id", (np.arange(args.rows) % 40).astype(str))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        predictor = BikeCountPredictor(
+            save_model(tmp / "model.pkl", n_estimators=args.trees), engine=args.engine
+        )
+        start = time.perf_counter()
+        predictor.predict_batch(df[predictor.feature_columns])
+        model_seconds = time.perf_counter() - start
+
+        inputs = {
+            "csv": tmp / "in.csv",
+            "parquet": tmp / "in.parquet",
+            "arrow": tmp / "in.arrow",
+        }
+        df.to_csv(inputs["csv"], index=False)
+        df.to_parquet(inputs["parquet"], index=False)
+        df.to_feather(inputs["arrow"], compression="uncompressed")
+
+        print(f"{args.rows} rows, model alone: {model_seconds:.2f} s")
+        print(f"{'format':>16} {'input MB':>9} {'seconds':>8} {'rows/s':>12}")
+        cases = [(name, path, True) for name, path in inputs.items()]
+        cases.append(("parquet (proj.)", inputs["parquet"], False))
+        for label, path, keep_columns in cases:
+            file_format = label.split()[0]
+            output = tmp / f"out-{file_format}-{keep_columns}{path.suffix}"
+            start = time.perf_counter()
+            predictor.predict_file(path, output, keep_columns=keep_columns)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>16} {path.stat().st_size / 1e6:>9.1f} {elapsed:>8.2f} "
+                f"{args.rows / elapsed:>12,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
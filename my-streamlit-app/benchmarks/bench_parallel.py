@@ -0,0 +1,69 @@
+"""
+Mise à l'échelle de predict_batch_parallel de 1 à N cœurs.
+
+Scores a synthetic feature set (10M rows by default) with an increasing
+number of workers and reports throughput and speedup over one worker.
+
+Usage::
+
+    python -m benchmarks.bench_parallel --rows 10000000 --backend process
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import make_features, save_model
+from predictor import BikeCountPredictor
+
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to and including ``max_workers``."""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--engine", choices=("sklearn", "compiled"), default="sklearn")
+    parser.add_argument("--backend", choices=("process", "thread"), default="process")
+    parser.add_argument("--shard-size", type=int, default=250_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    df = make_features(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        predictor = BikeCountPredictor(model_path, engine=args.engine)
+
+        print(f"{args.rows} rows, engine={args.engine}, backend={args.backend}")
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+        baseline = reference = None
+        for workers in worker_counts(args.max_workers):
+            start = time.perf_counter()
+            predictions = predictor.predict_batch_parallel(
+                df, n_workers=workers, shard_size=args.shard_size, backend=args.backend
+            )
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                baseline, reference = elapsed, predictions
+            else:
+                assert np.array_equal(predictions, reference)
+            print(
+                f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} "
+                f"{baseline / elapsed:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Micro-benchmark de la prédiction sur une ligne : DataFrame vs tampon réutilisé.
+
+Reports per-call latency (p50/p99) and allocations measured with
+``tracemalloc`` for the historical path (a 9-column DataFrame built on every
+call) and the preallocated-buffer fast path of ``BikeCountPredictor.predict``.
+
+Usage::
+
+    python -m benchmarks.bench_single --calls 2000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import save_model
+from predictor import BikeCountPredictor
+
+INPUTS = dict(
+    t2m_min=-5.0,
+    t2m_max=10.0,
+    tp_total=0.001,
+    sd_total=0.0,
+    i10fg_max=5.0,
+    sf_max=0.0,
+    is_weekend=0,
+    is_holiday=0,
+    is_school_vacation=0,
+)
+
+
+def dataframe_path(predictor):
+    """The pre-fast-path implementation of ``predict``."""
+    features = pd.DataFrame(
+        {
+            "t2m_min": [float(INPUTS["t2m_min"])],
+            "t2m_max": [float(INPUTS["t2m_max"])],
+            "tp_total": [float(INPUTS["tp_total"])],
+            "sd_total": [float(INPUTS["sd_total"])],
+            "i10fg_max": [float(INPUTS["i10fg_max"])],
+            "sf_max": [float(INPUTS["sf_max"])],
+            "is_weekend": [int(INPUTS["is_weekend"])],
+            "is_holiday": [int(INPUTS["is_holiday"])],
+            "is_school_vacation": [int(INPUTS["is_school_vacation"])],
+        }
+    )
+    if predictor.compiled is not None:
+        prediction = predictor.compiled.predict(features[predictor.feature_columns].to_numpy())
+    else:
+        prediction = predictor.model.predict(features)
+    return int(round(prediction[0]))
+
+
+def buffer_path(predictor):
+    """The current ``predict`` fast path."""
+    return predictor.predict(**INPUTS)
+
+
+def measure(func, predictor, calls):
+    """Return latency percentiles (µs) and the traced allocation peak."""
+    for _ in range(min(calls, 50)):
+        func(predictor)
+    latencies = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        func(predictor)
+        latencies[i] = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(min(calls, 200)):
+        func(predictor)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_us": np.percentile(latencies, 50) * 1e6,
+        "p99_us": np.percentile(latencies, 99) * 1e6,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--trees", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        predictors = {
+            engine: BikeCountPredictor(model_path, engine=engine)
+            for engine in ("sklearn", "compiled")
+        }
+
+    print(f"{'engine':>9} {'path':>10} {'p50 µs':>9} {'p99 µs':>9} {'peak KiB':>9}")
+    for engine, predictor in predictors.items():
+        assert dataframe_path(predictor) == buffer_path(predictor)
+        for label, func in (("dataframe", dataframe_path), ("buffer", buffer_path)):
+            stats = measure(func, predictor, args.calls)
+            print(
+                f"{engine:>9} {label:>10} {stats['p50_us']:>9.1f} "
+                f"{stats['p99_us']:>9.1f} {stats['peak_kib']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark du balayage de scénarios : un appel par point vs grille vectorisée.
+
+Times ``sweep`` on a Cartesian grid of ``t2m_max`` x ``tp_total`` x
+``i10fg_max`` x ``is_weekend`` and, on a sample of the grid, the historical
+one-``predict``-call-per-scenario loop, extrapolated to the full grid.
+
+Usage::
+
+    python -m benchmarks.bench_sweep --engine sklearn
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import save_model
+from predictor import ENGINES, BikeCountPredictor
+from sweep import grid_values, sweep
+
+BASE = dict(
+    t2m_min=5.0,
+    t2m_max=15.0,
+    tp_total=0.001,
+    sd_total=0.0,
+    i10fg_max=5.0,
+    sf_max=0.0,
+    is_weekend=0,
+    is_holiday=0,
+    is_school_vacation=0,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--engine", choices=ENGINES, default="sklearn")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--loop-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    ranges = {
+        "t2m_max": grid_values(-5.0, 35.0, 0.5),
+        "tp_total": grid_values(0.0, 0.03, 0.0001),
+        "i10fg_max": grid_values(0.0, 20.0, 1.0),
+        "is_weekend": [0, 1],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        predictor = BikeCountPredictor(model_path, engine=args.engine)
+
+        start = time.perf_counter()
+        grid = sweep(predictor, ranges, BASE)
+        sweep_seconds = time.perf_counter() - start
+
+        sample = grid.sample(min(args.loop_sample, len(grid)), random_state=0)
+        start = time.perf_counter()
+        for row in sample.to_dict(orient="records"):
+            predictor.predict(**{**BASE, **{name: row[name] for name in ranges}})
+        per_call = (time.perf_counter() - start) / len(sample)
+
+    print(f"grid points        {len(grid):,}")
+    print(f"sweep              {sweep_seconds:.2f} s")
+    print(f"predict loop (est) {per_call * len(grid):.1f} s  ({per_call * 1e3:.2f} ms/call)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Générateur de charge pour serve.py : latence p50/p99 et débit.
+
+Opens ``--concurrency`` keep-alive connections, each sending single-row
+``POST /predict`` requests back to back for ``--duration`` seconds. Without
+``--url``, a server is started on a synthetic model in a subprocess.
+
+Usage::
+
+    python -m benchmarks.load_generator --concurrency 64 --duration 10
+    python -m benchmarks.load_generator --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from benchmarks.synthetic import make_features, save_model
+
+
+async def http_post(reader, writer, host, path, payload):
+    """Send one keep-alive POST and return the decoded JSON response."""
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        (
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    response = json.loads(await reader.readexactly(length))
+    if b" 200 " not in status_line:
+        raise RuntimeError(f"{status_line.decode().strip()}: {response}")
+    return response
+
+
+async def client(host, port, rows, stop_at, latencies):
+    """Send requests on one connection until ``stop_at``."""
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            await http_post(reader, writer, host, "/predict", rows[i % len(rows)])
+            latencies.append(time.perf_counter() - start)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, duration, rows):
+    """Run the clients and return (latencies, elapsed seconds)."""
+    latencies = []
+    start = time.perf_counter()
+    stop_at = start + duration
+    await asyncio.gather(
+        *(client(host, port, rows, stop_at, latencies) for _ in range(concurrency))
+    )
+    return np.array(latencies), time.perf_counter() - start
+
+
+async def wait_until_ready(host, port, timeout=60.0):
+    """Poll the server port until it accepts connections."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="running server, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--window-ms", type=float, default=2.0, help="spawned server only")
+    parser.add_argument("--engine", default="compiled", help="spawned server only")
+    parser.add_argument("--trees", type=int, default=100, help="spawned server only")
+    parser.add_argument("--port", type=int, default=8765, help="spawned server only")
+    args = parser.parse_args()
+
+    rows = make_features(1000, seed=7).to_dict(orient="records")
+
+    server = None
+    tmp = tempfile.TemporaryDirectory()
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        model_path = save_model(Path(tmp.name) / "model.pkl", n_estimators=args.trees)
+        server = subprocess.Popen(
+            [
+                sys.executable, "serve.py", "--model", str(model_path),
+                "--engine", args.engine, "--port", str(port),
+                "--window-ms", str(args.window_ms),
+            ],
+            cwd=Path(__file__).resolve().parent.parent,
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        asyncio.run(wait_until_ready(host, port))
+        latencies, elapsed = asyncio.run(
+            run_load(host, port, args.concurrency, args.duration, rows)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        tmp.cleanup()
+
+    print(f"requests     {len(latencies)}")
+    print(f"throughput   {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50  {np.percentile(latencies, 50) * 1e3:.2f} ms")
+    print(f"latency p99  {np.percentile(latencies, 99) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Suite de benchmarks reproductible, avec sauvegarde JSON et comparaison.
+
+``run`` measures, on a synthetic forest with the 9 production features:
+
+- cold start: import, model load and first prediction in a fresh interpreter,
+  for the joblib pickle and the exported bundle (see ``bench_cold_start``);
+- single-row latency distribution of ``predict`` (mean, p50, p90, p99);
+- ``predict_batch`` throughput from 1e3 to 1e7 rows;
+- the batch tab's CSV loop (``predict_csv``), split into parse, score and
+  serialize with the predictor's stage metrics.
+
+Each measurement is stored under a flat name such as
+``batch.compiled.1000000.rows_per_s`` together with its unit and whether
+lower or higher is better. ``compare`` reads two result files and flags every
+measurement that got worse by more than ``--threshold``; it exits with
+status 1 when there is a regression, so it can gate a CI job.
+
+Usage::
+
+    python -m benchmarks.suite run --output bench-main.json
+    python -m benchmarks.suite run --output bench-branch.json --max-rows 1000000
+    python -m benchmarks.suite compare bench-main.json bench-branch.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.bench_cold_start import run_child
+from benchmarks.bench_single import INPUTS
+from benchmarks.synthetic import make_features, save_model
+from export_model import export_bundle
+from predictor import ENGINES, BikeCountPredictor
+
+SCHEMA_VERSION = 1
+
+BATCH_SIZES = [10 ** k for k in range(3, 8)]
+
+# Minimum total wall time spent on each batch size, split into repeats
+BATCH_BUDGET_SECONDS = 2.0
+
+
+def _result(value, unit, better="lower"):
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def bench_cold_start(model_path, bundle_path, runs):
+    """Best-of-``runs`` cold start of the pickle and the bundle."""
+    results = {}
+    for label, path, engine in (
+        ("pickle", model_path, "sklearn"),
+        ("bundle", bundle_path, "compiled"),
+    ):
+        samples = [run_child(path, engine, None) for _ in range(runs)]
+        best = min(samples, key=lambda sample: sample["load_s"])
+        for key in ("import_s", "load_s", "first_predict_s"):
+            results[f"cold_start.{label}.{key}"] = _result(best[key], "s")
+        if best["rss_mb"] is not None:
+            results[f"cold_start.{label}.rss_mb"] = _result(best["rss_mb"], "MB")
+    return results
+
+
+def bench_single(predictor, engine, calls):
+    """Latency percentiles of ``predict`` on one row."""
+    for _ in range(min(calls, 100)):
+        predictor.predict(**INPUTS)
+    latencies = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        predictor.predict(**INPUTS)
+        latencies[i] = time.perf_counter() - start
+    latencies *= 1e6
+    results = {
+        f"single.{engine}.p{q}_us": _result(np.percentile(latencies, q), "us")
+        for q in (50, 90, 99)
+    }
+    results[f"single.{engine}.mean_us"] = _result(latencies.mean(), "us")
+    return results
+
+
+def bench_batch(predictor, engine, sizes):
+    """Best ``predict_batch`` throughput at each size."""
+    results = {}
+    for n_rows in sizes:
+        X = make_features(n_rows, seed=n_rows).to_numpy(dtype=np.float64)
+        timings = []
+        while not timings or (sum(timings) < BATCH_BUDGET_SECONDS and len(timings) < 20):
+            start = time.perf_counter()
+            predictor.predict_batch(X)
+            timings.append(time.perf_counter() - start)
+        results[f"batch.{engine}.{n_rows}.rows_per_s"] = _result(
+            n_rows / min(timings), "rows/s", better="higher"
+        )
+        del X
+    return results
+
+
+def bench_csv(model_path, engine, n_rows, directory):
+    """Parse, score and serialize times of ``predict_csv`` on a dated CSV."""
+    df = make_features(n_rows, seed=1)
+    df.insert(0, "date", pd.Timestamp("2000-01-01") + pd.to_timedelta(np.arange(n_rows) % 9000,
+                                                                        unit="D"))
+    source = Path(directory) / "batch.csv"
+    df.to_csv(source, index=False)
+
+    predictor = BikeCountPredictor(model_path, engine=engine, metrics=True)
+    predictor.metrics.reset()
+    start = time.perf_counter()
+    predictor.predict_csv(source, Path(directory) / "scored.csv")
+    total = time.perf_counter() - start
+
+    stages = predictor.metrics_snapshot()["stages"]
+    score = sum(stages[name]["seconds"] for name in ("prepare", "evaluate") if name in stages)
+    results = {
+        f"csv.{engine}.parse_s": _result(stages["parse"]["seconds"], "s"),
+        f"csv.{engine}.score_s": _result(score, "s"),
+        f"csv.{engine}.serialize_s": _result(stages["serialize"]["seconds"], "s"),
+        f"csv.{engine}.rows_per_s": _result(n_rows / total, "rows/s", better="higher"),
+    }
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    sizes = [n for n in BATCH_SIZES if n <= args.max_rows]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = save_model(Path(tmp) / "model.pkl", n_estimators=args.trees)
+        bundle_path = Path(tmp) / "model.bundle"
+        export_bundle(model_path, bundle_path)
+
+        print("cold start...", flush=True)
+        results.update(bench_cold_start(model_path, bundle_path, args.runs))
+        forest = None
+        for engine in args.engines:
+            predictor = BikeCountPredictor(model_path, engine=engine)
+            print(f"{engine}: single row...", flush=True)
+            results.update(bench_single(predictor, engine, args.calls))
+            print(f"{engine}: batches {', '.join(f'{n:,}' for n in sizes)}...", flush=True)
+            results.update(bench_batch(predictor, engine, sizes))
+            print(f"{engine}: CSV {args.csv_rows:,} rows...", flush=True)
+            results.update(bench_csv(model_path, engine, args.csv_rows, tmp))
+            if predictor.compiled is not None:
+                forest = predictor.compiled
+            del predictor
+
+    report = {
+        "version": SCHEMA_VERSION,
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "trees": args.trees,
+            "nodes": int(forest.n_nodes) if forest is not None else None,
+            "max_rows": args.max_rows,
+            "csv_rows": args.csv_rows,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print_results(results)
+    print(f"Saved {len(results)} measurements to {args.output}")
+
+
+def print_results(results):
+    width = max(len(name) for name in results)
+    for name, result in sorted(results.items()):
+        print(f"{name:<{width}} {result['value']:>14,.3f} {result['unit']}")
+
+
+def compare_results(baseline, candidate, threshold):
+    """
+    Compare two ``results`` dicts.
+
+    Parameters
+    ----------
+    baseline, candidate : dict
+        ``results`` of two runs
+    threshold : float
+        Relative slowdown tolerated, e.g. 0.1 for 10 %
+
+    Returns
+    -------
+    list of tuple
+        ``(name, baseline value, candidate value, change, regressed)`` for
+        each measurement of both runs; ``change`` is the relative slowdown
+        (positive is worse), whatever the direction of the measurement
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(candidate)):
+        before, after = baseline[name]["value"], candidate[name]["value"]
+        if before <= 0 or after <= 0:
+            continue
+        if baseline[name]["better"] == "higher":
+            change = before / after - 1.0
+        else:
+            change = after / before - 1.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def compare(args):
+    reports = []
+    for path in (args.baseline, args.candidate):
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        if report.get("version") != SCHEMA_VERSION:
+            sys.exit(f"{path}: unsupported benchmark file version {report.get('version')}")
+        reports.append(report)
+    baseline, candidate = (report["results"] for report in reports)
+
+    for key in ("commit", "machine", "sklearn", "trees"):
+        before, after = (report["meta"].get(key) for report in reports)
+        if key != "commit" and before != after:
+            print(f"warning: {key} differs ({before} vs {after}), results may not be comparable")
+
+    rows = compare_results(baseline, candidate, args.threshold)
+    width = max([len(row[0]) for row in rows] + [11])
+    print(f"{'measurement':<{width}} {'baseline':>14} {'candidate':>14} {'change':>8}")
+    for name, before, after, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<{width}} {before:>14,.3f} {after:>14,.3f} {change:>+8.1%}{flag}")
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print(f"{name:<{width}} only in {'baseline' if name in baseline else 'candidate'}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regression above {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite and save a JSON report")
+    run_parser.add_argument("--output", type=Path, required=True)
+    run_parser.add_argument("--trees", type=int, default=100)
+    run_parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    run_parser.add_argument("--max-rows", type=int, default=BATCH_SIZES[-1],
+                            help="largest predict_batch size (powers of ten from 1e3)")
+    run_parser.add_argument("--csv-rows", type=int, default=1_000_000)
+    run_parser.add_argument("--calls", type=int, default=5000,
+                            help="single-row predictions timed per engine")
+    run_parser.add_argument("--runs", type=int, default=3,
+                            help="cold start repetitions (the best is kept)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two reports")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("candidate", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative slowdown flagged as a regression (default 0.1)")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Données et modèle synthétiques pour les benchmarks.
+
+The synthetic forest uses the same 9 features as the production model so the
+benchmarks run offline, without ``data/bike_count_model.pkl``.
+"""
+
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+
+from predictor import FEATURE_COLUMNS
+
+
+def make_features(n_rows, seed=0):
+    """
+    Draw a plausible daily feature frame.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of rows to generate
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    pd.DataFrame
+        Frame with the 9 feature columns, in model order
+    """
+    rng = np.random.default_rng(seed)
+    t2m_min = rng.normal(8.0, 6.0, n_rows).round(1)
+    t2m_max = (t2m_min + rng.gamma(4.0, 2.0, n_rows)).round(1)
+    rainy = rng.random(n_rows) < 0.45
+    tp_total = np.where(rainy, rng.exponential(0.004, n_rows), 0.0).round(4)
+    snowy = (t2m_min < 0) & (rng.random(n_rows) < 0.2)
+    sf_max = np.where(snowy, rng.exponential(0.01, n_rows), 0.0).round(3)
+    sd_total = np.where(snowy, rng.exponential(0.03, n_rows), 0.0).round(3)
+    i10fg_max = rng.gamma(3.0, 3.0, n_rows).round(1)
+    is_weekend = (rng.random(n_rows) < 2 / 7).astype(np.int64)
+    is_holiday = (rng.random(n_rows) < 0.03).astype(np.int64)
+    is_school_vacation = (rng.random(n_rows) < 0.3).astype(np.int64)
+    return pd.DataFrame(
+        {
+            "t2m_min": t2m_min,
+            "t2m_max": t2m_max,
+            "tp_total": tp_total,
+            "sd_total": sd_total,
+            "i10fg_max": i10fg_max,
+            "sf_max": sf_max,
+            "is_weekend": is_weekend,
+            "is_holiday": is_holiday,
+            "is_school_vacation": is_school_vacation,
+        }
+    )[FEATURE_COLUMNS]
+
+
+def make_target(features, seed=0):
+    """Synthetic daily bike count driven by temperature, rain and day type."""
+    rng = np.random.default_rng(seed + 1)
+    count = (
+        30000
+        + 900 * features["t2m_max"].clip(-5, 25)
+        - 1.5e6 * features["tp_total"].clip(0, 0.02)
+        - 300 * features["i10fg_max"]
+        - 40000 * features["sd_total"]
+        - 9000 * features["is_weekend"]
+        - 7000 * features["is_holiday"]
+        - 4000 * features["is_school_vacation"]
+    )
+    return (count + rng.normal(0, 3000, len(features))).clip(lower=0)
+
+
+def make_model(n_estimators=100, max_depth=None, n_train=20000, seed=0):
+    """
+    Fit a RandomForestRegressor on synthetic data.
+
+    Parameters
+    ----------
+    n_estimators : int
+        Number of trees
+    max_depth : int, optional
+        Maximum tree depth
+    n_train : int
+        Number of training rows
+    seed : int
+        Random seed
+
+    Returns
+    -------
+    RandomForestRegressor
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    features = make_features(n_train, seed=seed)
+    target = make_target(features, seed=seed)
+    model = RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=2,
+        random_state=seed,
+        n_jobs=-1,
+    )
+    model.fit(features, target)
+    return model
+
+
+def save_model(path, **kwargs):
+    """Fit a synthetic model (see ``make_model``) and dump it with joblib."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(make_model(**kwargs), path)
+    return path
@@ -0,0 +1,228 @@
+"""
+Export compact du modèle : seuils float32 ou binnés, indices réduits, élagage.
+
+Turns the model loaded by ``BikeCountPredictor`` into a ``CompactForest``
+bundle (see ``forest_engine.py``): narrow node arrays, float32 or binned
+(uint16) thresholds, optionally float32 leaf values, and optionally fewer
+trees or a smaller depth. Threshold compaction is exact; float32 values,
+``--trees`` and ``--max-depth`` change predictions, so the tool reports the
+accuracy delta on a holdout along with the size and latency of both forests.
+
+The bundle is loaded like any other: ``BikeCountPredictor(path,
+engine="compiled")``, or by placing it at ``data/bike_count_model.bundle``.
+
+Usage::
+
+    python compress_model.py data/bike_count_model.pkl data/compact.bundle --thresholds binned
+    python compress_model.py data/bike_count_model.pkl data/small.bundle \\
+        --trees 50 --max-depth 16 --values float32 --holdout data/feature_store
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from forest_engine import THRESHOLD_MODES, CompactForest
+from predictor import DATE_COLUMN, FLAG_COLUMNS, BikeCountPredictor
+
+VALUE_DTYPES = {"float64": np.float64, "float32": np.float32}
+
+# Rows scored to measure batch throughput
+THROUGHPUT_ROWS = 100_000
+
+
+def compress_model(model_path, bundle_path, thresholds="float32", values="float64",
+                   n_trees=None, max_depth=None):
+    """
+    Compact the forest of a model file or bundle and save it as a bundle.
+
+    Parameters
+    ----------
+    model_path : str or Path
+        joblib model or bundle loadable by ``BikeCountPredictor``
+    bundle_path : str or Path
+        Output bundle directory
+    thresholds : {"float32", "binned"}, default "float32"
+        Threshold storage, see ``CompactForest``
+    values : {"float64", "float32"}, default "float64"
+        Node value type
+    n_trees : int, optional
+        Keep only the first trees
+    max_depth : int, optional
+        Cut the trees at this depth
+
+    Returns
+    -------
+    original : CompiledForest
+        The forest of ``model_path``
+    compact : CompactForest
+        The exported forest
+    """
+    original = BikeCountPredictor(model_path, engine="compiled").compiled
+    forest = original
+    if n_trees is not None or max_depth is not None:
+        forest = forest.prune(n_trees, max_depth)
+    compact = CompactForest.from_forest(forest, thresholds, VALUE_DTYPES[values])
+    compact.save(bundle_path)
+
+    # Refuse to leave behind a bundle that disagrees with the forest it encodes
+    check = BikeCountPredictor(bundle_path, engine="compiled").compiled
+    X = _random_rows(forest, 256, seed=0)
+    if not np.allclose(check.predict(X), forest.predict(X), rtol=1e-6, atol=1e-2):
+        raise RuntimeError(f"Exported bundle {bundle_path} does not reproduce the model")
+    return original, compact
+
+
+def load_holdout(path, feature_columns, target_column="bike_count", fraction=0.2):
+    """
+    Read holdout rows from a table file or the last days of a feature store.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV, Parquet or Arrow file, or a feature store directory (see
+        ``train.FeatureStore``), of which the latest ``fraction`` of days
+        is used
+    feature_columns : list of str
+        Model features
+    target_column : str, default "bike_count"
+        Observed count, optional in a table file
+    fraction : float, default 0.2
+        Share of the feature store kept as holdout
+
+    Returns
+    -------
+    X : np.ndarray
+    y : np.ndarray or None
+    """
+    from train import FeatureStore, read_table
+
+    path = Path(path)
+    if path.is_dir():
+        frame = FeatureStore(path).load()
+        frame = frame.sort_values(DATE_COLUMN).iloc[int(len(frame) * (1 - fraction)):]
+    else:
+        frame = read_table(path)
+    missing = [name for name in feature_columns if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Holdout misses columns: {', '.join(missing)}")
+    X = frame[feature_columns].to_numpy(dtype=np.float64)
+    y = frame[target_column].to_numpy(dtype=np.float64) if target_column in frame else None
+    return X, y
+
+
+def evaluate(forest, X, y=None, reference=None):
+    """
+    Size, accuracy and latency of a forest on some rows.
+
+    Parameters
+    ----------
+    forest : CompiledForest
+        Forest to evaluate
+    X : np.ndarray
+        Rows in the model's column order
+    y : np.ndarray, optional
+        Observed counts, for the MAE
+    reference : np.ndarray, optional
+        Predictions of the original forest on ``X``, for the deltas
+
+    Returns
+    -------
+    dict
+    """
+    predictions = forest.predict(X)
+    report = {
+        "trees": forest.n_trees,
+        "nodes": forest.n_nodes,
+        "megabytes": forest.nbytes / 1e6,
+        "mae": float(np.mean(np.abs(predictions - y))) if y is not None else None,
+    }
+    if reference is not None:
+        delta = np.abs(predictions - reference)
+        report["mean_delta"] = float(delta.mean())
+        report["max_delta"] = float(delta.max())
+        report["changed_share"] = float(np.mean(predictions.round() != reference.round()))
+
+    row = X[:1]
+    for _ in range(20):
+        forest.predict(row)
+    latencies = []
+    for _ in range(200):
+        start = time.perf_counter()
+        forest.predict(row)
+        latencies.append(time.perf_counter() - start)
+    report["single_us"] = float(np.median(latencies) * 1e6)
+
+    batch = np.resize(X, (max(len(X), THROUGHPUT_ROWS), X.shape[1]))
+    start = time.perf_counter()
+    forest.predict(batch)
+    report["rows_per_s"] = len(batch) / (time.perf_counter() - start)
+    return report, predictions
+
+
+def _random_rows(forest, n_rows, seed=0):
+    """Rows drawn uniformly across the threshold range of each feature."""
+    rng = np.random.default_rng(seed)
+    thresholds = forest.split_thresholds()
+    X = np.empty((n_rows, len(thresholds)))
+    for f, (name, values) in enumerate(zip(forest.feature_names or (), thresholds)):
+        if name in FLAG_COLUMNS or len(values) == 0:
+            X[:, f] = rng.integers(0, 2, n_rows)
+        else:
+            margin = max(values[-1] - values[0], 1.0) * 0.05
+            X[:, f] = rng.uniform(values[0] - margin, values[-1] + margin, n_rows)
+    return X
+
+
+def _format(value, pattern):
+    return "n/a" if value is None else format(value, pattern)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a compact forest bundle.")
+    parser.add_argument("model_path", type=Path, help="joblib model file or bundle directory")
+    parser.add_argument("bundle_path", type=Path, help="output bundle directory")
+    parser.add_argument("--thresholds", choices=THRESHOLD_MODES, default="float32",
+                        help="float32 or binned (uint16) thresholds; both are exact")
+    parser.add_argument("--values", choices=tuple(VALUE_DTYPES), default="float64",
+                        help="node value type; float32 is slightly lossy")
+    parser.add_argument("--trees", type=int, help="keep only the first TREES trees")
+    parser.add_argument("--max-depth", type=int, help="cut trees at this depth")
+    parser.add_argument("--holdout", type=Path,
+                        help="table with the features (and bike_count), or a feature store "
+                             "directory whose latest 20%% of days are used; random rows "
+                             "spanning the thresholds otherwise")
+    args = parser.parse_args()
+
+    original, compact = compress_model(
+        args.model_path, args.bundle_path, thresholds=args.thresholds, values=args.values,
+        n_trees=args.trees, max_depth=args.max_depth,
+    )
+    if args.holdout is not None:
+        X, y = load_holdout(args.holdout, original.feature_names)
+    else:
+        X, y = _random_rows(original, 10_000, seed=1), None
+
+    before, reference = evaluate(original, X, y)
+    after, _ = evaluate(compact, X, y, reference)
+    print(f"Exported {args.bundle_path} ({args.thresholds} thresholds, {args.values} values)")
+    print(f"{'':>9} {'trees':>6} {'nodes':>10} {'MB':>7} {'MAE':>8} {'1 row µs':>9} {'rows/s':>11}")
+    for label, report in (("original", before), ("compact", after)):
+        print(
+            f"{label:>9} {report['trees']:>6} {report['nodes']:>10,} "
+            f"{report['megabytes']:>7.1f} {_format(report['mae'], '.1f'):>8} "
+            f"{report['single_us']:>9.0f} {report['rows_per_s']:>11,.0f}"
+        )
+    print(
+        f"On {len(X):,} {'holdout' if args.holdout else 'random'} rows: mean |delta| "
+        f"{after['mean_delta']:.3g}, max |delta| {after['max_delta']:.3g} bikes, "
+        f"{after['changed_share']:.2%} of rounded predictions changed"
+    )
+    if y is not None:
+        print(f"MAE delta: {after['mae'] - before['mae']:+.1f} bikes")
+
+
+if __name__ == "__main__":
+    main()
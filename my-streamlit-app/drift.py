@@ -0,0 +1,441 @@
+"""
+Surveillance de dérive : esquisses des entrées et des résidus, alertes PSI/KS.
+
+``DriftMonitor`` watches the rows scored by a ``BikeCountPredictor`` (pass
+it as ``monitor=``) without storing them:
+
+- each of the 9 input features is summarized by a histogram over fixed
+  edges, the deciles (or ``bins``-quantiles) of the training data. The live
+  histogram is compared to the training one with the population stability
+  index (PSI) and the Kolmogorov-Smirnov distance of the binned CDFs, and
+  values outside the training range are counted;
+- once observed counts arrive (``record_actuals``), each counter keeps an
+  exponentially weighted mean and variance of its relative residuals, so a
+  day far from the counter's usual error, a persistent bias, or zero counts
+  where traffic is expected (counter offline) are flagged. All residuals
+  also feed one histogram, for their quantiles.
+
+Memory is constant in the number of rows: a few dozen numbers per feature
+and per counter. The reference histograms are built from the training
+features with ``DriftMonitor.from_frame`` and saved as JSON next to the
+model (``train.py`` does it after training).
+
+Usage::
+
+    python drift.py --store data/feature_store --output data/bike_count_model.drift.json
+"""
+
+import argparse
+import json
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predictor import FEATURE_COLUMNS, FLAG_COLUMNS
+
+# Observed count and counter id columns of batches with actuals, as in train.py and backtest.py
+ACTUAL_COLUMN = "bike_count"
+COUNTER_COLUMN = "counter_id"
+# Counter of actuals without a counter id (city totals)
+TOTAL_COUNTER = "total"
+
+DRIFT_BINS = 10
+
+# Usual PSI reading: below 0.1 stable, 0.1 to 0.25 moderate shift, above 0.25 major shift
+PSI_THRESHOLD = 0.25
+# Significance level of the KS test, and its coefficient c(alpha)
+KS_ALPHA = 0.01
+_KS_COEFFICIENTS = {0.1: 1.224, 0.05: 1.358, 0.01: 1.628, 0.001: 1.949}
+# Share of live values outside the training range flagged
+OUT_OF_RANGE_SHARE = 0.01
+# Live rows needed before a feature is tested
+MIN_ROWS = 100
+# Rows of a larger batch actually binned, evenly strided and weighted up to the batch size
+OBSERVE_SAMPLE = 65_536
+
+# Per-counter residuals: weight of the latest day in the running mean and variance
+RESIDUAL_ALPHA = 0.1
+# Days observed before a counter is tested
+RESIDUAL_WARMUP = 14
+# |z| of a day's relative residual flagged as an anomaly
+ANOMALY_Z = 3.0
+# |running mean| of relative residuals flagged as a bias
+BIAS_SHARE = 0.25
+# Consecutive zero counts, with at least OFFLINE_MIN_PREDICTED bikes expected, flagged offline
+OFFLINE_DAYS = 2
+OFFLINE_MIN_PREDICTED = 100
+
+# Edges of the relative residual histogram: -100 % to +100 % by 10 %
+RESIDUAL_EDGES = np.linspace(-1.0, 1.0, 21)
+
+FLAG_KINDS = ("psi", "ks", "out_of_range", "anomaly", "bias", "offline")
+
+
+def reference_path(model_path):
+    """Drift reference file of a model file or bundle, e.g. ``bike_count_model.drift.json``."""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}.drift.json")
+
+
+class Histogram:
+    """Counts of values per bin of fixed edges; bin ``k`` holds ``edges[k-1] <= x < edges[k]``."""
+
+    def __init__(self, edges, counts=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = (
+            np.zeros(len(self.edges) + 1) if counts is None else np.asarray(counts, np.float64)
+        )
+
+    def update(self, values, weight=1.0):
+        """Add values, each counted ``weight`` times; NaN are skipped."""
+        values = values[~np.isnan(values)]
+        bins = np.searchsorted(self.edges, values, side="right")
+        self.counts += weight * np.bincount(bins, minlength=len(self.counts))
+
+    @property
+    def total(self):
+        return float(self.counts.sum())
+
+    def proportions(self):
+        total = self.total
+        return self.counts / total if total else self.counts
+
+    def quantile(self, q):
+        """
+        Approximate quantile, linear within each bin.
+
+        The outer bins are unbounded; their values are reported as the
+        outermost edge.
+        """
+        total = self.total
+        if not total or len(self.edges) == 0:
+            return math.nan
+        cumulative = np.cumsum(self.counts) / total
+        k = int(np.searchsorted(cumulative, q))
+        if k == 0:
+            return float(self.edges[0])
+        if k >= len(self.edges):
+            return float(self.edges[-1])
+        before = cumulative[k - 1]
+        share = (q - before) / (cumulative[k] - before) if cumulative[k] > before else 0.0
+        return float(self.edges[k - 1] + share * (self.edges[k] - self.edges[k - 1]))
+
+    def to_dict(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["edges"], data["counts"])
+
+
+def psi(expected, actual, epsilon=1e-4):
+    """Population stability index of two histograms over the same edges."""
+    p = np.maximum(expected.proportions(), epsilon)
+    q = np.maximum(actual.proportions(), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_distance(expected, actual):
+    """Largest gap between the CDFs of two histograms at the bin edges."""
+    return float(np.max(np.abs(
+        np.cumsum(expected.proportions()) - np.cumsum(actual.proportions())
+    )))
+
+
+def ks_critical(n_expected, n_actual, alpha=KS_ALPHA):
+    """Two-sample KS distance above which the samples differ at level ``alpha``."""
+    return _KS_COEFFICIENTS[alpha] * math.sqrt((n_expected + n_actual) / (n_expected * n_actual))
+
+
+class _CounterResiduals:
+    """Running statistics of one counter's relative residuals."""
+
+    __slots__ = ("days", "mean", "var", "last", "last_z", "zeros")
+
+    def __init__(self):
+        self.days = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.last = math.nan
+        self.last_z = math.nan
+        self.zeros = 0
+
+    def update(self, relative, actual, predicted, alpha):
+        if self.days >= 2 and self.var > 0:
+            self.last_z = (relative - self.mean) / math.sqrt(self.var)
+        else:
+            self.last_z = math.nan
+        # Exponentially weighted mean and variance (West's incremental form)
+        delta = relative - self.mean
+        weight = alpha if self.days else 1.0
+        self.mean += weight * delta
+        self.var = (1.0 - weight) * (self.var + weight * delta * delta)
+        self.days += 1
+        self.last = relative
+        expected = predicted >= OFFLINE_MIN_PREDICTED
+        self.zeros = self.zeros + 1 if actual == 0 and expected else 0
+
+
+class DriftMonitor:
+    """Constant-memory input drift and residual monitor, see the module docstring."""
+
+    def __init__(self, reference, ranges=None, psi_threshold=PSI_THRESHOLD, ks_alpha=KS_ALPHA,
+                 min_rows=MIN_ROWS):
+        """
+        Parameters
+        ----------
+        reference : mapping
+            Feature name to its training ``Histogram``
+        ranges : mapping, optional
+            Feature name to the (min, max) seen in training
+        psi_threshold : float, default 0.25
+            PSI above which a feature is flagged
+        ks_alpha : {0.1, 0.05, 0.01, 0.001}, default 0.01
+            Level of the KS test
+        min_rows : int, default 100
+            Live rows needed before a feature is tested
+        """
+        self.reference = dict(reference)
+        self.ranges = dict(ranges or {})
+        self.psi_threshold = psi_threshold
+        self.ks_alpha = ks_alpha
+        self.min_rows = min_rows
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget every live observation, keeping the reference."""
+        self._live = {name: Histogram(hist.edges) for name, hist in self.reference.items()}
+        self._outside = dict.fromkeys(self.reference, 0)
+        self._residuals = Histogram(RESIDUAL_EDGES)
+        self._counters = {}
+
+    @classmethod
+    def from_frame(cls, frame, bins=DRIFT_BINS, **kwargs):
+        """
+        Build the reference from training features.
+
+        Parameters
+        ----------
+        frame : pd.DataFrame
+            Training rows with the 9 feature columns
+        bins : int, default 10
+            Quantile bins of the weather features; day flags get 2 bins
+        **kwargs
+            Passed to ``DriftMonitor``
+        """
+        reference, ranges = {}, {}
+        for name in FEATURE_COLUMNS:
+            values = frame[name].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if name in FLAG_COLUMNS:
+                edges = np.array([0.5])
+            else:
+                edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+            hist = Histogram(edges)
+            hist.update(values)
+            reference[name] = hist
+            ranges[name] = (float(values.min()), float(values.max()))
+        return cls(reference, ranges, **kwargs)
+
+    def save(self, path):
+        """Write the reference histograms and ranges as JSON."""
+        data = {
+            "features": {
+                name: {**hist.to_dict(), "range": list(self.ranges.get(name, ()))}
+                for name, hist in self.reference.items()
+            },
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Read a reference written by ``save``."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        reference = {name: Histogram.from_dict(entry) for name, entry in data["features"].items()}
+        ranges = {
+            name: tuple(entry["range"]) for name, entry in data["features"].items() if entry["range"]
+        }
+        return cls(reference, ranges, **kwargs)
+
+    def observe(self, X, columns=FEATURE_COLUMNS):
+        """
+        Add scored rows to the live histograms.
+
+        Batches larger than ``OBSERVE_SAMPLE`` rows are binned on an even
+        stride of rows, each counted for the rows it stands for, so the cost
+        of a call is bounded.
+
+        Parameters
+        ----------
+        X : np.ndarray
+            2-D array whose first columns follow ``columns``
+        columns : list of str, default ``FEATURE_COLUMNS``
+            Names of the leading columns of ``X``
+        """
+        X = np.asarray(X, dtype=np.float64)
+        weight = 1.0
+        if len(X) > OBSERVE_SAMPLE:
+            weight = len(X) / len(X[::len(X) // OBSERVE_SAMPLE])
+            X = X[::len(X) // OBSERVE_SAMPLE]
+        with self._lock:
+            for j, name in enumerate(columns):
+                hist = self._live.get(name)
+                if hist is None:
+                    continue
+                values = X[:, j]
+                hist.update(values, weight)
+                if name in self.ranges:
+                    lo, hi = self.ranges[name]
+                    self._outside[name] += weight * np.count_nonzero((values < lo) | (values > hi))
+
+    def record_actuals(self, counter_ids, predicted, actual):
+        """
+        Add observed counts and the predictions made for them.
+
+        Rows of one counter must be in chronological order.
+
+        Parameters
+        ----------
+        counter_ids : scalar or array-like
+            Counter of each row, or one counter for all of them
+        predicted, actual : array-like
+            Predicted and observed bike counts
+        """
+        predicted = np.atleast_1d(np.asarray(predicted, dtype=np.float64))
+        actual = np.atleast_1d(np.asarray(actual, dtype=np.float64))
+        counter_ids = np.broadcast_to(np.asarray(counter_ids, dtype=object), predicted.shape)
+        known = ~(np.isnan(predicted) | np.isnan(actual))
+        predicted, actual, counter_ids = predicted[known], actual[known], counter_ids[known]
+        relative = (actual - predicted) / np.maximum(predicted, 1.0)
+        with self._lock:
+            self._residuals.update(relative)
+            codes, counters = pd.factorize(counter_ids)
+            for code, counter in enumerate(counters):
+                state = self._counters.get(counter)
+                if state is None:
+                    state = self._counters[counter] = _CounterResiduals()
+                rows = np.flatnonzero(codes == code)
+                for r, a, p in zip(relative[rows].tolist(), actual[rows].tolist(),
+                                   predicted[rows].tolist()):
+                    state.update(r, a, p, RESIDUAL_ALPHA)
+
+    def feature_report(self):
+        """
+        Drift statistics of each feature.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by feature: live ``rows``, ``psi``, ``ks``,
+            ``ks_critical``, ``out_of_range`` share and the training and live
+            medians
+        """
+        with self._lock:
+            rows = []
+            for name, expected in self.reference.items():
+                actual = self._live[name]
+                n = actual.total
+                rows.append({
+                    "feature": name,
+                    "rows": int(n),
+                    "psi": psi(expected, actual) if n else math.nan,
+                    "ks": ks_distance(expected, actual) if n else math.nan,
+                    "ks_critical": (ks_critical(expected.total, n, self.ks_alpha)
+                                    if n and expected.total else math.nan),
+                    "out_of_range": self._outside[name] / n if n else math.nan,
+                    "train_median": expected.quantile(0.5),
+                    "live_median": actual.quantile(0.5),
+                })
+        return pd.DataFrame(rows).set_index("feature")
+
+    def counter_report(self):
+        """
+        Residual statistics of each counter.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by counter: ``days``, ``mean`` and ``std`` of the relative
+            residuals, the latest one and its ``z`` score, and the current run
+            of ``zero_days``
+        """
+        with self._lock:
+            rows = [
+                {"counter_id": counter, "days": state.days, "mean": state.mean,
+                 "std": math.sqrt(state.var), "last": state.last, "z": state.last_z,
+                 "zero_days": state.zeros}
+                for counter, state in self._counters.items()
+            ]
+        columns = ["counter_id", "days", "mean", "std", "last", "z", "zero_days"]
+        return pd.DataFrame(rows, columns=columns).set_index("counter_id")
+
+    def residual_quantiles(self, quantiles=(0.1, 0.5, 0.9)):
+        """Approximate quantiles of all relative residuals recorded."""
+        with self._lock:
+            return {q: self._residuals.quantile(q) for q in quantiles}
+
+    def flags(self):
+        """
+        Current alerts.
+
+        Returns
+        -------
+        list of dict
+            ``kind`` (one of ``FLAG_KINDS``), ``subject`` (feature or counter)
+            and the ``value`` that crossed its ``threshold``
+        """
+        flags = []
+        for name, stats in self.feature_report().iterrows():
+            if stats["rows"] < self.min_rows:
+                continue
+            for kind, value, threshold in (
+                ("psi", stats["psi"], self.psi_threshold),
+                ("ks", stats["ks"], stats["ks_critical"]),
+                ("out_of_range", stats["out_of_range"], OUT_OF_RANGE_SHARE),
+            ):
+                if value > threshold:
+                    flags.append({"kind": kind, "subject": name, "value": float(value),
+                                  "threshold": float(threshold)})
+        for counter, stats in self.counter_report().iterrows():
+            if stats["zero_days"] >= OFFLINE_DAYS:
+                flags.append({"kind": "offline", "subject": counter,
+                              "value": float(stats["zero_days"]), "threshold": OFFLINE_DAYS})
+                continue
+            if stats["days"] < RESIDUAL_WARMUP:
+                continue
+            if abs(stats["z"]) > ANOMALY_Z:
+                flags.append({"kind": "anomaly", "subject": counter, "value": float(stats["z"]),
+                              "threshold": ANOMALY_Z})
+            if abs(stats["mean"]) > BIAS_SHARE:
+                flags.append({"kind": "bias", "subject": counter, "value": float(stats["mean"]),
+                              "threshold": BIAS_SHARE})
+        return flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the drift reference of a model.")
+    parser.add_argument("--store", type=Path, required=True,
+                        help="feature store directory (see train.py) or feature table file")
+    parser.add_argument("--output", type=Path, required=True,
+                        help="reference file, e.g. data/bike_count_model.drift.json")
+    parser.add_argument("--bins", type=int, default=DRIFT_BINS)
+    args = parser.parse_args()
+
+    from train import FeatureStore, read_table
+
+    frame = FeatureStore(args.store).load() if args.store.is_dir() else read_table(args.store)
+    DriftMonitor.from_frame(frame, bins=args.bins).save(args.output)
+    print(f"Saved the drift reference of {len(frame)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Explications du modèle : dépendance partielle et contributions par feature.
+
+- Partial dependence: the mean prediction over a background sample when one
+  feature is set to each value of a grid. The grid is first collapsed to one
+  value per interval between the forest's thresholds (see
+  ``sweep.collapse_values``) and all (grid value, background row) pairs are
+  scored in one batched call.
+- Path contributions (Saabas method, a fast approximation of TreeSHAP): the
+  prediction of a row is the mean root value plus, for each feature, the
+  change in node value at the splits on that feature along the row's path,
+  averaged over the trees. The contribution vector of every leaf is
+  precomputed once, so explaining rows costs one leaf lookup per tree.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import CompiledForest
+from predictor import FLAG_COLUMNS, PREDICTION_COLUMN
+from sweep import collapse_values
+
+BIAS_COLUMN = "bias"
+
+PARTIAL_DEPENDENCE_COLUMN = "partial_dependence"
+
+# Background rows kept for partial dependence
+DEFAULT_BACKGROUND_SIZE = 500
+
+# (row, tree) pairs explained at once; bounds the (rows x trees) leaf arrays
+_CHUNK_PAIRS = 1 << 20
+
+
+class ForestExplainer:
+    """Partial dependence and path contributions of a ``BikeCountPredictor``."""
+
+    def __init__(self, predictor, background=None, background_size=DEFAULT_BACKGROUND_SIZE,
+                 seed=0):
+        """
+        Parameters
+        ----------
+        predictor : BikeCountPredictor
+            Model to explain
+        background : pd.DataFrame or np.ndarray, optional
+            Reference rows for partial dependence (feature columns, or an
+            array in ``feature_columns`` order)
+        background_size : int, default 500
+            Background rows kept, drawn uniformly without replacement
+        seed : int, default 0
+            Seed of the background subsample
+        """
+        self.predictor = predictor
+        self.background = None
+        if background is not None:
+            self.set_background(background, background_size, seed)
+        self._leaf_table = None
+        self._lock = threading.Lock()
+
+    def set_background(self, background, background_size=DEFAULT_BACKGROUND_SIZE, seed=0):
+        """Replace the background sample used by ``partial_dependence``."""
+        X = self._features(background)
+        if len(X) > background_size:
+            rows = np.random.default_rng(seed).choice(len(X), background_size, replace=False)
+            X = X[np.sort(rows)]
+        self.background = X
+
+    def _features(self, data):
+        """Float array in the predictor's column order."""
+        if isinstance(data, pd.DataFrame):
+            return data[self.predictor.feature_columns].to_numpy(dtype=np.float64)
+        return np.asarray(data, dtype=np.float64).reshape(-1, len(self.predictor.feature_columns))
+
+    def _leaf_contributions(self):
+        """Per-leaf contribution table, built on first use."""
+        with self._lock:
+            if self._leaf_table is None:
+                forest = self.predictor.compiled
+                if forest is None:
+                    # Same node numbering as BikeCountPredictor.apply
+                    forest = CompiledForest.from_sklearn(self.predictor.model)
+                leaf_row, table = forest.leaf_contributions(len(self.predictor.feature_columns))
+                bias = float(np.mean(forest.value[forest.roots]))
+                # Feature-major, so each feature is gathered from one contiguous array
+                self._leaf_table = (leaf_row, np.ascontiguousarray(table.T), bias)
+            return self._leaf_table
+
+    def contributions(self, X):
+        """
+        Split each prediction into a bias and one contribution per feature.
+
+        Parameters
+        ----------
+        X : pd.DataFrame or np.ndarray
+            Rows to explain (feature columns, or an array in
+            ``feature_columns`` order)
+
+        Returns
+        -------
+        pd.DataFrame
+            One column per feature, ``bias`` (the mean root value) and the
+            unrounded ``predicted_bikes``; bias plus contributions equals the
+            prediction
+        """
+        index = X.index if isinstance(X, pd.DataFrame) else None
+        X = self._features(X)
+        leaf_row, table, bias = self._leaf_contributions()
+        n_rows = len(X)
+        n_trees = self.predictor.n_trees
+        contributions = np.empty((n_rows, len(table)), dtype=np.float64)
+        chunk_size = max(1, _CHUNK_PAIRS // n_trees)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            rows = leaf_row[self.predictor.apply(X[start:stop])]
+            for position, feature_table in enumerate(table):
+                contributions[start:stop, position] = feature_table[rows].sum(axis=1) / n_trees
+
+        result = pd.DataFrame(contributions, columns=self.predictor.feature_columns, index=index)
+        result[BIAS_COLUMN] = bias
+        result[PREDICTION_COLUMN] = bias + contributions.sum(axis=1)
+        return result
+
+    def partial_dependence(self, feature, values=None, n_points=50):
+        """
+        Compute the partial dependence of the prediction on one feature.
+
+        Parameters
+        ----------
+        feature : str
+            Feature name
+        values : array-like, optional
+            Grid of feature values; by default ``n_points`` values spanning
+            the 5th-95th percentiles of the background (0/1 for flags)
+        n_points : int, default 50
+            Size of the default grid
+
+        Returns
+        -------
+        pd.DataFrame
+            ``feature`` and ``partial_dependence`` (mean unrounded
+            prediction over the background) for each grid value
+        """
+        if self.background is None:
+            raise ValueError("partial_dependence needs a background sample")
+        column = self.predictor.feature_columns.index(feature)
+        if values is None:
+            if feature in FLAG_COLUMNS:
+                values = np.array([0.0, 1.0])
+            else:
+                low, high = np.percentile(self.background[:, column], [5, 95])
+                values = np.linspace(low, high, n_points)
+        values = np.asarray(values, dtype=np.float64).ravel()
+
+        representatives, inverse = collapse_values(self.predictor, feature, values)
+        n_background = len(self.background)
+        X = np.tile(self.background, (len(representatives), 1))
+        X[:, column] = np.repeat(representatives, n_background)
+        means = self.predictor.predict_raw(X).reshape(len(representatives), n_background)
+        return pd.DataFrame(
+            {feature: values, PARTIAL_DEPENDENCE_COLUMN: means.mean(axis=1)[inverse]}
+        )
@@ -0,0 +1,72 @@
+"""
+Export the trained model as a memory-mappable forest bundle.
+
+The bundle is a directory of uncompressed ``.npy`` arrays (see
+``forest_engine.CompiledForest.save``). ``BikeCountPredictor`` loads it with
+``np.load(mmap_mode="r")``: start-up does no unpickling and every Streamlit
+worker or batch process mapping the same bundle shares one page-cache copy.
+
+Usage::
+
+    python export_model.py data/bike_count_model.pkl data/bike_count_model.bundle
+"""
+
+import argparse
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from forest_engine import CompiledForest
+
+
+def export_bundle(model_path, bundle_path):
+    """
+    Compile a joblib model file and save it as a bundle.
+
+    Parameters
+    ----------
+    model_path : str or Path
+        Trained scikit-learn forest (joblib format)
+    bundle_path : str or Path
+        Output bundle directory
+
+    Returns
+    -------
+    CompiledForest
+        The exported forest
+    """
+    model = joblib.load(model_path)
+    forest = CompiledForest.from_sklearn(model)
+    forest.save(bundle_path)
+
+    # Refuse to leave behind a bundle that disagrees with the original model
+    check = CompiledForest.load(bundle_path)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(256, model.n_features_in_)) * 10
+    if not np.allclose(check.predict(X), forest.predict(X)):
+        raise RuntimeError(f"Exported bundle {bundle_path} does not reproduce the model")
+    return forest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a memory-mappable forest bundle.")
+    parser.add_argument("model_path", type=Path, help="joblib model file")
+    parser.add_argument(
+        "bundle_path",
+        type=Path,
+        nargs="?",
+        help="output directory (default: model path with a .bundle suffix)",
+    )
+    args = parser.parse_args()
+
+    bundle_path = args.bundle_path or args.model_path.with_suffix(".bundle")
+    forest = export_bundle(args.model_path, bundle_path)
+    print(
+        f"Exported {forest.n_trees} trees ({forest.n_nodes} nodes, "
+        f"{forest.nbytes / 1e6:.1f} MB) to {bundle_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Construction des features du modèle à partir de dates et de météo horaire ERA5.
+
+Replaces the Power Query / notebook steps: Kelvin to Celsius conversion,
+hourly to daily aggregation and the weekend / holiday / school-vacation flags,
+all vectorized with NumPy (sort + ``reduceat`` for the daily groupby and
+``searchsorted`` over precomputed sorted date arrays for the calendar lookups).
+"""
+
+import numpy as np
+import pandas as pd
+
+from french_calendar import FrenchCalendar
+from predictor import FEATURE_COLUMNS
+
+KELVIN_OFFSET = 273.15
+
+# Daily feature -> (ERA5 hourly variable, reduction over the day)
+DAILY_AGGREGATES = {
+    "t2m_min": ("t2m", "min"),
+    "t2m_max": ("t2m", "max"),
+    "tp_total": ("tp", "sum"),
+    "sd_total": ("sd", "sum"),
+    "i10fg_max": ("i10fg", "max"),
+    "sf_max": ("sf", "max"),
+}
+
+_REDUCERS = {
+    "min": np.minimum.reduceat,
+    "max": np.maximum.reduceat,
+    "sum": np.add.reduceat,
+}
+
+# 1970-01-01 was a Thursday: weekday (Monday = 0) of day number d is (d + 3) % 7
+_EPOCH_WEEKDAY = 3
+
+
+def to_day_numbers(dates, timezone=None):
+    """
+    Convert dates or timestamps to integer day numbers since 1970-01-01.
+
+    Parameters
+    ----------
+    dates : array-like of dates, datetimes or date strings
+        Naive timestamps are taken as UTC
+    timezone : str, optional
+        Time zone in which days are cut (e.g. ``"Europe/Paris"``);
+        None cuts days in UTC
+
+    Returns
+    -------
+    np.ndarray of int64
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(dates))
+    if timezone is not None:
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        index = index.tz_convert(timezone).tz_localize(None)
+    elif index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.values.astype("datetime64[D]").astype(np.int64)
+
+
+def daily_weather(hourly, time_column="time", timezone=None):
+    """
+    Aggregate hourly ERA5-style weather into daily model features.
+
+    Parameters
+    ----------
+    hourly : pd.DataFrame
+        One row per hour with a timestamp column (or a DatetimeIndex) and the
+        ERA5 variables ``t2m`` (K), ``tp`` (m), ``sd`` (m), ``i10fg`` (m/s)
+        and ``sf`` (m)
+    time_column : str, default "time"
+        Timestamp column; ignored when ``hourly`` has a DatetimeIndex
+    timezone : str, optional
+        Time zone in which days are cut, see ``to_day_numbers``
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per day present in ``hourly``, indexed by day number, with
+        the 6 weather features (temperatures in °C)
+    """
+    if isinstance(hourly.index, pd.DatetimeIndex):
+        times = hourly.index
+    else:
+        times = hourly[time_column]
+    days = to_day_numbers(times, timezone)
+
+    order = np.argsort(days, kind="stable")
+    sorted_days = days[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_days)) + 1))
+
+    aggregates = {}
+    for feature, (variable, reduction) in DAILY_AGGREGATES.items():
+        if variable not in hourly.columns:
+            raise ValueError(f"Missing hourly weather variable: {variable}")
+        values = hourly[variable].to_numpy(dtype=np.float64)[order]
+        if variable == "t2m":
+            values = values - KELVIN_OFFSET
+        aggregates[feature] = _REDUCERS[reduction](values, starts) if len(values) else values
+    return pd.DataFrame(aggregates, index=pd.Index(sorted_days[starts], name="day"))
+
+
+def day_flags(days, holidays, vacations):
+    """
+    Compute the day-type flags for day numbers.
+
+    Parameters
+    ----------
+    days : np.ndarray of int64
+        Day numbers (see ``to_day_numbers``)
+    holidays : array-like of dates
+        Public holidays
+    vacations : array-like of (start, end) pairs
+        School vacation ranges, both ends included; ranges must not overlap
+
+    Returns
+    -------
+    dict of np.ndarray
+        ``is_weekend``, ``is_holiday`` and ``is_school_vacation`` as uint8
+    """
+    days = np.asarray(days, dtype=np.int64)
+
+    holiday_days = np.unique(to_day_numbers(holidays)) if len(holidays) else np.empty(0, np.int64)
+    position = np.searchsorted(holiday_days, days)
+    is_holiday = position < len(holiday_days)
+    is_holiday[is_holiday] = holiday_days[position[is_holiday]] == days[is_holiday]
+
+    vacations = np.asarray(vacations, dtype=object).reshape(-1, 2)
+    starts = to_day_numbers(vacations[:, 0]) if len(vacations) else np.empty(0, np.int64)
+    ends = to_day_numbers(vacations[:, 1]) if len(vacations) else np.empty(0, np.int64)
+    order = np.argsort(starts)
+    starts, ends = starts[order], ends[order]
+    # Last range starting on or before each day, then check its end
+    position = np.searchsorted(starts, days, side="right") - 1
+    is_vacation = position >= 0
+    is_vacation[is_vacation] = days[is_vacation] <= ends[position[is_vacation]]
+
+    return {
+        "is_weekend": ((days + _EPOCH_WEEKDAY) % 7 >= 5).astype(np.uint8),
+        "is_holiday": is_holiday.astype(np.uint8),
+        "is_school_vacation": is_vacation.astype(np.uint8),
+    }
+
+
+def build_features(dates, hourly, holidays=None, vacations=None, calendar=None,
+                   time_column="time", timezone=None):
+    """
+    Build the 9-feature frame expected by ``BikeCountPredictor.predict_batch``.
+
+    Parameters
+    ----------
+    dates : array-like of dates
+        Days to predict, in any order, repeats allowed
+    hourly : pd.DataFrame
+        Hourly ERA5-style weather, see ``daily_weather``
+    holidays : array-like of dates, optional
+        Public holidays
+    vacations : array-like of (start, end) pairs, optional
+        School vacation ranges, both ends included
+    calendar : french_calendar.FrenchCalendar, optional
+        Calendar used when ``holidays`` and ``vacations`` are not given;
+        defaults to the bundled zone B calendar
+    time_column : str, default "time"
+        Timestamp column of ``hourly``
+    timezone : str, optional
+        Time zone in which days are cut, see ``to_day_numbers``
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per input date, columns in ``FEATURE_COLUMNS`` order
+
+    Raises
+    ------
+    ValueError
+        If the hourly weather does not cover some of the dates
+    """
+    days = to_day_numbers(dates)
+    weather = daily_weather(hourly, time_column=time_column, timezone=timezone)
+
+    weather_days = weather.index.to_numpy()
+    position = np.searchsorted(weather_days, days)
+    found = position < len(weather_days)
+    found[found] = weather_days[position[found]] == days[found]
+    if not found.all():
+        missing = np.unique(days[~found]).astype("datetime64[D]")
+        raise ValueError(
+            f"No hourly weather for {len(missing)} day(s), e.g. {', '.join(map(str, missing[:5]))}"
+        )
+
+    features = {
+        name: weather[name].to_numpy()[position] for name in DAILY_AGGREGATES
+    }
+    if holidays is None and vacations is None:
+        if calendar is None:
+            calendar = FrenchCalendar()
+        features.update(calendar.flags(days.astype("datetime64[D]")))
+    else:
+        features.update(day_flags(days, holidays if holidays is not None else [],
+                                  vacations if vacations is not None else []))
+    return pd.DataFrame(features, index=getattr(dates, "index", None))[FEATURE_COLUMNS]
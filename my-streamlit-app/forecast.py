@@ -0,0 +1,402 @@
+"""
+Prévisions sur plusieurs jours à partir de prévisions météo, avec cache disque.
+
+The forecast job predicts the next N days for every counter:
+
+1. each counter is mapped to the cell of the 0.25° ERA5 grid holding it;
+2. hourly weather is read from a ``WeatherProvider``, through a
+   ``WeatherCache`` on disk keyed by (grid cell, date, variable) with a
+   time-to-live, so repeated runs only fetch missing or expired keys;
+3. daily features are built with ``features.build_features`` and all
+   (counter, day) rows are scored by a single ``predict_batch`` call.
+
+Providers implement ``WeatherProvider.fetch``. ``FileWeatherProvider`` serves
+an hourly ERA5-style table from disk (e.g. a forecast downloaded by another
+tool) and stands in for a remote API in tests.
+
+Usage::
+
+    python forecast.py --weather forecast_hourly.parquet --days 7 --output forecast.csv
+    python forecast.py --weather forecast_hourly.parquet --counters counters.csv \\
+        --start 2024-06-01 --days 10 --cache data/weather_cache --ttl-hours 6
+"""
+
+import argparse
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from features import build_features
+from french_calendar import DEFAULT_VACATIONS_PATH, FrenchCalendar
+from lag_features import LAG_COLUMNS
+from predictor import DATE_COLUMN, DEFAULT_QUANTILES, BikeCountPredictor
+
+# Hourly ERA5 variables needed by the daily features, see features.DAILY_AGGREGATES
+WEATHER_VARIABLES = ("t2m", "tp", "sd", "i10fg", "sf")
+
+# ERA5 grid resolution, in degrees
+GRID_STEP = 0.25
+
+COUNTER_COLUMN = "counter_id"
+LATITUDE_COLUMN = "latitude"
+LONGITUDE_COLUMN = "longitude"
+
+# Counter used when none are given: the whole city, centred on Tours
+DEFAULT_COUNTERS = pd.DataFrame(
+    {COUNTER_COLUMN: ["tours"], LATITUDE_COLUMN: [47.39], LONGITUDE_COLUMN: [0.69]}
+)
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+
+def grid_cell(latitude, longitude, step=GRID_STEP):
+    """Snap a position to the centre of its grid cell, as a hashable pair."""
+    return (round(round(latitude / step) * step, 4), round(round(longitude / step) * step, 4))
+
+
+class WeatherProvider(ABC):
+    """Source of hourly weather for grid cells; subclass and implement ``fetch``."""
+
+    @abstractmethod
+    def fetch(self, cell, start, end, variables):
+        """
+        Return the hourly weather of a grid cell over a range of days.
+
+        Parameters
+        ----------
+        cell : tuple of float
+            (latitude, longitude) of the cell centre, see ``grid_cell``
+        start, end : np.datetime64
+            First and last day (UTC), inclusive
+        variables : sequence of str
+            ERA5 variables requested, in ERA5 units (``t2m`` in K,
+            ``tp``, ``sd`` and ``sf`` in m, ``i10fg`` in m/s)
+
+        Returns
+        -------
+        pd.DataFrame
+            ``time`` (UTC timestamps) and one column per variable; days the
+            source does not cover are simply absent
+        """
+
+
+class FileWeatherProvider(WeatherProvider):
+    """Hourly weather read from a CSV, Parquet or Arrow file.
+
+    The file has a ``time`` column and the ERA5 variables, and optionally
+    ``latitude`` and ``longitude`` columns; without them, its rows apply to
+    every cell. ``requests`` counts the calls to ``fetch``.
+    """
+
+    def __init__(self, path, time_column="time"):
+        self.path = Path(path)
+        self.time_column = time_column
+        self.requests = 0
+        self._frame = None
+
+    def _table(self):
+        if self._frame is None:
+            from train import read_table
+
+            frame = read_table(self.path)
+            frame[self.time_column] = pd.to_datetime(frame[self.time_column], utc=True)
+            if LATITUDE_COLUMN in frame.columns and LONGITUDE_COLUMN in frame.columns:
+                cells = [
+                    grid_cell(lat, lon) for lat, lon in zip(frame[LATITUDE_COLUMN],
+                                                            frame[LONGITUDE_COLUMN])
+                ]
+                frame["_cell"] = pd.Series(cells, index=frame.index, dtype=object)
+            self._frame = frame
+        return self._frame
+
+    def fetch(self, cell, start, end, variables):
+        self.requests += 1
+        frame = self._table()
+        days = frame[self.time_column].dt.tz_localize(None).to_numpy().astype("datetime64[D]")
+        rows = (days >= start) & (days <= end)
+        if "_cell" in frame.columns:
+            rows &= (frame["_cell"] == cell).to_numpy()
+        missing = [name for name in variables if name not in frame.columns]
+        if missing:
+            raise ValueError(f"{self.path} has no {', '.join(missing)} column")
+        selected = frame.loc[rows, [self.time_column, *variables]]
+        return selected.rename(columns={self.time_column: "time"}).reset_index(drop=True)
+
+
+class WeatherCache:
+    """On-disk cache of hourly weather, one file per (grid cell, date, variable).
+
+    An entry older than ``ttl`` seconds is fetched again: forecasts for the
+    coming days are revised, so they should not be kept forever. Files are
+    small ``.npy`` arrays of (epoch seconds, value) pairs under
+    ``<directory>/<lat>_<lon>/<variable>/<YYYY-MM-DD>.npy``.
+    """
+
+    def __init__(self, directory, ttl=DEFAULT_TTL_SECONDS):
+        """
+        Parameters
+        ----------
+        directory : str or Path
+            Cache directory, created if needed
+        ttl : float, optional
+            Lifetime of an entry in seconds; None keeps entries forever
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, cell, day, variable):
+        """File of one cache key."""
+        return self.directory / f"{cell[0]:.4f}_{cell[1]:.4f}" / variable / f"{day}.npy"
+
+    def _fresh(self, path, now):
+        try:
+            age = now - path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return self.ttl is None or age < self.ttl
+
+    def hourly(self, provider, cell, days, variables=WEATHER_VARIABLES):
+        """
+        Return the hourly weather of a cell for some days, fetching what is missing.
+
+        Missing or expired keys are fetched with one ``provider.fetch`` call
+        covering the days they span, and stored; days the provider cannot
+        cover are left out of the result.
+
+        Parameters
+        ----------
+        provider : WeatherProvider
+            Source used on cache misses
+        cell : tuple of float
+            Grid cell, see ``grid_cell``
+        days : array-like of np.datetime64[D]
+            Days needed
+        variables : sequence of str
+            ERA5 variables needed
+
+        Returns
+        -------
+        pd.DataFrame
+            ``time`` and one column per variable, sorted by time
+        """
+        days = np.unique(np.asarray(days, dtype="datetime64[D]"))
+        now = time.time()
+        stale = [
+            (day, variable) for day in days for variable in variables
+            if not self._fresh(self.path(cell, day, variable), now)
+        ]
+        self.hits += len(days) * len(variables) - len(stale)
+        self.misses += len(stale)
+        if stale:
+            stale_days = sorted({day for day, _ in stale})
+            stale_variables = sorted({variable for _, variable in stale})
+            fetched = provider.fetch(cell, stale_days[0], stale_days[-1], stale_variables)
+            self._store(cell, fetched, set(stale))
+
+        columns = {}
+        times = None
+        for variable in variables:
+            series = [self._read(cell, day, variable) for day in days]
+            series = [entry for entry in series if entry is not None]
+            if not series:
+                return pd.DataFrame(columns=["time", *variables])
+            entries = np.concatenate(series, axis=1)
+            if times is None:
+                times = entries[0]
+            elif not np.array_equal(times, entries[0]):
+                raise ValueError(f"Cached hours of {variable} differ from the other variables")
+            columns[variable] = entries[1]
+        frame = pd.DataFrame({"time": pd.to_datetime(times.astype(np.int64), unit="s"), **columns})
+        return frame.sort_values("time", ignore_index=True)
+
+    def _store(self, cell, fetched, keys):
+        """Write the fetched hours of each stale key, one file per key."""
+        seconds = (
+            pd.to_datetime(fetched["time"], utc=True).dt.tz_localize(None)
+            .to_numpy().astype("datetime64[s]").astype(np.int64)
+        )
+        fetched_days = seconds // 86400
+        for day, variable in keys:
+            if variable not in fetched.columns:
+                continue
+            rows = fetched_days == day.astype(np.int64)
+            if not rows.any():
+                continue
+            entry = np.vstack([seconds[rows].astype(np.float64),
+                               fetched[variable].to_numpy(dtype=np.float64)[rows]])
+            path = self.path(cell, day, variable)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # np.save appends .npy to names without it, so the temporary name keeps it
+            tmp_path = path.with_name(f"tmp-{path.name}")
+            np.save(tmp_path, entry)
+            tmp_path.replace(path)
+
+    def _read(self, cell, day, variable):
+        try:
+            return np.load(self.path(cell, day, variable))
+        except FileNotFoundError:
+            return None
+
+    def evict(self):
+        """
+        Delete expired entries.
+
+        Returns
+        -------
+        int
+            Number of files deleted
+        """
+        if self.ttl is None or not self.directory.exists():
+            return 0
+        now = time.time()
+        removed = 0
+        for path in self.directory.glob("*/*/*.npy"):
+            if not self._fresh(path, now):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def forecast(predictor, provider, days=7, start=None, counters=None, cache=None,
+             quantiles=None, timezone=None):
+    """
+    Predict the next days for every counter from a weather provider.
+
+    Parameters
+    ----------
+    predictor : BikeCountPredictor or model_registry.ModelRegistry
+        Model; a registry picks each counter's model from ``counter_id``
+    provider : WeatherProvider
+        Hourly weather source
+    days : int, default 7
+        Number of days predicted
+    start : date-like, optional
+        First day predicted, today (UTC) by default
+    counters : pd.DataFrame, optional
+        ``counter_id``, ``latitude`` and ``longitude`` of each counter;
+        ``DEFAULT_COUNTERS`` (Tours) by default
+    cache : WeatherCache, optional
+        Cache between the job and the provider; every run fetches everything
+        without one
+    quantiles : sequence of float, optional
+        Also return quantile columns, see ``BikeCountPredictor.predict_batch``
+    timezone : str, optional
+        Time zone in which days are cut, as when training (``train.py
+        --timezone``); UTC by default
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (counter, day): ``counter_id``, ``date``, the 9 features
+        and the predictions
+
+    Raises
+    ------
+    ValueError
+        If the provider or the school vacation calendar does not cover some
+        of the days
+    """
+    if any(name in LAG_COLUMNS for name in getattr(predictor, "feature_columns", ())):
+        raise ValueError("Forecasting needs a model without count history features")
+    start = np.datetime64(pd.Timestamp.now("UTC").date() if start is None
+                          else pd.Timestamp(start).date(), "D")
+    dates = start + np.arange(days)
+    # Checked before any weather is fetched
+    calendar = getattr(predictor, "calendar", None) or FrenchCalendar()
+    if dates[0] < calendar.first_day or dates[-1] > calendar.last_day:
+        raise ValueError(
+            f"Forecast days {dates[0]} to {dates[-1]} are outside the school vacation "
+            f"calendar ({calendar.first_day} to {calendar.last_day}): add the missing "
+            f"school years to {DEFAULT_VACATIONS_PATH.name} or shorten the horizon"
+        )
+    counters = DEFAULT_COUNTERS if counters is None else counters
+    # With a time zone, a local day overlaps two UTC days
+    fetch_days = dates if timezone is None else np.arange(dates[0] - 1, dates[-1] + 2)
+
+    cells = [
+        grid_cell(lat, lon) for lat, lon in zip(counters[LATITUDE_COLUMN],
+                                                counters[LONGITUDE_COLUMN])
+    ]
+    cell_features = {}
+    for cell in dict.fromkeys(cells):
+        if cache is not None:
+            hourly = cache.hourly(provider, cell, fetch_days)
+        else:
+            hourly = provider.fetch(cell, fetch_days[0], fetch_days[-1], WEATHER_VARIABLES)
+        cell_features[cell] = build_features(
+            dates, hourly, calendar=calendar, timezone=timezone
+        )
+
+    frame = pd.concat(
+        [cell_features[cell] for cell in cells], ignore_index=True
+    )
+    frame.insert(0, COUNTER_COLUMN, np.repeat(counters[COUNTER_COLUMN].to_numpy(), days))
+    frame.insert(1, DATE_COLUMN, np.tile(dates, len(counters)))
+
+    if hasattr(predictor, "resolve"):
+        if quantiles is not None:
+            raise ValueError("Quantiles are not available through a model registry")
+        frame["predicted_bikes"] = predictor.predict_batch(frame, counter_column=COUNTER_COLUMN)
+        return frame
+    predictions = predictor.predict_batch(frame[predictor.feature_columns], quantiles)
+    if quantiles is None:
+        frame["predicted_bikes"] = predictions
+    else:
+        frame = frame.join(predictions)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict the next days from a weather forecast.")
+    parser.add_argument(
+        "--model",
+        type=Path,
+        default=Path(__file__).parent / "data" / "bike_count_model.pkl",
+        help="joblib model file or exported bundle directory",
+    )
+    parser.add_argument("--weather", type=Path, required=True,
+                        help="hourly weather file (time, t2m, tp, sd, i10fg, sf, "
+                             "optionally latitude/longitude)")
+    parser.add_argument("--counters", type=Path,
+                        help="CSV with counter_id, latitude, longitude (default: Tours)")
+    parser.add_argument("--start", help="first day predicted (default: today, UTC)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--cache", type=Path, default=Path(__file__).parent / "data" / "weather_cache")
+    parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_SECONDS / 3600,
+                        help="lifetime of cached weather, 0 to never expire")
+    parser.add_argument("--timezone", help="time zone in which days are cut (default UTC)")
+    parser.add_argument("--intervals", action="store_true",
+                        help=f"add the {DEFAULT_QUANTILES} quantile columns")
+    parser.add_argument("--output", type=Path, default=Path("forecast.csv"))
+    args = parser.parse_args()
+
+    engine = "compiled" if args.model.is_dir() else "sklearn"
+    predictor = BikeCountPredictor(args.model, engine=engine)
+    provider = FileWeatherProvider(args.weather)
+    cache = WeatherCache(args.cache, ttl=args.ttl_hours * 3600 or None)
+    evicted = cache.evict()
+    counters = pd.read_csv(args.counters) if args.counters else None
+
+    try:
+        result = forecast(
+            predictor, provider, days=args.days, start=args.start, counters=counters,
+            cache=cache, quantiles=DEFAULT_QUANTILES if args.intervals else None,
+            timezone=args.timezone,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    result.to_csv(args.output, index=False)
+    print(
+        f"Predicted {len(result)} rows to {args.output}; weather cache: {cache.hits} hits, "
+        f"{cache.misses} misses, {evicted} expired entries removed, "
+        f"{provider.requests} provider request(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
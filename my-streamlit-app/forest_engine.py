@@ -0,0 +1,752 @@
+"""
+Moteur d'inférence compilé pour les forêts d'arbres de régression.
+
+Converts a fitted scikit-learn tree ensemble into flat NumPy arrays and
+evaluates every tree of the forest at once, vectorized over the batch.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+# (row, tree) pairs evaluated per block; keeps the traversal arrays in cache
+_CHUNK_PAIRS = 1 << 19
+# Levels between two compactions of the active (row, tree) pairs
+_COMPACT_EVERY = 3
+
+# Arrays stored as .npy files in an exported bundle, see ``CompiledForest.save``
+BUNDLE_ARRAYS = ("feature", "threshold", "children", "value", "roots", "is_leaf")
+BUNDLE_METADATA = "forest.json"
+BUNDLE_FORMAT_VERSION = 1
+# Extra arrays of a compact bundle with binned thresholds, see ``CompactForest``
+BIN_ARRAYS = ("bin_edges", "bin_offsets")
+THRESHOLD_MODES = ("float32", "binned")
+
+
+def mean_over_trees(outputs):
+    """
+    Average per-tree outputs the way scikit-learn's forests do.
+
+    The trees are added one at a time, in order, then the sum is divided by
+    the number of trees, so the result is bit-identical to
+    ``RandomForestRegressor.predict`` (``ndarray.mean`` sums pairwise and
+    can differ in the last bit).
+
+    Parameters
+    ----------
+    outputs : np.ndarray of shape (n_rows, n_trees)
+
+    Returns
+    -------
+    np.ndarray of float64, shape (n_rows,)
+    """
+    total = np.zeros(len(outputs), dtype=np.float64)
+    for column in outputs.T:
+        total += column
+    return total / outputs.shape[1]
+
+
+class CompiledForest:
+    """Flat-array representation of a regression tree ensemble.
+
+    All trees are concatenated into a single node table. A node ``i`` sends
+    a row to ``children[2 * i]`` when ``X[row, feature[i]] <= threshold[i]``
+    and to ``children[2 * i + 1]`` otherwise. Leaves point to themselves, so
+    a fixed number of descent steps (the maximum depth) lands every row on
+    its leaf.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 feature_names=None, is_leaf=None):
+        """
+        Build a compiled forest from its node arrays.
+
+        Parameters
+        ----------
+        feature : np.ndarray
+            Feature index tested at each node (0 for leaves)
+        threshold : np.ndarray
+            Split threshold at each node
+        children : np.ndarray
+            Interleaved global indices of the left and right child of each node
+        value : np.ndarray
+            Mean target value at each node
+        roots : np.ndarray
+            Global index of the root node of each tree
+        max_depth : int
+            Depth of the deepest tree
+        feature_names : list of str, optional
+            Column order expected by the model
+        is_leaf : np.ndarray, optional
+            Leaf mask, derived from ``children`` when omitted
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        if is_leaf is None:
+            is_leaf = children[0::2] == np.arange(len(feature))
+        self.is_leaf = is_leaf
+
+    @property
+    def left(self):
+        """Global index of the left child of each node (a view)."""
+        return self.children[0::2]
+
+    @property
+    def right(self):
+        """Global index of the right child of each node (a view)."""
+        return self.children[1::2]
+
+    @property
+    def n_trees(self):
+        """Number of trees in the forest."""
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        """Total number of nodes across all trees."""
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Compile a fitted scikit-learn regressor.
+
+        Parameters
+        ----------
+        model : estimator
+            Fitted ``DecisionTreeRegressor`` or forest regressor
+            (``RandomForestRegressor``, ``ExtraTreesRegressor``)
+
+        Returns
+        -------
+        CompiledForest
+        """
+        if hasattr(model, "estimators_"):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+        elif hasattr(model, "tree_"):
+            trees = [model.tree_]
+        else:
+            raise ValueError(
+                f"Cannot compile model of type {type(model).__name__}: "
+                "expected a fitted scikit-learn tree or forest regressor"
+            )
+        if trees[0].n_outputs != 1:
+            raise ValueError("Only single-output regression forests can be compiled")
+
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        n_nodes = int(sizes.sum())
+
+        feature = np.empty(n_nodes, dtype=np.int32)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        children = np.empty(2 * n_nodes, dtype=np.int32)
+        value = np.empty(n_nodes, dtype=np.float64)
+
+        for tree, offset, size in zip(trees, offsets, sizes):
+            nodes = slice(offset, offset + size)
+            own = np.arange(offset, offset + size, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, 0.0, tree.threshold)
+            children[2 * offset:2 * (offset + size):2] = np.where(
+                is_leaf, own, tree.children_left + offset
+            )
+            children[2 * offset + 1:2 * (offset + size):2] = np.where(
+                is_leaf, own, tree.children_right + offset
+            )
+            value[nodes] = tree.value[:, 0, 0]
+
+        feature_names = getattr(model, "feature_names_in_", None)
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            children=children,
+            value=value,
+            roots=offsets.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            feature_names=feature_names,
+        )
+
+    def split_thresholds(self, n_features=None):
+        """
+        Return the distinct split thresholds of each feature.
+
+        Two inputs whose values fall between the same consecutive thresholds
+        of every feature reach the same leaves, hence get equal predictions.
+
+        Parameters
+        ----------
+        n_features : int, optional
+            Number of features, by default ``len(feature_names)``
+
+        Returns
+        -------
+        list of np.ndarray
+            Sorted float64 thresholds, one array per feature position
+        """
+        if n_features is None:
+            n_features = len(self.feature_names) if self.feature_names is not None else 0
+        internal = ~np.asarray(self.is_leaf)
+        features = np.asarray(self.feature)[internal]
+        thresholds = np.asarray(self.threshold)[internal]
+        n_features = max(n_features, int(features.max()) + 1 if len(features) else 0)
+        return [
+            np.unique(thresholds[features == f]).astype(np.float64) for f in range(n_features)
+        ]
+
+    def leaf_contributions(self, n_features=None):
+        """
+        Precompute the path contributions of every leaf (Saabas method).
+
+        Along the path from the root to a leaf, each split moves the node
+        value by ``value[child] - value[node]``; that change is credited to
+        the split feature. The root value plus the credits of all features
+        equals the leaf value. Levels are processed top-down, vectorized over
+        all nodes of a level.
+
+        Parameters
+        ----------
+        n_features : int, optional
+            Number of features, by default ``len(feature_names)``
+
+        Returns
+        -------
+        leaf_row : np.ndarray of int32, shape (n_nodes,)
+            Row of ``table`` for each leaf node, -1 for internal nodes
+        table : np.ndarray of float64, shape (n_leaves, n_features)
+            Summed contributions of each feature along the leaf's path
+        """
+        if n_features is None:
+            n_features = len(self.feature_names)
+        is_leaf = np.asarray(self.is_leaf)
+        leaf_row = np.full(self.n_nodes, -1, dtype=np.int32)
+        leaf_row[is_leaf] = np.arange(int(is_leaf.sum()), dtype=np.int32)
+        table = np.zeros((int(is_leaf.sum()), n_features), dtype=np.float64)
+
+        node = np.asarray(self.roots, dtype=np.int64)
+        credit = np.zeros((len(node), n_features), dtype=np.float64)
+        while len(node):
+            done = is_leaf[node]
+            table[leaf_row[node[done]]] = credit[done]
+            node, credit = node[~done], credit[~done]
+            split = self.feature[node]
+            next_nodes, next_credits = [], []
+            for side in (0, 1):
+                child = self.children[2 * node + side].astype(np.int64)
+                child_credit = credit.copy()
+                child_credit[np.arange(len(node)), split] += self.value[child] - self.value[node]
+                next_nodes.append(child)
+                next_credits.append(child_credit)
+            node = np.concatenate(next_nodes)
+            credit = np.concatenate(next_credits)
+        return leaf_row, table
+
+    def prune(self, n_trees=None, max_depth=None):
+        """
+        Return a smaller forest: the first trees, cut at a maximum depth.
+
+        Kept: the first ``n_trees`` trees and, in each, every node at depth
+        ``max_depth`` or less with its split and value. Dropped: the other
+        trees and all deeper nodes. A kept node at depth ``max_depth`` becomes
+        a leaf whose output is its node value, the mean training target of
+        the (bootstrap) samples that reached it. So a tree's output is
+        unchanged for rows whose leaf is kept, and is the mean of the cut
+        subtree's training samples otherwise; the forest then averages the
+        kept trees only. This is not in general the forest that fitting with
+        these settings would give: the random feature draws of deeper splits
+        are consumed in a different order.
+
+        Parameters
+        ----------
+        n_trees : int, optional
+            Trees kept, all by default
+        max_depth : int, optional
+            Depth of the deepest kept node, unlimited by default
+
+        Returns
+        -------
+        CompiledForest
+        """
+        n_trees = self.n_trees if n_trees is None else min(int(n_trees), self.n_trees)
+        if n_trees < 1:
+            raise ValueError("At least one tree must be kept")
+        max_depth = self.max_depth if max_depth is None else min(int(max_depth), self.max_depth)
+        is_leaf = np.asarray(self.is_leaf)
+        children = np.asarray(self.children)
+
+        # Depth of every reachable node of the kept trees, level by level
+        depth = np.full(self.n_nodes, -1, dtype=np.int32)
+        level = np.asarray(self.roots[:n_trees], dtype=np.int64)
+        for d in range(max_depth + 1):
+            depth[level] = d
+            level = level[~is_leaf[level]]
+            level = np.concatenate([children[2 * level], children[2 * level + 1]]).astype(np.int64)
+        keep = np.flatnonzero(depth >= 0)
+        new_id = np.full(self.n_nodes, -1, dtype=np.int64)
+        new_id[keep] = np.arange(len(keep))
+
+        leaf = is_leaf[keep] | (depth[keep] == max_depth)
+        own = np.arange(len(keep), dtype=np.int32)
+        new_children = np.empty(2 * len(keep), dtype=np.int32)
+        for side in (0, 1):
+            child = new_id[children[2 * keep + side]]
+            new_children[side::2] = np.where(leaf, own, child)
+        return CompiledForest(
+            feature=np.where(leaf, 0, np.asarray(self.feature)[keep]).astype(np.int32),
+            threshold=np.where(leaf, 0.0, np.asarray(self.threshold)[keep]),
+            children=new_children,
+            value=np.asarray(self.value)[keep],
+            roots=new_id[np.asarray(self.roots[:n_trees])].astype(np.int32),
+            max_depth=max_depth,
+            feature_names=self.feature_names,
+            is_leaf=leaf,
+        )
+
+    @property
+    def nbytes(self):
+        """Memory used by the node arrays, in bytes."""
+        return sum(getattr(self, name).nbytes for name in BUNDLE_ARRAYS)
+
+    def save(self, directory):
+        """
+        Export the forest as a bundle of ``.npy`` files plus metadata.
+
+        Every array is stored uncompressed so ``load`` can memory-map it and
+        processes loading the same bundle share one page-cache copy.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Bundle directory, created if needed
+
+        Returns
+        -------
+        Path
+            The bundle directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in BUNDLE_ARRAYS:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        metadata = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "feature_names": self.feature_names,
+        }
+        # Written last: its presence marks a complete bundle
+        with open(directory / BUNDLE_METADATA, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Load a bundle written by ``save``.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Bundle directory
+        mmap_mode : {"r", None}, default "r"
+            Passed to ``np.load``; None reads the arrays into private memory
+
+        Returns
+        -------
+        CompiledForest
+        """
+        directory = Path(directory)
+        metadata_path = directory / BUNDLE_METADATA
+        if not metadata_path.exists():
+            raise FileNotFoundError(f"Not a forest bundle (no {BUNDLE_METADATA}): {directory}")
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format {metadata.get('format_version')!r} in {directory}"
+            )
+        if metadata.get("layout") == "compact" and cls is CompiledForest:
+            return CompactForest.load(directory, mmap_mode=mmap_mode)
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in BUNDLE_ARRAYS
+        }
+        return cls(
+            max_depth=metadata["max_depth"],
+            feature_names=metadata["feature_names"],
+            **arrays,
+        )
+
+    def apply(self, X, chunk_size=None):
+        """
+        Return the leaf reached by each row in each tree.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_rows, n_features)
+            Feature matrix in the model's column order
+        chunk_size : int, optional
+            Rows evaluated at once; bounds the (rows x trees) working set
+
+        Returns
+        -------
+        np.ndarray of shape (n_rows, n_trees)
+            Global leaf index for every (row, tree) pair
+        """
+        # scikit-learn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        if chunk_size is None:
+            chunk_size = self._default_chunk_size()
+        leaves = np.empty((n_rows, self.n_trees), dtype=np.int32)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            leaves[start:stop] = self._descend(X[start:stop])
+        return leaves
+
+    def predict(self, X, chunk_size=None):
+        """
+        Predict the forest output (mean over trees) for each row.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_rows, n_features)
+            Feature matrix in the model's column order
+        chunk_size : int, optional
+            Rows evaluated at once; bounds the (rows x trees) working set
+
+        Returns
+        -------
+        np.ndarray of shape (n_rows,)
+            Raw (unrounded) predictions
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        if chunk_size is None:
+            chunk_size = self._default_chunk_size()
+        predictions = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            leaves = self._descend(X[start:stop])
+            predictions[start:stop] = mean_over_trees(self.value[leaves])
+        return predictions
+
+    def tree_outputs(self, X):
+        """
+        Return the output of every tree for each row, in one pass.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_rows, n_features)
+            Feature matrix in the model's column order
+
+        Returns
+        -------
+        np.ndarray of shape (n_rows, n_trees)
+            Leaf value reached by each row in each tree;
+            ``mean_over_trees`` of it is ``predict(X)``
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.value[self._descend(X)]
+
+    def _descend(self, X):
+        """Walk all trees for a block of rows and return leaf indices."""
+        n_rows, n_features = X.shape
+        n_trees = self.n_trees
+        flat_x = X.ravel()
+        # One entry per (row, tree) pair, row-major
+        node = np.tile(self.roots.astype(np.int32), n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        position = np.arange(n_rows * n_trees)
+        leaves = np.empty(n_rows * n_trees, dtype=np.int32)
+        for depth in range(self.max_depth):
+            # Drop pairs that already reached a leaf every few levels; leaves
+            # point to themselves, so pairs left active in between stay put.
+            if depth % _COMPACT_EVERY == _COMPACT_EVERY - 1:
+                done = self.is_leaf[node]
+                leaves[position[done]] = node[done]
+                active = ~done
+                node = node[active]
+                row_offset = row_offset[active]
+                position = position[active]
+                if len(node) == 0:
+                    break
+            go_right = flat_x[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        leaves[position] = node
+        return leaves.reshape(n_rows, n_trees)
+
+    def _default_chunk_size(self):
+        """Keep the per-chunk (rows x trees) working set cache-sized."""
+        return max(1, _CHUNK_PAIRS // max(1, self.n_trees))
+
+
+class CompactForest(CompiledForest):
+    """Smaller-footprint variant of ``CompiledForest``, for exported bundles.
+
+    Node arrays use the narrowest types that keep predictions exact:
+
+    - ``feature`` is uint8 (uint16 beyond 256 features);
+    - ``children`` holds indices local to each tree, uint16 when every tree
+      has at most 65536 nodes, int32 otherwise; the global index of a node
+      is its tree's root index plus its local index;
+    - ``threshold`` is float32, each threshold rounded down to the nearest
+      float32. Inputs are cast to float32 before the comparison, and for a
+      float32 ``x``, ``x <= t`` holds exactly when ``x <= round_down(t)``,
+      so no prediction changes;
+    - or, with binned thresholds, ``threshold`` is the uint16 position of
+      the node's float32 threshold among the sorted distinct thresholds of
+      its feature (``bin_edges``). Inputs are first replaced by their bin,
+      the number of edges strictly below them, which preserves every
+      comparison too;
+    - ``value`` may be stored as float32, the only lossy option.
+
+    Global node numbering is the same as in the ``CompiledForest`` the
+    compact forest was built from, so ``apply`` and ``leaf_contributions``
+    stay consistent with it.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 feature_names=None, is_leaf=None, bin_edges=None, bin_offsets=None):
+        """
+        Build a compact forest from its node arrays.
+
+        Parameters
+        ----------
+        feature, threshold, value, roots, max_depth, feature_names
+            See ``CompiledForest``; ``threshold`` holds bin positions when
+            ``bin_edges`` is given
+        children : np.ndarray
+            Interleaved tree-local indices of the left and right child
+        is_leaf : np.ndarray
+            Leaf mask
+        bin_edges : np.ndarray of float32, optional
+            Sorted distinct thresholds of every feature, concatenated
+        bin_offsets : np.ndarray, optional
+            Start of each feature in ``bin_edges``, plus the total length
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.is_leaf = is_leaf
+        self.bin_edges = bin_edges
+        self.bin_offsets = bin_offsets
+        self._edges = None
+
+    @classmethod
+    def from_forest(cls, forest, thresholds="float32", value_dtype=np.float64):
+        """
+        Compact a ``CompiledForest``.
+
+        Parameters
+        ----------
+        forest : CompiledForest
+            Forest to compact, e.g. ``CompiledForest.from_sklearn(model)``
+            or its ``prune`` result
+        thresholds : {"float32", "binned"}, default "float32"
+            Threshold storage, see the class docstring; both are exact
+        value_dtype : dtype, default float64
+            Node value type; float32 halves it at a small precision cost
+
+        Returns
+        -------
+        CompactForest
+        """
+        if thresholds not in THRESHOLD_MODES:
+            raise ValueError(f"Unknown threshold mode {thresholds!r}, expected {THRESHOLD_MODES}")
+        is_leaf = np.asarray(forest.is_leaf, dtype=bool)
+        feature = np.asarray(forest.feature)
+        n_features = max(len(forest.feature_names or ()), int(feature.max()) + 1)
+        feature_dtype = np.uint8 if n_features <= 1 << 8 else np.uint16
+
+        roots = np.asarray(forest.roots, dtype=np.int64)
+        order = np.argsort(roots)
+        if not np.array_equal(order, np.arange(len(roots))) or roots[0] != 0:
+            raise ValueError("Trees must be stored contiguously, in root order")
+        sizes = np.diff(np.append(roots, forest.n_nodes))
+        node_tree = np.repeat(np.arange(len(roots)), sizes)
+        children = np.asarray(forest.children, dtype=np.int64) - np.repeat(roots[node_tree], 2)
+        children_dtype = np.uint16 if sizes.max() <= 1 << 16 else np.int32
+
+        # Largest float32 not above each float64 threshold
+        exact = np.asarray(forest.threshold, dtype=np.float64)
+        rounded = exact.astype(np.float32)
+        above = rounded.astype(np.float64) > exact
+        rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+        rounded[is_leaf] = 0.0
+
+        bin_edges = bin_offsets = None
+        if thresholds == "binned":
+            edges = [np.unique(rounded[~is_leaf & (feature == f)]) for f in range(n_features)]
+            bin_offsets = np.concatenate(([0], np.cumsum([len(e) for e in edges]))).astype(np.int64)
+            bin_edges = np.concatenate(edges).astype(np.float32)
+            code_dtype = np.uint16 if max(len(e) for e in edges) < 1 << 16 else np.uint32
+            codes = np.zeros(forest.n_nodes, dtype=code_dtype)
+            for f, feature_edges in enumerate(edges):
+                nodes = ~is_leaf & (feature == f)
+                codes[nodes] = np.searchsorted(feature_edges, rounded[nodes])
+            rounded = codes
+
+        return cls(
+            feature=feature.astype(feature_dtype),
+            threshold=rounded,
+            children=children.astype(children_dtype),
+            value=np.asarray(forest.value).astype(value_dtype),
+            roots=roots.astype(np.int32),
+            max_depth=forest.max_depth,
+            feature_names=forest.feature_names,
+            is_leaf=is_leaf,
+            bin_edges=bin_edges,
+            bin_offsets=bin_offsets,
+        )
+
+    @property
+    def binned(self):
+        """Whether thresholds are stored as bin positions."""
+        return self.bin_edges is not None
+
+    @property
+    def nbytes(self):
+        """Memory used by the node arrays, in bytes."""
+        names = BUNDLE_ARRAYS + (BIN_ARRAYS if self.binned else ())
+        return sum(getattr(self, name).nbytes for name in names)
+
+    def to_compiled(self):
+        """Expand back to a ``CompiledForest`` with global int32 children."""
+        roots = np.asarray(self.roots, dtype=np.int64)
+        sizes = np.diff(np.append(roots, self.n_nodes))
+        base = np.repeat(np.repeat(roots, sizes), 2)
+        threshold = np.asarray(self.threshold)
+        if self.binned:
+            feature = np.asarray(self.feature, dtype=np.int64)
+            positions = self.bin_offsets[feature] + threshold
+            threshold = np.where(
+                self.is_leaf, 0.0, self.bin_edges[np.minimum(positions, len(self.bin_edges) - 1)]
+            )
+        return CompiledForest(
+            feature=np.asarray(self.feature, dtype=np.int32),
+            threshold=np.asarray(threshold, dtype=np.float64),
+            children=(np.asarray(self.children, dtype=np.int64) + base).astype(np.int32),
+            value=np.asarray(self.value, dtype=np.float64),
+            roots=np.asarray(self.roots, dtype=np.int32),
+            max_depth=self.max_depth,
+            feature_names=self.feature_names,
+            is_leaf=np.asarray(self.is_leaf),
+        )
+
+    def split_thresholds(self, n_features=None):
+        if not self.binned:
+            return super().split_thresholds(n_features)
+        if n_features is None:
+            n_features = len(self.feature_names) if self.feature_names is not None else 0
+        n_features = max(n_features, len(self.bin_offsets) - 1)
+        return [
+            np.asarray(self.bin_edges[self.bin_offsets[f]:self.bin_offsets[f + 1]], np.float64)
+            if f < len(self.bin_offsets) - 1 else np.empty(0)
+            for f in range(n_features)
+        ]
+
+    def leaf_contributions(self, n_features=None):
+        return self.to_compiled().leaf_contributions(n_features)
+
+    def prune(self, n_trees=None, max_depth=None):
+        return self.to_compiled().prune(n_trees, max_depth)
+
+    def save(self, directory):
+        """
+        Export the forest as a compact bundle, loadable by ``CompiledForest.load``.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Bundle directory, created if needed
+
+        Returns
+        -------
+        Path
+            The bundle directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        names = BUNDLE_ARRAYS + (BIN_ARRAYS if self.binned else ())
+        for name in names:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        metadata = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "layout": "compact",
+            "thresholds": "binned" if self.binned else "float32",
+            "max_depth": self.max_depth,
+            "feature_names": self.feature_names,
+        }
+        with open(directory / BUNDLE_METADATA, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Load a bundle written by ``CompactForest.save``."""
+        directory = Path(directory)
+        with open(directory / BUNDLE_METADATA, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("layout") != "compact":
+            raise ValueError(f"Not a compact forest bundle: {directory}")
+        names = BUNDLE_ARRAYS + (BIN_ARRAYS if metadata["thresholds"] == "binned" else ())
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in names
+        }
+        return cls(
+            max_depth=metadata["max_depth"],
+            feature_names=metadata["feature_names"],
+            **arrays,
+        )
+
+    def _bin(self, X):
+        """Replace each float32 input by its bin position, per feature."""
+        if self._edges is None:
+            # Plain arrays: slicing a memory map on every call is slow
+            self._edges = [
+                np.asarray(self.bin_edges[start:stop])
+                for start, stop in zip(self.bin_offsets[:-1], self.bin_offsets[1:])
+            ]
+        codes = np.empty(X.shape, dtype=self.threshold.dtype)
+        for f, edges in enumerate(self._edges):
+            codes[:, f] = np.searchsorted(edges, X[:, f], side="left")
+        return codes
+
+    def _descend(self, X):
+        """Walk all trees for a block of rows and return global leaf indices."""
+        if self.binned:
+            X = self._bin(X)
+        n_rows, n_features = X.shape
+        n_trees = self.n_trees
+        flat_x = X.ravel()
+        # One entry per (row, tree) pair, row-major; node = root + local index
+        root = np.tile(self.roots.astype(np.int32), n_rows)
+        node = root.copy()
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        position = np.arange(n_rows * n_trees)
+        leaves = np.empty(n_rows * n_trees, dtype=np.int32)
+        for depth in range(self.max_depth):
+            if depth % _COMPACT_EVERY == _COMPACT_EVERY - 1:
+                done = self.is_leaf[node]
+                leaves[position[done]] = node[done]
+                active = ~done
+                node = node[active]
+                root = root[active]
+                row_offset = row_offset[active]
+                position = position[active]
+                if len(node) == 0:
+                    break
+            go_right = flat_x[row_offset + self.feature[node]] > self.threshold[node]
+            node = root + self.children[2 * node + go_right]
+        leaves[position] = node
+        return leaves.reshape(n_rows, n_trees)
@@ -0,0 +1,216 @@
+"""
+Calendrier français : jours fériés et vacances scolaires (zone B, académie
+d'Orléans-Tours).
+
+Public holidays are computed, including the Easter-based movable ones.
+School vacations are read from a bundled CSV. Both are packed once into a
+day-indexed ``uint8`` bitset, so flag lookups for an array of dates cost one
+subtraction and one gather per date.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_VACATIONS_PATH = Path(__file__).parent / "school_vacations_zone_b.csv"
+
+# Bits of the day-indexed flag array
+WEEKEND = 1
+HOLIDAY = 2
+SCHOOL_VACATION = 4
+
+# Fixed-date public holidays as (month, day)
+FIXED_HOLIDAYS = [(1, 1), (5, 1), (5, 8), (7, 14), (8, 15), (11, 1), (11, 11), (12, 25)]
+# Movable public holidays as days after Easter Sunday
+# (Easter Monday, Ascension Thursday, Whit Monday)
+EASTER_OFFSETS = [1, 39, 50]
+
+
+def easter_sundays(years):
+    """
+    Compute Gregorian Easter Sunday for each year (anonymous algorithm).
+
+    Parameters
+    ----------
+    years : array-like of int
+
+    Returns
+    -------
+    np.ndarray of datetime64[D]
+    """
+    y = np.asarray(years, dtype=np.int64)
+    a = y % 19
+    b, c = y // 100, y % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return _make_dates(y, month, day)
+
+
+def public_holidays(years):
+    """
+    List French public holidays for the given years.
+
+    Parameters
+    ----------
+    years : array-like of int
+
+    Returns
+    -------
+    np.ndarray of datetime64[D]
+        Sorted holiday dates
+    """
+    years = np.asarray(years, dtype=np.int64)
+    fixed = [_make_dates(years, month, day) for month, day in FIXED_HOLIDAYS]
+    easter = easter_sundays(years)
+    movable = [easter + np.timedelta64(offset, "D") for offset in EASTER_OFFSETS]
+    return np.sort(np.concatenate(fixed + movable))
+
+
+def load_vacations(path=DEFAULT_VACATIONS_PATH, zone="B"):
+    """
+    Read school vacation ranges from a CSV file.
+
+    Parameters
+    ----------
+    path : str or Path
+        CSV with ``zone``, ``description``, ``first_day`` and ``last_day``
+        columns; ``first_day`` and ``last_day`` are the first and last days
+        without classes
+    zone : str, default "B"
+        Vacation zone to keep
+
+    Returns
+    -------
+    np.ndarray of datetime64[D] with shape (n_ranges, 2)
+        Sorted (first_day, last_day) pairs
+    """
+    table = pd.read_csv(path, dtype={"zone": str})
+    table = table[table["zone"] == zone]
+    ranges = np.column_stack(
+        [
+            pd.to_datetime(table["first_day"]).to_numpy().astype("datetime64[D]"),
+            pd.to_datetime(table["last_day"]).to_numpy().astype("datetime64[D]"),
+        ]
+    )
+    return ranges[np.argsort(ranges[:, 0])]
+
+
+class FrenchCalendar:
+    """Day-indexed weekend / public holiday / school vacation flags."""
+
+    def __init__(self, start_year=None, end_year=None, vacations_path=DEFAULT_VACATIONS_PATH,
+                 zone="B"):
+        """
+        Build the flag array for a range of years.
+
+        Parameters
+        ----------
+        start_year, end_year : int, optional
+            First and last year covered (inclusive). By default, the years
+            spanned by the vacation file. The range is always cut to the
+            days the vacation file covers: a date past its last vacation
+            raises instead of being flagged as a school day.
+        vacations_path : str or Path
+            School vacation CSV, see ``load_vacations``
+        zone : str, default "B"
+            School vacation zone (Tours is in zone B)
+        """
+        vacations = load_vacations(vacations_path, zone)
+        if len(vacations) == 0:
+            raise ValueError(f"No zone {zone} vacations in {vacations_path}")
+        if start_year is None:
+            # The file starts with a summer vacation: its first full year is the next
+            start_year = int(str(vacations[0, 1])[:4]) + 1
+        if end_year is None:
+            end_year = int(str(vacations[:, 1].max())[:4])
+        self.first_day = max(np.datetime64(f"{start_year}-01-01", "D"), vacations[0, 0])
+        self.last_day = min(np.datetime64(f"{end_year}-12-31", "D"), vacations[:, 1].max())
+        if self.last_day < self.first_day:
+            raise ValueError(
+                f"Empty range: years {start_year}-{end_year}, vacations known from "
+                f"{vacations[0, 0]} to {vacations[:, 1].max()}"
+            )
+        self.start_year = start_year
+        self.end_year = end_year
+        self.zone = zone
+
+        self.origin = int(self.first_day.astype(np.int64))
+        n_days = int((self.last_day - self.first_day).astype(np.int64)) + 1
+
+        days = np.arange(n_days, dtype=np.int64) + self.origin
+        # 1970-01-01 was a Thursday (weekday 3, Monday = 0)
+        self.bits = np.where((days + 3) % 7 >= 5, WEEKEND, 0).astype(np.uint8)
+
+        holidays = public_holidays(np.arange(start_year, end_year + 1))
+        holidays = holidays[(holidays >= self.first_day) & (holidays <= self.last_day)]
+        self.bits[(holidays - self.first_day).astype(np.int64)] |= HOLIDAY
+
+        # Mark vacation ranges with a +1/-1 difference array, clipped to the range
+        starts = np.clip((vacations[:, 0] - self.first_day).astype(np.int64), 0, n_days)
+        stops = np.clip((vacations[:, 1] - self.first_day).astype(np.int64) + 1, 0, n_days)
+        delta = np.zeros(n_days + 1, dtype=np.int64)
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, stops, -1)
+        self.bits[np.cumsum(delta[:-1]) > 0] |= SCHOOL_VACATION
+
+    def _positions(self, dates):
+        """Indices of ``dates`` in the flag array, checking the covered range."""
+        dates = pd.to_datetime(dates)
+        if isinstance(dates, pd.Timestamp):
+            dates = [dates]
+        days = pd.DatetimeIndex(dates).values.astype("datetime64[D]").astype(np.int64)
+        positions = days - self.origin
+        outside = (positions < 0) | (positions >= len(self.bits))
+        if outside.any():
+            first_bad = days[outside][0].astype("datetime64[D]")
+            raise ValueError(
+                f"Date {first_bad} is outside the calendar range "
+                f"{self.first_day} to {self.last_day}; extend the school vacation "
+                f"file to cover it"
+            )
+        return positions
+
+    def flags(self, dates):
+        """
+        Look up the day-type flags of dates.
+
+        Parameters
+        ----------
+        dates : array-like of dates
+
+        Returns
+        -------
+        dict of np.ndarray
+            ``is_weekend``, ``is_holiday`` and ``is_school_vacation`` as uint8
+
+        Raises
+        ------
+        ValueError
+            If a date falls outside the calendar's range
+            (``first_day`` to ``last_day``)
+        """
+        bits = self.bits[self._positions(dates)]
+        return {
+            "is_weekend": (bits & WEEKEND != 0).astype(np.uint8),
+            "is_holiday": (bits & HOLIDAY != 0).astype(np.uint8),
+            "is_school_vacation": (bits & SCHOOL_VACATION != 0).astype(np.uint8),
+        }
+
+
+def _make_dates(years, months, days):
+    """Vectorized ``datetime64[D]`` from year, month and day arrays."""
+    years = np.asarray(years, dtype=np.int64)
+    months = np.broadcast_to(np.asarray(months, dtype=np.int64), years.shape)
+    days = np.broadcast_to(np.asarray(days, dtype=np.int64), years.shape)
+    return (
+        (years - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+        + (months - 1).astype("timedelta64[M]")
+    ).astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
@@ -0,0 +1,257 @@
+"""
+Features d'historique : comptages décalés (lag) et moyennes glissantes.
+
+For a predicted day D, ``lag_k`` is the count observed on day D - k and
+``rolling_mean_w`` the mean of the counts observed on days D - w to D - 1
+(days without a count are skipped; NaN when none is known).
+
+- ``CountHistory`` is the online version: the last days of each counter are
+  kept in a day-indexed ring buffer with running window sums, so recording
+  today's count and getting tomorrow's features are constant-time.
+- ``lag_features`` is the offline version for historical frames: counts are
+  laid out on a dense (counter x day) grid and every lag and window is one
+  shift or cumulative-sum difference over the whole grid.
+
+Both give identical values for integer counts, whose float64 sums are exact.
+"""
+
+import numpy as np
+import pandas as pd
+
+LAGS = (1, 7)
+ROLLING_WINDOWS = (7, 28)
+
+LAG_COLUMNS = [f"lag_{k}" for k in LAGS] + [f"rolling_mean_{w}" for w in ROLLING_WINDOWS]
+
+
+def _day_number(date):
+    """Day number since 1970-01-01 of one date."""
+    return int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64))
+
+
+class CountHistory:
+    """Ring buffer of the recent daily counts of each counter."""
+
+    def __init__(self, lags=LAGS, windows=ROLLING_WINDOWS):
+        """
+        Parameters
+        ----------
+        lags : sequence of int, default (1, 7)
+            Lags, in days, returned as ``lag_<k>``
+        windows : sequence of int, default (7, 28)
+            Window lengths, in days, returned as ``rolling_mean_<w>``
+        """
+        self.lags = tuple(int(k) for k in lags)
+        self.windows = tuple(int(w) for w in windows)
+        if min(self.lags + self.windows) < 1:
+            raise ValueError("Lags and windows must be at least 1 day")
+        self.columns = [f"lag_{k}" for k in self.lags] + [f"rolling_mean_{w}" for w in self.windows]
+        # Day d lives in slot d % capacity
+        self.capacity = max(self.lags + self.windows)
+        self._rows = {}
+        self._values = np.full((0, self.capacity), np.nan)
+        self._last_day = np.zeros(0, dtype=np.int64)
+        self._sums = np.zeros((0, len(self.windows)))
+        self._counts = np.zeros((0, len(self.windows)), dtype=np.int64)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _row(self, counter_id):
+        """Buffer row of a counter, added (with doubled storage) if new."""
+        row = self._rows.get(counter_id)
+        if row is None:
+            row = len(self._rows)
+            if row == len(self._values):
+                grow = max(1, row)
+                self._values = np.vstack([self._values, np.full((grow, self.capacity), np.nan)])
+                self._last_day = np.concatenate([self._last_day, np.zeros(grow, np.int64)])
+                self._sums = np.vstack([self._sums, np.zeros((grow, len(self.windows)))])
+                self._counts = np.vstack(
+                    [self._counts, np.zeros((grow, len(self.windows)), np.int64)]
+                )
+            self._rows[counter_id] = row
+        return row
+
+    def update(self, counter_id, date, count):
+        """
+        Record the count of a counter for a day.
+
+        Days must be recorded in increasing order per counter; skipped days
+        are stored as unknown.
+
+        Parameters
+        ----------
+        counter_id : hashable
+            Counter (use any constant for a single series)
+        date : date-like
+            Day of the count
+        count : float
+            Observed count, NaN if unknown
+        """
+        is_new = counter_id not in self._rows
+        row = self._row(counter_id)
+        day = _day_number(date)
+        if is_new:
+            self._last_day[row] = day - 1
+        last = self._last_day[row]
+        if day <= last:
+            raise ValueError(
+                f"Counts of {counter_id!r} must be recorded in date order: "
+                f"{np.datetime64(day, 'D')} is not after {np.datetime64(last, 'D')}"
+            )
+        if day - last > self.capacity:
+            # Nothing recent survives the gap
+            self._values[row] = np.nan
+            self._sums[row] = 0.0
+            self._counts[row] = 0
+            last = day - 1
+        for gap_day in range(last + 1, day):
+            self._push(row, gap_day, np.nan)
+        self._push(row, day, float(count))
+        self._last_day[row] = day
+
+    def _push(self, row, day, value):
+        """Advance a counter by one day, updating the running window sums."""
+        values = self._values[row]
+        for i, window in enumerate(self.windows):
+            leaving = values[(day - window) % self.capacity]
+            if not np.isnan(leaving):
+                self._sums[row, i] -= leaving
+                self._counts[row, i] -= 1
+            if not np.isnan(value):
+                self._sums[row, i] += value
+                self._counts[row, i] += 1
+        values[day % self.capacity] = value
+
+    def features(self, counter_id, date=None):
+        """
+        Return the history features of a counter for a predicted day.
+
+        Constant-time for the day after the last recorded one; other days
+        are read from the buffer in O(window).
+
+        Parameters
+        ----------
+        counter_id : hashable
+            Counter
+        date : date-like, optional
+            Predicted day, by default the day after the last recorded one
+
+        Returns
+        -------
+        dict
+            ``lag_<k>`` and ``rolling_mean_<w>`` values, NaN when unknown
+        """
+        row = self._rows.get(counter_id)
+        if row is None:
+            return {name: np.nan for name in self.columns}
+        last = int(self._last_day[row])
+        day = last + 1 if date is None else _day_number(date)
+        result = {f"lag_{k}": self._value(row, day - k) for k in self.lags}
+        for i, window in enumerate(self.windows):
+            if day == last + 1:
+                total, known = self._sums[row, i], self._counts[row, i]
+            else:
+                values = np.array([self._value(row, d) for d in range(day - window, day)])
+                total, known = np.nansum(values), np.count_nonzero(~np.isnan(values))
+            result[f"rolling_mean_{window}"] = float(total / known) if known else np.nan
+        return result
+
+    def _value(self, row, day):
+        """Count of a counter on a day, NaN if not in the buffer."""
+        last = self._last_day[row]
+        if last - self.capacity < day <= last:
+            return float(self._values[row, day % self.capacity])
+        return np.nan
+
+    @classmethod
+    def from_frame(cls, frame, counter_column=None, date_column="date",
+                   count_column="bike_count", **kwargs):
+        """
+        Build a history by replaying the recent rows of a frame.
+
+        Parameters
+        ----------
+        frame : pd.DataFrame
+            Daily counts, any order
+        counter_column : str, optional
+            Counter id column; None for a single series
+        date_column, count_column : str
+            Column names
+        **kwargs
+            Passed to ``CountHistory``
+
+        Returns
+        -------
+        CountHistory
+        """
+        history = cls(**kwargs)
+        days = pd.to_datetime(frame[date_column]).to_numpy().astype("datetime64[D]")
+        counters = frame[counter_column].to_numpy() if counter_column else np.zeros(len(frame))
+        order = np.lexsort((days, counters))
+        # Only the days that can still reach the buffer are replayed
+        recent = days[order] > days.max() - np.timedelta64(history.capacity + 1, "D")
+        for i in order[recent]:
+            history.update(counters[i] if counter_column else 0, days[i],
+                           frame[count_column].iloc[i])
+        return history
+
+
+def lag_features(frame, counter_column=None, date_column="date", count_column="bike_count",
+                 lags=LAGS, windows=ROLLING_WINDOWS):
+    """
+    Compute the history features of every row of a historical frame.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Daily counts, any order, at most one row per counter and day
+    counter_column : str, optional
+        Counter id column; None for a single series
+    date_column, count_column : str
+        Column names
+    lags, windows : sequence of int
+        See ``CountHistory``
+
+    Returns
+    -------
+    pd.DataFrame
+        ``lag_<k>`` and ``rolling_mean_<w>`` of each row's own day, from the
+        counts of earlier days, aligned with ``frame``
+    """
+    days = pd.to_datetime(frame[date_column]).to_numpy().astype("datetime64[D]").astype(np.int64)
+    if counter_column is None:
+        codes = np.zeros(len(frame), dtype=np.int64)
+        n_counters = 1
+    else:
+        codes, uniques = pd.factorize(frame[counter_column])
+        n_counters = len(uniques)
+    span = max(tuple(lags) + tuple(windows))
+    first = days.min() - span if len(days) else 0
+    n_days = (days.max() - first + 1) if len(days) else 0
+
+    # Dense (counter x day) grid, NaN where no count is known
+    grid = np.full((n_counters, n_days), np.nan)
+    columns = days - first
+    if len(np.unique(codes * n_days + columns)) != len(days):
+        raise ValueError("Several counts for the same counter and day")
+    grid[codes, columns] = frame[count_column].to_numpy(dtype=np.float64)
+
+    result = {}
+    for k in lags:
+        result[f"lag_{k}"] = grid[codes, columns - k]
+    known = ~np.isnan(grid)
+    # Leading zero column: sum over days [a, b) is cumulative[b] - cumulative[a]
+    sums = np.concatenate(
+        [np.zeros((n_counters, 1)), np.cumsum(np.where(known, grid, 0.0), axis=1)], axis=1
+    )
+    counts = np.concatenate(
+        [np.zeros((n_counters, 1), np.int64), np.cumsum(known, axis=1)], axis=1
+    )
+    for w in windows:
+        total = sums[codes, columns] - sums[codes, columns - w]
+        n_known = counts[codes, columns] - counts[codes, columns - w]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[f"rolling_mean_{w}"] = np.where(n_known > 0, total / n_known, np.nan)
+    return pd.DataFrame(result, index=frame.index)
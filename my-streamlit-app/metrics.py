@@ -0,0 +1,195 @@
+"""
+Instrumentation du prédicteur : temps par étape, débit et compteurs.
+
+``Metrics`` accumulates, per named stage (``load_model``, ``parse``,
+``prepare``, ``evaluate``, ``serialize``...), the number of calls, the total
+and maximum wall time and the rows processed. ``snapshot`` returns them as a
+dict and ``to_prometheus`` renders a snapshot in the Prometheus text format.
+
+When instrumentation is off, ``DISABLED`` is used instead: its ``stage``
+returns one shared no-op context manager, so an uninstrumented call costs a
+method call and nothing else.
+"""
+
+import threading
+import time
+
+PROMETHEUS_PREFIX = "bike_predictor"
+
+
+class _Stage:
+    """Context manager timing one stage call; ``rows`` may be set inside."""
+
+    __slots__ = ("metrics", "name", "rows", "start")
+
+    def __init__(self, metrics, name, rows):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class Metrics:
+    """Thread-safe per-stage timers and counters."""
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._gauges = {}
+
+    def stage(self, name, rows=0):
+        """
+        Time a block of code as one call of a stage.
+
+        Parameters
+        ----------
+        name : str
+            Stage name
+        rows : int, default 0
+            Rows processed by the block, for throughput
+
+        Returns
+        -------
+        context manager
+        """
+        return _Stage(self, name, rows)
+
+    def record(self, name, seconds, rows=0):
+        """Add one call of ``seconds`` and ``rows`` to a stage."""
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += rows
+
+    def set_gauge(self, name, value):
+        """Set a point-in-time value, e.g. ``model_load_seconds``."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def reset(self):
+        """Forget every stage and gauge."""
+        with self._lock:
+            self._stages.clear()
+            self._gauges.clear()
+
+    def snapshot(self):
+        """
+        Return the current values.
+
+        Returns
+        -------
+        dict
+            ``stages``: stage name to ``calls``, ``seconds``, ``max_seconds``,
+            ``rows`` and ``rows_per_second``; ``gauges``: gauge name to value
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": calls,
+                    "seconds": seconds,
+                    "max_seconds": max_seconds,
+                    "rows": rows,
+                    "rows_per_second": rows / seconds if rows and seconds > 0 else None,
+                }
+                for name, (calls, seconds, max_seconds, rows) in self._stages.items()
+            }
+            return {"stages": stages, "gauges": dict(self._gauges)}
+
+
+class _NullStage:
+    """Shared no-op stand-in for ``_Stage``."""
+
+    rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+class _DisabledMetrics:
+    """Drop-in ``Metrics`` that records nothing."""
+
+    enabled = False
+    _NULL_STAGE = _NullStage()
+
+    def stage(self, name, rows=0):
+        return self._NULL_STAGE
+
+    def record(self, name, seconds, rows=0):
+        pass
+
+    def set_gauge(self, name, value):
+        pass
+
+    def reset(self):
+        pass
+
+    def snapshot(self):
+        return {"stages": {}, "gauges": {}}
+
+
+DISABLED = _DisabledMetrics()
+
+
+def to_prometheus(snapshot, prefix=PROMETHEUS_PREFIX):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    snapshot : dict
+        ``Metrics.snapshot()``, optionally with a ``cache`` entry as returned
+        by ``BikeCountPredictor.cache_info``
+    prefix : str
+        Metric name prefix
+
+    Returns
+    -------
+    str
+    """
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{prefix}_{name}{labels} {float(value)!r}")
+
+    stages = snapshot.get("stages", {})
+    for field, name, help_text in (
+        ("calls", "stage_calls_total", "Calls per stage"),
+        ("seconds", "stage_seconds_total", "Wall time spent per stage"),
+        ("rows", "stage_rows_total", "Rows processed per stage"),
+    ):
+        family(name, "counter", help_text,
+               [(f'{{stage="{stage}"}}', stats[field]) for stage, stats in sorted(stages.items())])
+    family("stage_max_seconds", "gauge", "Slowest call per stage",
+           [(f'{{stage="{stage}"}}', stats["max_seconds"])
+            for stage, stats in sorted(stages.items())])
+
+    for name, value in sorted(snapshot.get("gauges", {}).items()):
+        if value is not None:
+            family(name, "gauge", name.replace("_", " ").capitalize(), [("", value)])
+
+    cache = snapshot.get("cache")
+    if cache:
+        for field in ("hits", "misses", "evictions"):
+            family(f"cache_{field}_total", "counter", f"Prediction cache {field}",
+                   [("", cache[field])])
+        family("cache_size", "gauge", "Entries in the prediction cache", [("", cache["size"])])
+    return "\n".join(lines) + "\n"
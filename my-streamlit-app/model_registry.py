@@ -0,0 +1,183 @@
+"""
+Registre de modèles par compteur (ou groupe de compteurs).
+
+Holds one ``BikeCountPredictor`` per counter or counter group, loads each
+model lazily on first use and evicts the least recently used ones when the
+loaded models exceed a memory budget.
+"""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import BUNDLE_METADATA
+from predictor import BikeCountPredictor
+
+COUNTER_COLUMN = "counter_id"
+
+
+class ModelRegistry:
+    """Lazy, memory-bounded set of per-counter predictors."""
+
+    def __init__(self, models, groups=None, default=None, memory_budget=512 * 2**20,
+                 **predictor_kwargs):
+        """
+        Create a registry; no model is loaded until it is used.
+
+        Parameters
+        ----------
+        models : mapping or str or Path
+            Model key to model path, or a directory in which every ``*.pkl``
+            file and ``*.bundle`` directory is a model keyed by its stem
+        groups : mapping, optional
+            Counter id to model key, for counters sharing a group model;
+            counters not listed use the model keyed by their own id
+        default : str, optional
+            Model key used for counters that have no model of their own
+        memory_budget : int, default 512 MiB
+            Approximate bytes of loaded models kept before evicting the
+            least recently used ones (the model in use is never evicted)
+        **predictor_kwargs
+            Passed to ``BikeCountPredictor`` (engine, cache_size, ...)
+        """
+        if isinstance(models, (str, Path)):
+            models = _scan_models(Path(models))
+        self.paths = {str(key): Path(path) for key, path in models.items()}
+        self.groups = {str(counter): str(key) for counter, key in (groups or {}).items()}
+        self.default = default
+        self.memory_budget = memory_budget
+        self.predictor_kwargs = predictor_kwargs
+        self.loads = 0
+        self.evictions = 0
+        self._loaded = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, counter_id):
+        """
+        Return the model key used for a counter.
+
+        Raises
+        ------
+        KeyError
+            If neither the counter, its group nor a default has a model
+        """
+        key = self.groups.get(str(counter_id), str(counter_id))
+        if key in self.paths:
+            return key
+        if self.default is not None:
+            return self.default
+        raise KeyError(f"No model for counter {counter_id!r}")
+
+    def get(self, counter_id):
+        """Return the predictor for a counter, loading it if needed."""
+        return self._load(self.resolve(counter_id))
+
+    def _load(self, key):
+        """Return the predictor for a model key, loading and evicting as needed."""
+        with self._lock:
+            predictor = self._loaded.get(key)
+            if predictor is not None:
+                self._loaded.move_to_end(key)
+                return predictor
+
+            path = self.paths[key]
+            kwargs = dict(self.predictor_kwargs)
+            if path.is_dir():
+                kwargs["engine"] = "compiled"
+            predictor = BikeCountPredictor(path, **kwargs)
+            self._loaded[key] = predictor
+            self._sizes[key] = _footprint(predictor)
+            self.loads += 1
+
+            while len(self._loaded) > 1 and self.loaded_bytes > self.memory_budget:
+                evicted, _ = self._loaded.popitem(last=False)
+                del self._sizes[evicted]
+                self.evictions += 1
+            return predictor
+
+    @property
+    def loaded_bytes(self):
+        """Approximate memory held by the loaded models."""
+        return sum(self._sizes.values())
+
+    def predict_batch(self, df, counter_column=COUNTER_COLUMN):
+        """
+        Predict for rows of many counters, one sub-batch per model.
+
+        Rows are grouped by model with a single stable sort, so each model
+        is called once on all of its rows; there is no per-row dispatch.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Feature columns (or a date column, see
+            ``BikeCountPredictor.predict_batch``) plus a counter id column
+        counter_column : str, default "counter_id"
+            Column holding the counter ids
+
+        Returns
+        -------
+        np.ndarray
+            Array of predictions, in the row order of ``df``
+        """
+        counter_codes, counters = pd.factorize(df[counter_column], sort=False)
+        if (counter_codes < 0).any():
+            raise ValueError(f"Missing values in column {counter_column}")
+        model_codes, model_keys = pd.factorize(
+            np.array([self.resolve(counter) for counter in counters], dtype=object)
+        )
+        row_models = model_codes[counter_codes]
+
+        order = np.argsort(row_models, kind="stable")
+        bounds = np.flatnonzero(np.diff(row_models[order])) + 1
+        predictions = np.empty(len(df), dtype=int)
+        for rows in np.split(order, bounds):
+            if len(rows) == 0:
+                continue
+            predictor = self._load(model_keys[row_models[rows[0]]])
+            predictions[rows] = predictor.predict_batch(df.iloc[rows])
+        return predictions
+
+    def stats(self):
+        """
+        Return registry counters.
+
+        Returns
+        -------
+        dict
+            ``loaded`` model keys (least recent first), ``loaded_bytes``,
+            ``memory_budget``, ``loads`` and ``evictions``
+        """
+        with self._lock:
+            return {
+                "loaded": list(self._loaded),
+                "loaded_bytes": self.loaded_bytes,
+                "memory_budget": self.memory_budget,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+def _scan_models(directory):
+    """Map model keys to the model files and bundles found in a directory."""
+    if not directory.is_dir():
+        raise FileNotFoundError(f"Model directory not found: {directory}")
+    models = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix == ".pkl" and path.is_file():
+            models.setdefault(path.stem, path)
+        elif path.suffix == ".bundle" and (path / BUNDLE_METADATA).exists():
+            # Prefer the memory-mapped bundle over the pickle of the same model
+            models[path.stem] = path
+    return models
+
+
+def _footprint(predictor):
+    """Approximate memory held by a loaded predictor, in bytes."""
+    if predictor.compiled is not None:
+        return predictor.compiled.nbytes
+    return predictor.model_path.stat().st_size
@@ -2,32 +2,419 @@
 Module de prédiction pour le nombre de vélos comptés à Tours.
 """
 
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 import joblib
 from pathlib import Path
 
+from forest_engine import BUNDLE_METADATA, CompiledForest, mean_over_trees
+from lag_features import LAG_COLUMNS
+from metrics import DISABLED, Metrics
+from prediction_cache import PredictionCache
+
+FEATURE_COLUMNS = [
+    "t2m_min",
+    "t2m_max",
+    "tp_total",
+    "sd_total",
+    "i10fg_max",
+    "sf_max",
+    "is_weekend",
+    "is_holiday",
+    "is_school_vacation",
+]
+
+FLAG_COLUMNS = ["is_weekend", "is_holiday", "is_school_vacation"]
+
+# Explicit parse dtypes for the feature columns of batch CSV files
+FEATURE_DTYPES = {
+    name: ("int8" if name in FLAG_COLUMNS else "float64") for name in FEATURE_COLUMNS
+}
+
+# Accepted range of each weather feature: the bounds of the Streamlit number_inputs.
+# Day flags must be 0 or 1, and history features (see lag_features.py) non-negative.
+FEATURE_RANGES = {
+    "t2m_min": (-40.0, 50.0),
+    "t2m_max": (-40.0, 50.0),
+    "tp_total": (0.0, 0.5),
+    "sd_total": (0.0, 5.0),
+    "i10fg_max": (0.0, 50.0),
+    "sf_max": (0.0, 5.0),
+}
+
+# Columns of the error report returned by ``validate_features``
+VALIDATION_COLUMNS = ["row", "column", "value", "error"]
+
+PREDICTION_COLUMN = "predicted_bikes"
+
+# Default prediction interval: quantiles of the per-tree outputs of the forest
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+# Optional batch column from which missing day flags are derived
+DATE_COLUMN = "date"
+
+# Batch file formats; Parquet and Arrow IPC need the optional pyarrow package
+BATCH_FORMATS = ("csv", "parquet", "arrow")
+FORMAT_SUFFIXES = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+ENGINES = ("sklearn", "compiled")
+
+PARALLEL_BACKENDS = ("process", "thread")
+
+# (row, tree) cells of per-tree outputs held at once when computing quantiles
+_QUANTILE_CHUNK_CELLS = 1 << 20
+
 
 class BikeCountPredictor:
     """Prédicteur du nombre de vélos comptés basé sur un modèle RandomForest."""
 
-    def __init__(self, model_path):
+    def __init__(self, model_path, engine="sklearn", cache_size=0, mmap_mode=None,
+                 calendar=None, metrics=None, monitor=None):
         """
         Initialize the predictor with a trained model.
 
         Parameters
         ----------
         model_path : str or Path
-            Path to the saved model file (joblib format)
+            Path to the saved model file (joblib format), or to a forest
+            bundle directory written by ``export_model.py``
+        engine : {"sklearn", "compiled"}, default "sklearn"
+            Inference engine. ``"compiled"`` converts the loaded forest into
+            flat NumPy arrays (see ``forest_engine.CompiledForest``) and
+            evaluates all trees vectorized over the batch. Bundles can only
+            be evaluated by the compiled engine.
+        cache_size : int, default 0
+            Number of predictions kept in an LRU cache (0 disables it), keyed
+            on the exact feature values: cached and uncached predictions are
+            identical. Batches larger than the cache bypass it.
+        mmap_mode : {None, "r"}, default None
+            Passed to ``joblib.load``: with ``"r"`` the arrays of an
+            uncompressed model file are memory-mapped instead of copied, so
+            processes loading the same file share one page-cache copy.
+            Bundles are always memory-mapped.
+        calendar : french_calendar.FrenchCalendar, optional
+            Calendar used to derive day flags from dates; the bundled zone B
+            calendar is built on first use when omitted.
+        metrics : metrics.Metrics or bool, optional
+            Collects per-stage timings and row counts (``True`` creates a
+            ``Metrics``); off by default, at negligible cost.
+        monitor : drift.DriftMonitor, optional
+            Receives the features of every scored row, to detect input drift
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
         self.model_path = Path(model_path)
+        self.engine = engine
+        self.mmap_mode = mmap_mode
+        self._calendar = calendar
         self.model = None
+        self.compiled = None
+        self._leaf_table = None
+        self._thresholds = None
+        self.cache = PredictionCache(cache_size) if cache_size else None
+        if metrics is True:
+            metrics = Metrics()
+        self.metrics = metrics or DISABLED
+        self.monitor = monitor
+        self._model_signature = None
+        self._feature_columns = list(FEATURE_COLUMNS)
+        self._local = threading.local()
         self.load_model()
 
     def load_model(self):
         """Load the trained model from disk."""
+        start = time.perf_counter()
         if not self.model_path.exists():
             raise FileNotFoundError(f"Model file not found: {self.model_path}")
-        self.model = joblib.load(self.model_path)
+        if self.model_path.is_dir():
+            if self.engine != "compiled":
+                raise ValueError(
+                    f"Model bundle {self.model_path} requires engine='compiled'"
+                )
+            self.model = None
+            self.compiled = CompiledForest.load(self.model_path, mmap_mode="r")
+            names = self.compiled.feature_names
+            signature_path = self.model_path / BUNDLE_METADATA
+        else:
+            self.model = joblib.load(self.model_path, mmap_mode=self.mmap_mode)
+            self.compiled = None
+            if self.engine == "compiled":
+                self.compiled = CompiledForest.from_sklearn(self.model)
+            names = getattr(self.model, "feature_names_in_", None)
+            signature_path = self.model_path
+
+        columns = list(names) if names is not None else list(FEATURE_COLUMNS)
+        if len(set(columns)) != len(columns) or (
+            sorted(set(columns) - set(LAG_COLUMNS)) != sorted(FEATURE_COLUMNS)
+        ):
+            raise ValueError(
+                f"Model expects features {columns}, expected {FEATURE_COLUMNS} "
+                f"and optionally some of {LAG_COLUMNS}"
+            )
+        self._feature_columns = columns
+        self._leaf_table = None
+        self._thresholds = None
+        # Buffers are per thread: a cached predictor is shared by Streamlit sessions
+        self._local = threading.local()
+
+        stat = signature_path.stat()
+        signature = (str(self.model_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if self.cache is not None and signature != self._model_signature:
+            self.cache.clear()
+        self._model_signature = signature
+
+        elapsed = time.perf_counter() - start
+        self.metrics.record("load_model", elapsed)
+        self.metrics.set_gauge("model_load_seconds", elapsed)
+        self.metrics.set_gauge("model_trees", self.n_trees)
+
+    @property
+    def feature_columns(self):
+        """Column order expected by the model."""
+        return list(self._feature_columns)
+
+    @property
+    def calendar(self):
+        """Calendar used to derive day flags from dates."""
+        if self._calendar is None:
+            from french_calendar import FrenchCalendar
+
+            self._calendar = FrenchCalendar()
+        return self._calendar
+
+    def day_flags(self, dates):
+        """
+        Derive ``is_weekend``, ``is_holiday`` and ``is_school_vacation``.
+
+        Parameters
+        ----------
+        dates : date or array-like of dates
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per date, the three flag columns as uint8
+        """
+        return pd.DataFrame(self.calendar.flags(dates))[FLAG_COLUMNS]
+
+    def metrics_snapshot(self):
+        """
+        Return instrumentation values, see ``metrics.Metrics.snapshot``.
+
+        Returns
+        -------
+        dict
+            ``stages``, ``gauges`` and ``cache`` (``cache_info()``)
+        """
+        snapshot = self.metrics.snapshot()
+        snapshot["cache"] = self.cache_info()
+        return snapshot
+
+    def cache_info(self):
+        """
+        Return prediction cache counters.
+
+        Returns
+        -------
+        dict or None
+            ``hits``, ``misses``, ``evictions``, ``size`` and ``maxsize``,
+            or None when the cache is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
+
+    def _predict_cached(self, X):
+        """Predict raw values for ``X`` through the cache, scoring only misses."""
+        unique_rows, inverse = np.unique(X, axis=0, return_inverse=True)
+        values = np.empty(len(unique_rows), dtype=np.float64)
+        missing = []
+        for i, key in enumerate(map(tuple, unique_rows.tolist())):
+            value = self.cache.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                values[i] = value
+        if missing:
+            missing_rows = unique_rows[missing]
+            scored = self._predict_array(missing_rows)
+            values[missing] = scored
+            for key, value in zip(map(tuple, missing_rows.tolist()), scored.tolist()):
+                self.cache.put(key, value)
+        return values[inverse.ravel()]
+
+    def _predict_raw(self, X):
+        """Unrounded predictions for a float array, through the cache if any."""
+        # A batch larger than the cache would only evict itself: score it directly
+        if self.cache is not None and len(X) <= self.cache.maxsize:
+            return self._predict_cached(X)
+        return self._predict_array(X)
+
+    def _row_buffer(self):
+        """Return this thread's preallocated (1, n_features) float64 buffer."""
+        buffer = getattr(self._local, "row", None)
+        if buffer is None:
+            buffer = np.zeros((1, len(self._feature_columns)), dtype=np.float64)
+            self._local.row = buffer
+        return buffer
+
+    def _predict_array(self, X):
+        """Evaluate the model on a float array in ``feature_columns`` order."""
+        with self.metrics.stage("evaluate", len(X)):
+            if self.compiled is not None:
+                return self.compiled.predict(X)
+            with warnings.catch_warnings():
+                # The model was fitted on a DataFrame; the array is already ordered
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+                return self.model.predict(X)
+
+    @property
+    def n_trees(self):
+        """Number of trees in the forest."""
+        if self.compiled is not None:
+            return self.compiled.n_trees
+        return len(self.model.estimators_)
+
+    def split_thresholds(self):
+        """
+        Return the distinct split thresholds the forest uses for each feature.
+
+        Values are compared as float32 against these thresholds, so all the
+        values between two consecutive thresholds give the same prediction.
+
+        Returns
+        -------
+        dict of np.ndarray
+            Feature name to sorted float64 thresholds (empty if never split)
+        """
+        if self._thresholds is None:
+            n_features = len(self._feature_columns)
+            if self.compiled is not None:
+                per_feature = self.compiled.split_thresholds(n_features)
+            else:
+                trees = [estimator.tree_ for estimator in self.model.estimators_]
+                features = np.concatenate([tree.feature for tree in trees])
+                thresholds = np.concatenate([tree.threshold for tree in trees])
+                per_feature = [np.unique(thresholds[features == f]) for f in range(n_features)]
+            self._thresholds = dict(zip(self._feature_columns, per_feature))
+        return self._thresholds
+
+    def apply(self, X):
+        """
+        Return the leaf reached by each row in each tree.
+
+        Parameters
+        ----------
+        X : np.ndarray of shape (n_rows, n_features)
+            Float array in ``feature_columns`` order
+
+        Returns
+        -------
+        np.ndarray of shape (n_rows, n_trees)
+            Leaf indices numbered across the whole forest, as in
+            ``CompiledForest.from_sklearn``
+        """
+        if self.compiled is not None:
+            return self.compiled.apply(X)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            leaves = self.model.apply(X)
+        return leaves + self._leaf_values()[1]
+
+    def predict_raw(self, X):
+        """
+        Unrounded predictions for a float array, bypassing the cache.
+
+        Parameters
+        ----------
+        X : np.ndarray of shape (n_rows, n_features)
+            Float array in ``feature_columns`` order
+
+        Returns
+        -------
+        np.ndarray of float64
+        """
+        return self._predict_array(np.asarray(X, dtype=np.float64))
+
+    def _leaf_values(self):
+        """Node values of all trees concatenated, and each tree's offset."""
+        if self._leaf_table is None:
+            trees = [estimator.tree_ for estimator in self.model.estimators_]
+            sizes = [tree.node_count for tree in trees]
+            self._leaf_table = (
+                np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+                np.concatenate(([0], np.cumsum(sizes)[:-1])),
+            )
+        return self._leaf_table
+
+    def _tree_outputs(self, X):
+        """Per-tree outputs, shape (n_rows, n_trees), for a float array."""
+        if self.compiled is not None:
+            return self.compiled.tree_outputs(X)
+        return self._leaf_values()[0][self.apply(X)]
+
+    def _predict_intervals(self, X, quantiles):
+        """
+        Mean and quantiles of the per-tree outputs for a float array.
+
+        Every tree is evaluated in one pass per chunk of rows, the chunk
+        size bounding the (rows x trees) matrix.
+        """
+        n_rows = len(X)
+        means = np.empty(n_rows, dtype=np.float64)
+        bounds = np.empty((len(quantiles), n_rows), dtype=np.float64)
+        chunk_size = max(1, _QUANTILE_CHUNK_CELLS // self.n_trees)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            with self.metrics.stage("evaluate", stop - start):
+                outputs = self._tree_outputs(X[start:stop])
+            means[start:stop] = mean_over_trees(outputs)
+            bounds[:, start:stop] = np.quantile(outputs, quantiles, axis=1)
+        return means, bounds
+
+    def fill_features(self, values, out=None):
+        """
+        Validate a mapping of feature values into a row in model column order.
+
+        Parameters
+        ----------
+        values : mapping
+            Feature name to value, for every name in ``feature_columns``
+        out : np.ndarray, optional
+            float64 array of length ``len(feature_columns)`` filled in place
+
+        Returns
+        -------
+        np.ndarray
+            The filled row
+
+        Raises
+        ------
+        ValueError
+            If a feature is missing, a weather value is not a finite number
+            or a day flag is not 0/1
+        """
+        if out is None:
+            out = np.empty(len(self._feature_columns), dtype=np.float64)
+        for position, name in enumerate(self._feature_columns):
+            if name not in values:
+                raise ValueError(f"Missing feature: {name}")
+            if name in FLAG_COLUMNS:
+                out[position] = _check_flag(name, values[name])
+            else:
+                out[position] = _check_number(name, values[name])
+        return out
 
     def predict(
         self,
@@ -37,13 +424,18 @@ class BikeCountPredictor:
         sd_total,
         i10fg_max,
         sf_max,
-        is_weekend,
-        is_holiday,
-        is_school_vacation,
+        is_weekend=None,
+        is_holiday=None,
+        is_school_vacation=None,
+        date=None,
+        quantiles=None,
+        lags=None,
     ):
         """
         Predict the number of bikes counted for given features.
 
+        Day flags left to None are derived from ``date`` with ``calendar``.
+
         Parameters
         ----------
         t2m_min : float
@@ -64,42 +456,974 @@ class BikeCountPredictor:
             0 if not holiday, 1 if holiday
         is_school_vacation : int
             0 if not school vacation, 1 if school vacation
+        date : date-like, optional
+            Day predicted, used for the flags left to None
+        quantiles : sequence of float, optional
+            Quantiles in [0, 1] of the per-tree outputs to return as well,
+            e.g. ``DEFAULT_QUANTILES``
+        lags : mapping, optional
+            History features (``LAG_COLUMNS``) of a model trained with them,
+            e.g. ``lag_features.CountHistory.features(counter_id)``
 
         Returns
         -------
-        int
-            Predicted number of bikes counted
-        """
-        features = pd.DataFrame(
-            {
-                "t2m_min": [float(t2m_min)],
-                "t2m_max": [float(t2m_max)],
-                "tp_total": [float(tp_total)],
-                "sd_total": [float(sd_total)],
-                "i10fg_max": [float(i10fg_max)],
-                "sf_max": [float(sf_max)],
-                "is_weekend": [int(is_weekend)],
-                "is_holiday": [int(is_holiday)],
-                "is_school_vacation": [int(is_school_vacation)],
-            }
-        )
+        int or dict
+            Predicted number of bikes counted; with ``quantiles``, a dict
+            mapping ``predicted_bikes`` and each ``quantile_column`` to an int
+
+        Raises
+        ------
+        ValueError
+            If a weather value is not a finite number, a day flag is not 0/1,
+            or a flag is missing and cannot be derived from ``date``
+        """
+        values = {
+            "t2m_min": t2m_min,
+            "t2m_max": t2m_max,
+            "tp_total": tp_total,
+            "sd_total": sd_total,
+            "i10fg_max": i10fg_max,
+            "sf_max": sf_max,
+            "is_weekend": is_weekend,
+            "is_holiday": is_holiday,
+            "is_school_vacation": is_school_vacation,
+        }
+        values.update(lags or {})
+        missing_flags = [name for name in FLAG_COLUMNS if values[name] is None]
+        if missing_flags:
+            if date is None:
+                raise ValueError(
+                    f"Missing {', '.join(missing_flags)}: pass the flags or a date"
+                )
+            flags = self.calendar.flags(date)
+            for name in missing_flags:
+                values[name] = int(flags[name][0])
+        with self.metrics.stage("predict", 1):
+            return self._predict_row(values, quantiles)
 
-        prediction = self.model.predict(features)
+    def _predict_row(self, values, quantiles):
+        """Score one validated mapping of feature values, see ``predict``."""
+        row = self._row_buffer()
+        self.fill_features(values, out=row[0])
+        if self.monitor is not None:
+            self.monitor.observe(row, columns=self._feature_columns)
+
+        if quantiles is not None:
+            quantiles = _check_quantiles(quantiles)
+            # The mean and its quantiles are cached together, apart from plain means
+            key = (quantiles,) + tuple(row[0].tolist())
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is None:
+                means, bounds = self._predict_intervals(row, quantiles)
+                cached = (float(means[0]), tuple(bounds[:, 0].tolist()))
+                if self.cache is not None:
+                    self.cache.put(key, cached)
+            mean, bounds = cached
+            result = {PREDICTION_COLUMN: int(round(mean))}
+            for q, bound in zip(quantiles, bounds):
+                result[quantile_column(q)] = int(round(bound))
+            return result
+
+        if self.cache is not None:
+            key = tuple(row[0].tolist())
+            cached = self.cache.get(key)
+            if cached is not None:
+                return int(round(cached))
+            prediction = self._predict_array(row)
+            self.cache.put(key, float(prediction[0]))
+        else:
+            prediction = self._predict_array(row)
         return int(round(prediction[0]))
 
-    def predict_batch(self, df):
+    def predict_batch(self, df, quantiles=None, observe=True):
         """
         Predict for multiple rows in a DataFrame.
 
+        Parameters
+        ----------
+        df : pd.DataFrame, pyarrow.Table, pyarrow.RecordBatch or np.ndarray
+            Table with feature columns, or a 2-D float array whose columns
+            follow ``feature_columns``. A DataFrame may omit day flag columns
+            if it has a ``date`` column to derive them from.
+        quantiles : sequence of float, optional
+            Quantiles in [0, 1] of the per-tree outputs to return as well
+        observe : bool, default True
+            Send the rows to ``monitor``; what-if rows (scenario sweeps,
+            explanations) are not real inputs and must not be observed
+
+        Returns
+        -------
+        np.ndarray or pd.DataFrame
+            Array of predictions; with ``quantiles``, a DataFrame with the
+            ``predicted_bikes`` column and one ``quantile_column`` per quantile
+        """
+        with self.metrics.stage("prepare", len(df)):
+            index = None
+            if isinstance(df, pd.DataFrame):
+                df = self._with_day_flags(df)
+                index = df.index
+            if isinstance(df, np.ndarray):
+                X = np.asarray(df, dtype=np.float64)
+            elif _is_arrow(df):
+                X = _arrow_features(df, self._feature_columns)
+            else:
+                X = df[self._feature_columns].to_numpy(dtype=np.float64)
+        if observe and self.monitor is not None:
+            with self.metrics.stage("monitor", len(X)):
+                self.monitor.observe(X, columns=self._feature_columns)
+        if quantiles is not None:
+            return self._predict_batch_intervals(X, _check_quantiles(quantiles), index)
+        return self._predict_raw(X).round().astype(int)
+
+    def _predict_batch_intervals(self, X, quantiles, index=None):
+        """``predict_batch`` with quantile columns, see ``_predict_intervals``."""
+        means, bounds = self._predict_intervals(X, quantiles)
+        columns = {PREDICTION_COLUMN: means.round().astype(int)}
+        for q, bound in zip(quantiles, bounds):
+            columns[quantile_column(q)] = bound.round().astype(int)
+        return pd.DataFrame(columns, index=index)
+
+    def _with_day_flags(self, df):
+        """Add day flag columns missing from ``df`` using its date column."""
+        missing_flags = [name for name in FLAG_COLUMNS if name not in df.columns]
+        if not missing_flags or DATE_COLUMN not in df.columns:
+            return df
+        flags = self.calendar.flags(df[DATE_COLUMN])
+        return df.assign(**{name: flags[name] for name in missing_flags})
+
+    def _with_arrow_day_flags(self, batch):
+        """Arrow counterpart of ``_with_day_flags`` for a RecordBatch."""
+        names = batch.schema.names
+        missing_flags = [name for name in FLAG_COLUMNS if name not in names]
+        if not missing_flags or DATE_COLUMN not in names:
+            return batch
+        pa = _require_pyarrow()
+        dates = batch.column(names.index(DATE_COLUMN)).to_numpy(zero_copy_only=False)
+        flags = self.calendar.flags(dates)
+        return pa.RecordBatch.from_arrays(
+            list(batch.columns) + [pa.array(flags[name]) for name in missing_flags],
+            names=names + missing_flags,
+        )
+
+    def predict_batch_parallel(self, df, n_workers=None, shard_size=250_000, backend="process"):
+        """
+        Predict for a large DataFrame by scoring shards on a worker pool.
+
         Parameters
         ----------
         df : pd.DataFrame
             DataFrame with feature columns
+        n_workers : int, optional
+            Pool size, defaults to the number of CPUs
+        shard_size : int, default 250_000
+            Rows per shard sent to a worker
+        backend : {"process", "thread"}, default "process"
+            ``"process"`` starts worker processes that each load the model
+            once, memory-mapped (``mmap_mode="r"``); ``"thread"`` shares this
+            predictor between threads, which suits the compiled engine and
+            scikit-learn's traversal since both release the GIL. Both backends
+            evaluate every row exactly, without the prediction cache.
 
         Returns
         -------
         np.ndarray
-            Array of predictions
+            Array of predictions, in the row order of ``df``
+        """
+        if backend not in PARALLEL_BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend!r}, expected one of {PARALLEL_BACKENDS}"
+            )
+        n_workers = n_workers or os.cpu_count() or 1
+        df = self._with_day_flags(df)
+        X = df[self._feature_columns].to_numpy(dtype=np.float64)
+        if self.monitor is not None:
+            with self.metrics.stage("monitor", len(X)):
+                self.monitor.observe(X, columns=self._feature_columns)
+        shards = [X[start:start + shard_size] for start in range(0, len(X), shard_size)]
+        if not shards:
+            return np.empty(0, dtype=int)
+
+        if backend == "thread":
+            with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                results = list(pool.map(self._predict_array, shards))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(self.model_path, self.engine),
+            ) as pool:
+                results = list(pool.map(_predict_in_worker, shards))
+        return np.concatenate(results).round().astype(int)
+
+    def predict_csv_chunks(self, source, chunksize=100_000, progress=None, quantiles=None,
+                           on_invalid=None):
+        """
+        Stream a CSV file through the model, one chunk at a time.
+
+        Only one chunk is held in memory, so peak memory is bounded by
+        ``chunksize`` whatever the size of the input.
+
+        Parameters
+        ----------
+        source : str, Path or binary file-like
+            CSV file with the feature columns (other columns are kept)
+        chunksize : int, default 100_000
+            Number of rows read and scored per chunk
+        progress : callable, optional
+            Called after each chunk as ``progress(rows_done, fraction)``;
+            ``fraction`` is the share of the input consumed, or None when the
+            input size is unknown
+        quantiles : sequence of float, optional
+            Also append one ``quantile_column`` per quantile, see
+            ``predict_batch``
+        on_invalid : callable, optional
+            Validate the features with ``validate_features``: the feature
+            columns are replaced by their compact, checked version, rows
+            failing a check get empty predictions, and each chunk's error
+            report (a DataFrame, rows numbered from 0 across the file) is
+            passed to ``on_invalid``. Without it, features are not checked.
+
+        Yields
+        ------
+        pd.DataFrame
+            Input chunk with a ``predicted_bikes`` column appended
+
+        Raises
+        ------
+        ValueError
+            If feature columns are missing from the file
+        """
+        handle = open(source, "rb") if isinstance(source, (str, Path)) else source
+        try:
+            end = _stream_end(handle)
+            # When validating, parse failures are reported per cell instead of raised
+            dtype = FEATURE_DTYPES if on_invalid is None else None
+            reader = pd.read_csv(handle, chunksize=chunksize, dtype=dtype)
+            rows_done = 0
+            while True:
+                with self.metrics.stage("parse") as timer:
+                    chunk = next(reader, None)
+                    timer.rows = len(chunk) if chunk is not None else 0
+                if chunk is None:
+                    break
+                chunk = self._with_day_flags(chunk)
+                missing_cols = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+                if missing_cols:
+                    raise ValueError(f"Missing columns: {', '.join(missing_cols)}")
+                if on_invalid is None:
+                    outputs = _prediction_columns(
+                        self.predict_batch(chunk[self._feature_columns], quantiles)
+                    )
+                else:
+                    features, outputs = self._predict_validated(
+                        chunk, quantiles, on_invalid, rows_done
+                    )
+                    chunk = chunk.assign(**{name: features[name] for name in features.columns})
+                for name, values in outputs.items():
+                    chunk[name] = values
+                rows_done += len(chunk)
+                if progress is not None:
+                    fraction = min(handle.tell() / end, 1.0) if end else None
+                    progress(rows_done, fraction)
+                yield chunk
+        finally:
+            if handle is not source:
+                handle.close()
+
+    def predict_csv(self, source, destination, chunksize=100_000, progress=None,
+                    quantiles=None, on_invalid=None):
+        """
+        Score a CSV file and write the predictions incrementally.
+
+        Parameters
+        ----------
+        source : str, Path or binary file-like
+            CSV file with the feature columns
+        destination : str, Path or text file-like
+            Output CSV: the input columns followed by ``predicted_bikes``
+        chunksize : int, default 100_000
+            Number of rows read, scored and written per chunk
+        progress : callable, optional
+            See ``predict_csv_chunks``
+        quantiles : sequence of float, optional
+            See ``predict_csv_chunks``
+        on_invalid : callable, optional
+            See ``predict_csv_chunks``
+
+        Returns
+        -------
+        int
+            Number of rows written
+        """
+        chunks = self.predict_csv_chunks(source, chunksize, progress, quantiles, on_invalid)
+        return self._write_csv(chunks, destination)
+
+    def _write_csv(self, chunks, destination):
+        """Write scored DataFrame chunks to a CSV file; return the rows written."""
+        handle = (
+            open(destination, "w", newline="", encoding="utf-8")
+            if isinstance(destination, (str, Path))
+            else destination
+        )
+        rows = 0
+        try:
+            for chunk in chunks:
+                with self.metrics.stage("serialize", len(chunk)):
+                    chunk.to_csv(handle, index=False, header=rows == 0)
+                rows += len(chunk)
+        finally:
+            if handle is not destination:
+                handle.close()
+        return rows
+
+    def predict_file(
+        self,
+        source,
+        destination,
+        input_format=None,
+        output_format=None,
+        chunksize=100_000,
+        keep_columns=True,
+        progress=None,
+        quantiles=None,
+        on_invalid=None,
+    ):
+        """
+        Score a CSV, Parquet or Arrow IPC file batch by batch.
+
+        Non-CSV paths stay in Arrow memory end to end: only the feature
+        columns are converted to NumPy, and the other columns are written
+        back from their Arrow buffers without becoming Python objects.
+
+        Parameters
+        ----------
+        source : str, Path or binary file-like
+            Input file
+        destination : str, Path or binary file-like
+            Output file: the input columns followed by ``predicted_bikes``
+        input_format, output_format : {"csv", "parquet", "arrow"}, optional
+            Inferred from the file suffix when omitted
+        chunksize : int, default 100_000
+            Rows per batch for CSV and Parquet inputs; Arrow IPC inputs keep
+            the batches they were written with
+        keep_columns : bool, default True
+            If False, read only the feature columns (column projection) and
+            write the features with their predictions
+        progress : callable, optional
+            See ``predict_csv_chunks``
+        quantiles : sequence of float, optional
+            See ``predict_csv_chunks``
+        on_invalid : callable, optional
+            See ``predict_csv_chunks``; validated CSV inputs are read with
+            pandas, whose type inference lets unparsable cells be reported
+
+        Returns
+        -------
+        int
+            Number of rows written
         """
-        predictions = self.model.predict(df)
-        return (predictions.round()).astype(int)
+        input_format = input_format or detect_format(source)
+        output_format = output_format or detect_format(destination)
+        for file_format in (input_format, output_format):
+            if file_format not in BATCH_FORMATS:
+                raise ValueError(
+                    f"Unknown format {file_format!r}, expected one of {BATCH_FORMATS}"
+                )
+        if input_format == "csv" and (
+            on_invalid is not None or (output_format == "csv" and keep_columns)
+        ):
+            chunks = self.predict_csv_chunks(source, chunksize, progress, quantiles, on_invalid)
+            if not keep_columns:
+                outputs = [PREDICTION_COLUMN]
+                if quantiles is not None:
+                    outputs += [quantile_column(q) for q in _check_quantiles(quantiles)]
+                chunks = (chunk[self._feature_columns + outputs] for chunk in chunks)
+            if output_format == "csv":
+                return self._write_csv(chunks, destination)
+            return self._write_arrow_frames(chunks, destination, output_format)
+
+        pa = _require_pyarrow()
+        rows = 0
+        writer = None
+        try:
+            batches = _iter_arrow_batches(source, input_format, chunksize, keep_columns)
+            while True:
+                with self.metrics.stage("parse") as timer:
+                    batch, fraction = next(batches, (None, None))
+                    timer.rows = batch.num_rows if batch is not None else 0
+                if batch is None:
+                    break
+                batch = self._with_arrow_day_flags(batch)
+                if not keep_columns and DATE_COLUMN in batch.schema.names:
+                    # Projected only to derive the day flags
+                    batch = batch.drop_columns([DATE_COLUMN])
+                if rows == 0:
+                    missing_cols = [
+                        col for col in FEATURE_COLUMNS if col not in batch.schema.names
+                    ]
+                    if missing_cols:
+                        raise ValueError(f"Missing columns: {', '.join(missing_cols)}")
+                if on_invalid is None:
+                    outputs = _prediction_columns(self.predict_batch(batch, quantiles))
+                else:
+                    frame = pd.DataFrame(
+                        {name: batch.column(name).to_pandas() for name in self._feature_columns}
+                    )
+                    features, outputs = self._predict_validated(frame, quantiles, on_invalid, rows)
+                    batch = pa.RecordBatch.from_arrays(
+                        [
+                            pa.array(features[name], from_pandas=True)
+                            if name in features.columns else column
+                            for name, column in zip(batch.schema.names, batch.columns)
+                        ],
+                        names=batch.schema.names,
+                    )
+                batch = pa.RecordBatch.from_arrays(
+                    list(batch.columns) + [pa.array(values) for values in outputs.values()],
+                    names=batch.schema.names + list(outputs),
+                )
+                if writer is None:
+                    writer = _open_arrow_writer(destination, output_format, batch.schema)
+                with self.metrics.stage("serialize", batch.num_rows):
+                    writer.write_batch(batch)
+                rows += batch.num_rows
+                if progress is not None:
+                    progress(rows, fraction)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def _write_arrow_frames(self, chunks, destination, output_format):
+        """Write scored DataFrame chunks to a Parquet or Arrow IPC file."""
+        pa = _require_pyarrow()
+        rows = 0
+        writer = schema = None
+        try:
+            for chunk in chunks:
+                # Later chunks are cast to the first one's schema
+                batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = batch.schema
+                    writer = _open_arrow_writer(destination, output_format, schema)
+                with self.metrics.stage("serialize", batch.num_rows):
+                    writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    def _predict_validated(self, frame, quantiles, on_invalid, first_row):
+        """
+        Validate the features of a chunk and score its valid rows.
+
+        Returns the checked features (see ``validate_features``) and the
+        prediction columns, missing for invalid rows; the chunk's errors, if
+        any, are passed to ``on_invalid``.
+        """
+        with self.metrics.stage("validate", len(frame)):
+            features, valid, errors = validate_features(frame, self._feature_columns, first_row)
+        if len(errors):
+            on_invalid(errors)
+        if valid.all():
+            outputs = _prediction_columns(self.predict_batch(features, quantiles))
+        elif valid.any():
+            outputs = _prediction_columns(self.predict_batch(features[valid], quantiles))
+        else:
+            names = [PREDICTION_COLUMN]
+            if quantiles is not None:
+                names += [quantile_column(q) for q in _check_quantiles(quantiles)]
+            outputs = {name: np.empty(0, dtype=np.int64) for name in names}
+        return features, {name: _with_missing(values, valid) for name, values in outputs.items()}
+
+
+def validate_features(frame, columns=None, first_row=0):
+    """
+    Cast batch features to compact dtypes and check them, vectorized.
+
+    Each column is converted to numbers (cells that do not parse become
+    missing), then checked with whole-column masks: no missing values,
+    weather within ``FEATURE_RANGES``, day flags equal to 0 or 1, history
+    features non-negative and ``t2m_min`` not above ``t2m_max``.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Batch with the feature columns, of any dtype
+    columns : list of str, optional
+        Columns to check, ``FEATURE_COLUMNS`` by default
+    first_row : int, default 0
+        Number of the first row of ``frame`` in the error report, for
+        files processed in chunks
+
+    Returns
+    -------
+    features : pd.DataFrame
+        ``columns`` in order, float32 for weather and history features (the
+        forest compares float32 values anyway) and nullable UInt8 for flags;
+        cells that are not numbers, or flags other than 0/1, are missing
+    valid : np.ndarray of bool
+        Rows passing every check
+    errors : pd.DataFrame
+        One line per failed check: ``row`` (position in the file, from 0),
+        ``column``, the offending ``value`` as text and the ``error``
+    """
+    columns = list(FEATURE_COLUMNS) if columns is None else list(columns)
+    n_rows = len(frame)
+    valid = np.ones(n_rows, dtype=bool)
+    features = {}
+    failures = []
+
+    def fail(mask, name, raw, message):
+        if mask.any():
+            rows = np.flatnonzero(mask)
+            valid[rows] = False
+            failures.append(pd.DataFrame({
+                "row": rows + first_row,
+                "column": name,
+                "value": raw[rows].astype(str),
+                "error": message,
+            }))
+
+    for name in columns:
+        column = frame[name]
+        if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(
+            column.dtype
+        ):
+            values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            raw = values
+        else:
+            values = pd.to_numeric(column, errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            raw = column.to_numpy(dtype=object)
+        missing = np.isnan(values)
+        if missing.any():
+            unparsed = missing & column.notna().to_numpy()
+            fail(unparsed, name, raw, "not a number")
+            fail(missing & ~unparsed, name, raw, "missing")
+
+        if name in FLAG_COLUMNS:
+            flag = (values == 0) | (values == 1)
+            fail(~missing & ~flag, name, raw, "not 0 or 1")
+            features[name] = pd.arrays.IntegerArray(
+                np.where(flag, values, 0).astype(np.uint8), ~flag
+            )
+        else:
+            low, high = FEATURE_RANGES.get(name, (0.0, np.inf))
+            with np.errstate(invalid="ignore"):
+                outside = (values < low) | (values > high) | np.isinf(values)
+            fail(outside, name, raw, f"outside [{low:g}, {high:g}]")
+            features[name] = values.astype(np.float32)
+
+    if "t2m_min" in features and "t2m_max" in features:
+        with np.errstate(invalid="ignore"):
+            inverted = features["t2m_min"] > features["t2m_max"]
+        fail(inverted, "t2m_min", features["t2m_min"], "above t2m_max")
+
+    errors = (
+        pd.concat(failures, ignore_index=True).sort_values("row", kind="stable", ignore_index=True)
+        if failures else pd.DataFrame({name: [] for name in VALIDATION_COLUMNS})
+    )
+    return pd.DataFrame(features, index=frame.index), valid, errors
+
+
+def quantile_column(q):
+    """
+    Name of the output column holding quantile ``q``.
+
+    Parameters
+    ----------
+    q : float
+        Quantile in [0, 1]
+
+    Returns
+    -------
+    str
+        e.g. ``"predicted_bikes_p10"`` for 0.1
+    """
+    return f"{PREDICTION_COLUMN}_p{q * 100:g}"
+
+
+def detect_format(file):
+    """
+    Infer a batch file format from its name.
+
+    Parameters
+    ----------
+    file : str, Path or file-like
+        Path, or an object with a ``name`` attribute (e.g. a Streamlit upload)
+
+    Returns
+    -------
+    str
+        One of ``BATCH_FORMATS``
+    """
+    name = file if isinstance(file, (str, Path)) else getattr(file, "name", "")
+    suffix = Path(str(name)).suffix.lower()
+    if suffix not in FORMAT_SUFFIXES:
+        raise ValueError(
+            f"Cannot infer the format of {name!r}; use one of "
+            f"{', '.join(sorted(FORMAT_SUFFIXES))} or pass it explicitly"
+        )
+    return FORMAT_SUFFIXES[suffix]
+
+
+def read_head(source, file_format=None, n_rows=5):
+    """
+    Read the first rows of a batch file, e.g. for a preview.
+
+    Parameters
+    ----------
+    source : str, Path or binary file-like
+        Input file; file-like objects are rewound afterwards
+    file_format : {"csv", "parquet", "arrow"}, optional
+        Inferred from the file name when omitted
+    n_rows : int, default 5
+        Number of rows to read
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    file_format = file_format or detect_format(source)
+    start = None if isinstance(source, (str, Path)) else source.tell()
+    try:
+        if file_format == "csv":
+            return pd.read_csv(source, nrows=n_rows)
+        batches = _iter_arrow_batches(source, file_format, n_rows, keep_columns=True)
+        batch, _ = next(batches, (None, None))
+        batches.close()
+        if batch is None:
+            return pd.DataFrame()
+        return batch.slice(0, n_rows).to_pandas()
+    finally:
+        if start is not None:
+            source.seek(start)
+
+
+def read_rows(source, file_format=None, start=0, n_rows=1000):
+    """
+    Read a range of rows of a batch file, e.g. one page of a results table.
+
+    Parquet row groups and Arrow IPC record batches outside the range are
+    skipped without being decoded; a CSV file is scanned up to ``start``.
+
+    Parameters
+    ----------
+    source : str or Path
+        Batch file
+    file_format : {"csv", "parquet", "arrow"}, optional
+        Inferred from the file name when omitted
+    start : int, default 0
+        First row read
+    n_rows : int, default 1000
+        Maximum number of rows read
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by row number in the file
+    """
+    file_format = file_format or detect_format(source)
+    if file_format == "csv":
+        frame = pd.read_csv(source, skiprows=range(1, start + 1), nrows=n_rows)
+    else:
+        pa = _require_pyarrow()
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(source)
+            sizes = [parquet_file.metadata.row_group(i).num_rows
+                     for i in range(parquet_file.num_row_groups)]
+            schema = parquet_file.schema_arrow
+            read = lambda i: parquet_file.read_row_group(i)
+        elif file_format == "arrow":
+            reader = pa.ipc.open_file(pa.memory_map(str(source)))
+            batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+            sizes = [batch.num_rows for batch in batches]
+            schema = reader.schema
+            read = lambda i: pa.Table.from_batches([batches[i]])
+        else:
+            raise ValueError(f"Unknown format {file_format!r}, expected one of {BATCH_FORMATS}")
+        bounds = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+        first = int(np.searchsorted(bounds, start, side="right")) - 1
+        last = int(np.searchsorted(bounds, start + n_rows, side="left"))
+        parts = [read(i) for i in range(max(first, 0), min(last, len(sizes)))]
+        if parts:
+            table = pa.concat_tables(parts).slice(start - bounds[max(first, 0)], n_rows)
+        else:
+            table = schema.empty_table()
+        frame = table.to_pandas()
+    frame.index = pd.RangeIndex(start, start + len(frame))
+    return frame
+
+
+def read_batches(source, file_format=None, columns=None, chunksize=100_000):
+    """
+    Stream some columns of a batch file as DataFrames.
+
+    Parameters
+    ----------
+    source : str, Path or binary file-like
+        Batch file
+    file_format : {"csv", "parquet", "arrow"}, optional
+        Inferred from the file name when omitted
+    columns : list of str, optional
+        Columns read, all by default
+    chunksize : int, default 100_000
+        Rows per CSV or Parquet chunk; Arrow IPC files keep their batches
+
+    Yields
+    ------
+    pd.DataFrame
+    """
+    file_format = file_format or detect_format(source)
+    keep_columns = True if columns is None else list(columns)
+    for batch, _ in _iter_arrow_batches(source, file_format, chunksize, keep_columns):
+        yield batch.to_pandas()
+
+
+def read_features(source, file_format=None, calendar=None):
+    """
+    Read only the feature columns of a batch file.
+
+    Day flags missing from a file with a ``date`` column are derived from it,
+    as ``predict_batch`` does.
+
+    Parameters
+    ----------
+    source : str, Path or binary file-like
+        Input file
+    file_format : {"csv", "parquet", "arrow"}, optional
+        Inferred from the file name when omitted
+    calendar : french_calendar.FrenchCalendar, optional
+        Calendar for the derived day flags, the default calendar when omitted
+
+    Returns
+    -------
+    pd.DataFrame
+        The 9 feature columns, in ``FEATURE_COLUMNS`` order
+    """
+    file_format = file_format or detect_format(source)
+    if file_format == "csv":
+        columns = _feature_projection(read_head(source, "csv", n_rows=0).columns)
+        df = pd.read_csv(source, usecols=columns, dtype=FEATURE_DTYPES)
+    else:
+        pa = _require_pyarrow()
+        batches = [
+            batch for batch, _ in _iter_arrow_batches(source, file_format, None, keep_columns=False)
+        ]
+        df = pa.Table.from_batches(batches).to_pandas()
+    if DATE_COLUMN in df.columns:
+        if calendar is None:
+            from french_calendar import FrenchCalendar
+
+            calendar = FrenchCalendar()
+        flags = calendar.flags(df.pop(DATE_COLUMN))
+        df = df.assign(**{name: flags[name] for name in FLAG_COLUMNS if name not in df.columns})
+    return df[FEATURE_COLUMNS]
+
+
+def _require_pyarrow():
+    """Import pyarrow or explain that it is needed."""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet and Arrow batch files require pyarrow (pip install pyarrow)"
+        ) from None
+    return pyarrow
+
+
+def _is_arrow(table):
+    """True for pyarrow Tables and RecordBatches, without importing pyarrow."""
+    return type(table).__module__.startswith("pyarrow")
+
+
+def _arrow_features(table, columns):
+    """Stack the feature columns of an Arrow table into a float64 array."""
+    X = np.empty((table.num_rows, len(columns)), dtype=np.float64)
+    for position, name in enumerate(columns):
+        X[:, position] = table.column(name).to_numpy(zero_copy_only=False)
+    return X
+
+
+def _iter_arrow_batches(source, file_format, chunksize, keep_columns):
+    """
+    Yield ``(RecordBatch, fraction_done)`` pairs from a batch file.
+
+    ``keep_columns`` is True for every column, False for the feature
+    columns (see ``_feature_projection``), or a list of column names.
+    """
+    pa = _require_pyarrow()
+    columns = None if isinstance(keep_columns, bool) else keep_columns
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        if keep_columns is False:
+            columns = _feature_projection(parquet_file.schema_arrow.names)
+        total = parquet_file.metadata.num_rows
+        done = 0
+        for batch in parquet_file.iter_batches(batch_size=chunksize or 65_536, columns=columns):
+            done += batch.num_rows
+            yield batch, done / total if total else None
+
+    elif file_format == "arrow":
+        if isinstance(source, (str, Path)):
+            source = pa.memory_map(str(source))
+        start = source.tell()
+        try:
+            reader = pa.ipc.open_file(source)
+            n_batches = reader.num_record_batches
+            batches = (reader.get_batch(i) for i in range(n_batches))
+        except pa.ArrowInvalid:
+            # Not the random-access file format: fall back to the stream format
+            source.seek(start)
+            reader = pa.ipc.open_stream(source)
+            n_batches = None
+            batches = iter(reader)
+        if keep_columns is False:
+            columns = _feature_projection(reader.schema.names)
+        for i, batch in enumerate(batches):
+            if columns is not None:
+                batch = batch.select(columns)
+            yield batch, (i + 1) / n_batches if n_batches else None
+
+    elif file_format == "csv":
+        import pyarrow.csv as pa_csv
+
+        handle = open(source, "rb") if isinstance(source, (str, Path)) else source
+        try:
+            if keep_columns is False:
+                columns = _feature_projection(read_head(handle, "csv", n_rows=0).columns)
+            end = _stream_end(handle)
+            reader = pa_csv.open_csv(
+                handle,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={
+                        name: pa.type_for_alias(dtype) for name, dtype in FEATURE_DTYPES.items()
+                    },
+                    include_columns=columns,
+                ),
+            )
+            for batch in reader:
+                yield batch, min(handle.tell() / end, 1.0) if end else None
+        finally:
+            if handle is not source:
+                handle.close()
+
+    else:
+        raise ValueError(f"Unknown format {file_format!r}, expected one of {BATCH_FORMATS}")
+
+
+def _open_arrow_writer(destination, file_format, schema):
+    """Open an incremental Arrow writer for the output format."""
+    pa = _require_pyarrow()
+    if isinstance(destination, Path):
+        destination = str(destination)
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(destination, schema)
+    if file_format == "arrow":
+        return pa.ipc.new_file(destination, schema)
+    import pyarrow.csv as pa_csv
+
+    return pa_csv.CSVWriter(destination, schema)
+
+
+# Predictor owned by a pool worker process, see ``predict_batch_parallel``
+_worker_predictor = None
+
+
+def _init_worker(model_path, engine):
+    """Load the model once per worker process, memory-mapped."""
+    global _worker_predictor
+    _worker_predictor = BikeCountPredictor(model_path, engine=engine, mmap_mode="r")
+    # One process per core already: keep the forest itself single-threaded
+    if _worker_predictor.model is not None and hasattr(_worker_predictor.model, "n_jobs"):
+        _worker_predictor.model.n_jobs = 1
+
+
+def _predict_in_worker(X):
+    """Score one shard in a worker process."""
+    return _worker_predictor._predict_array(X)
+
+
+def _feature_projection(names):
+    """
+    Columns to read from a file with columns ``names`` to get its features.
+
+    The feature columns, plus ``date`` when day flags are missing and must be
+    derived from it; raises the ``"Missing columns"`` ValueError of the pandas
+    path when a feature can be neither read nor derived.
+    """
+    names = list(names)
+    derivable = DATE_COLUMN in names
+    missing_cols = [
+        col for col in FEATURE_COLUMNS
+        if col not in names and not (derivable and col in FLAG_COLUMNS)
+    ]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {', '.join(missing_cols)}")
+    columns = [col for col in FEATURE_COLUMNS if col in names]
+    if len(columns) < len(FEATURE_COLUMNS):
+        columns.append(DATE_COLUMN)
+    return columns
+
+
+def _stream_end(handle):
+    """Return the end offset of a seekable stream, or None."""
+    try:
+        position = handle.tell()
+        end = handle.seek(0, 2)
+        handle.seek(position)
+    except (AttributeError, OSError):
+        return None
+    return end
+
+
+def _prediction_columns(predictions):
+    """Output columns of ``predict_batch``, as name to array."""
+    if isinstance(predictions, pd.DataFrame):
+        return {name: predictions[name].to_numpy() for name in predictions.columns}
+    return {PREDICTION_COLUMN: predictions}
+
+
+def _with_missing(values, valid):
+    """Spread predictions of the valid rows into a nullable integer column."""
+    if valid.all():
+        return values
+    full = np.zeros(len(valid), dtype=np.int64)
+    full[valid] = values
+    return pd.arrays.IntegerArray(full, ~valid)
+
+
+def _check_number(name, value):
+    """Return ``value`` as a finite float or raise a ValueError naming the field."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+    if not np.isfinite(number):
+        raise ValueError(f"{name} must be finite, got {value!r}")
+    return number
+
+
+def _check_quantiles(quantiles):
+    """Return ``quantiles`` as a tuple of floats in [0, 1] or raise a ValueError."""
+    quantiles = tuple(float(q) for q in quantiles)
+    if not quantiles or any(not 0.0 <= q <= 1.0 for q in quantiles):
+        raise ValueError(f"Quantiles must be numbers in [0, 1], got {quantiles!r}")
+    return quantiles
+
+
+def _check_flag(name, value):
+    """Return ``value`` as 0.0/1.0 or raise a ValueError naming the field."""
+    if value in (0, 1):
+        return float(value)
+    raise ValueError(f"{name} must be 0 or 1, got {value!r}")
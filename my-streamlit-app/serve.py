@@ -0,0 +1,301 @@
+"""
+Service HTTP de prédiction, sans interface Streamlit.
+
+A standalone asyncio HTTP/1.1 server wrapping ``BikeCountPredictor``:
+
+- ``POST /predict``: one JSON object with the 9 features,
+  returns ``{"predicted_bikes": int}``
+- ``POST /predict/batch``: ``{"rows": [{...}, ...]}`` (or a bare list),
+  returns ``{"predicted_bikes": [int, ...]}``; rows are checked like batch
+  files and any failure answers 400 with the list of failed checks
+- ``GET /health``
+- ``GET /metrics``: stage timings, throughput and cache counters in the
+  Prometheus text format (stages are recorded with ``--metrics``)
+
+Concurrent single requests are merged into micro-batches: the first request
+opens a window of ``--window-ms`` milliseconds and everything that arrives
+meanwhile (up to ``--max-batch`` rows) is scored by one ``predict_batch`` call.
+
+Run with: python serve.py --model data/bike_count_model.pkl --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import to_prometheus
+from predictor import BikeCountPredictor, validate_features
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """Error answered to the client with the given status code."""
+
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+    def payload(self):
+        """JSON body of the response, with the per-row ``errors`` if any."""
+        if self.errors is None:
+            return {"error": str(self)}
+        return {"error": str(self), "errors": self.errors}
+
+
+class MicroBatcher:
+    """Collect single-row requests and score them together."""
+
+    def __init__(self, predictor, window_ms=2.0, max_batch=1024):
+        """
+        Parameters
+        ----------
+        predictor : BikeCountPredictor
+            Predictor used for every batch
+        window_ms : float, default 2.0
+            How long the first request of a batch waits for others
+        max_batch : int, default 1024
+            Rows that close a batch before the window ends
+        """
+        self.predictor = predictor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        """Start the batching loop on the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """Stop the batching loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, row):
+        """Queue one validated feature row and wait for its prediction."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            X = np.stack([row for row, _ in batch])
+            try:
+                predictions = await loop.run_in_executor(None, self.predictor.predict_batch, X)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), prediction in zip(batch, predictions.tolist()):
+                if not future.done():
+                    future.set_result(prediction)
+
+
+class PredictionServer:
+    """Minimal keep-alive HTTP/1.1 server exposing the prediction endpoints."""
+
+    def __init__(self, predictor, window_ms=2.0, max_batch=1024):
+        self.predictor = predictor
+        self.batcher = MicroBatcher(predictor, window_ms=window_ms, max_batch=max_batch)
+
+    async def serve(self, host, port):
+        """Serve forever on ``host:port``."""
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.close()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, payload = 200, await self._route(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, e.payload()
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            _write_response(writer, e.status, e.payload(), keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == "/health":
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            return {
+                "status": "ok",
+                "batches": self.batcher.batches,
+                "batched_rows": self.batcher.rows,
+            }
+        if path == "/metrics":
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            return to_prometheus(self.predictor.metrics_snapshot())
+        if path not in ("/predict", "/predict/batch"):
+            raise HTTPError(404, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+
+        try:
+            data = json.loads(body or b"null")
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}") from None
+
+        if path == "/predict":
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Expected a JSON object of features")
+            try:
+                row = self.predictor.fill_features(data)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            return {"predicted_bikes": await self.batcher.submit(row)}
+
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise HTTPError(400, 'Expected {"rows": [...]} or a JSON list')
+        if not all(isinstance(row, dict) for row in rows):
+            raise HTTPError(400, "Every row must be a JSON object of features")
+        if not rows:
+            return {"predicted_bikes": []}
+        columns = self.predictor.feature_columns
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        # Same checks as batch files: the whole request is refused with the
+        # list of failed checks, ``row`` being the position in ``rows``
+        features, valid, errors = validate_features(df, columns)
+        if not valid.all():
+            raise HTTPError(400, f"Invalid rows: {int((~valid).sum())} of {len(rows)}",
+                            errors=errors.to_dict("records"))
+        loop = asyncio.get_running_loop()
+        predictions = await loop.run_in_executor(None, self.predictor.predict_batch, features)
+        return {"predicted_bikes": predictions.tolist()}
+
+
+async def _read_request(reader):
+    """Read one request; return None when the client closed the connection."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length header") from None
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length header")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _write_response(writer, status, payload, keep_alive):
+    # Strings are sent as plain text (``/metrics``), anything else as JSON
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload).encode("utf-8")
+        content_type = "application/json"
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve bike count predictions over HTTP.")
+    parser.add_argument(
+        "--model",
+        type=Path,
+        default=Path(__file__).parent / "data" / "bike_count_model.pkl",
+        help="joblib model file or exported bundle directory",
+    )
+    parser.add_argument("--engine", choices=("sklearn", "compiled"), default="compiled")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--cache-size", type=int, default=0)
+    parser.add_argument("--metrics", action="store_true",
+                        help="record per-stage timings, exposed on GET /metrics")
+    args = parser.parse_args()
+
+    predictor = BikeCountPredictor(args.model, engine=args.engine, cache_size=args.cache_size,
+                                   metrics=args.metrics)
+    server = PredictionServer(predictor, window_ms=args.window_ms, max_batch=args.max_batch)
+    print(f"Serving {args.model} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
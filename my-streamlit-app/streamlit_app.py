@@ -4,19 +4,18 @@ Made by Denis Froment, Value Discovery SASU.
 
 Multi-page app with:
 - Documentation page (README with images)
-- Prediction page (single and batch predictions)
+- Prediction page (single, batch and scenario sweep predictions)
 - Bilingual interface (French/English)
 
 Run with: streamlit run streamlit_app.py
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 from pathlib import Path
-from predictor import BikeCountPredictor
 import re
+import hashlib
 import locale
+import tempfile
 
 # Page configuration
 st.set_page_config(
@@ -42,6 +41,53 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# Rows of the scored file shown under the batch tab, per page
+BATCH_PREVIEW_ROWS = 1000
+BATCH_PAGE_SIZES = [100, 1000, 10000]
+
+# Download label, file suffix and MIME type of each batch output format
+OUTPUT_FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", ".arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Swept weather features: translation key of the label, default (start, stop, step)
+SWEEP_FEATURES = {
+    "t2m_max": ("temp_max", (-5.0, 35.0, 0.5)),
+    "t2m_min": ("temp_min", (-10.0, 25.0, 0.5)),
+    "tp_total": ("precip", (0.0, 0.03, 0.001)),
+    "i10fg_max": ("wind_gust", (0.0, 30.0, 0.5)),
+    "sf_max": ("snow_fall", (0.0, 0.2, 0.01)),
+    "sd_total": ("snow_depth", (0.0, 0.5, 0.01)),
+}
+
+# Translation key of the label of each feature
+FEATURE_LABELS = {
+    "t2m_min": "temp_min",
+    "t2m_max": "temp_max",
+    "tp_total": "precip",
+    "sd_total": "snow_depth",
+    "i10fg_max": "wind_gust",
+    "sf_max": "snow_fall",
+    "is_weekend": "weekend",
+    "is_holiday": "holiday",
+    "is_school_vacation": "vacation",
+}
+
+# Single-prediction widgets whose values are the base of a sweep
+SWEEP_BASE_WIDGETS = {
+    "t2m_min": ("temp_min_input", -5.0),
+    "t2m_max": ("temp_max_input", 10.0),
+    "tp_total": ("precip_input", 0.001),
+    "sd_total": ("snowdepth_input", 0.0),
+    "i10fg_max": ("wind_input", 5.0),
+    "sf_max": ("snowfall_input", 0.0),
+    "is_weekend": ("weekend_check", False),
+    "is_holiday": ("holiday_check", False),
+    "is_school_vacation": ("vacation_check", False),
+}
+
 # ==================== INTERNATIONALIZATION ====================
 
 TRANSLATIONS = {
@@ -94,17 +140,75 @@ TRANSLATIONS = {
         "predict_btn": "Prédire",
         "success": "Prédiction réussie!",
         "predicted": "Nombre de vélos prédits",
+        "interval": "Intervalle des arbres (p10 – p90) :",
+        "contrib_title": "Contribution de chaque paramètre (vélos)",
+        "contrib_bias": "Moyenne du modèle :",
         "error": "Erreur lors de la prédiction:",
         "input_summary": "Résumé des paramètres",
         
         # Batch prediction
         "batch_title": "Prédictions par lots",
-        "csv_upload": "Téléchargez un fichier CSV",
-        "csv_help": "Le CSV doit contenir: t2m_min, t2m_max, tp_total, sd_total, i10fg_max, sf_max, is_weekend, is_holiday, is_school_vacation",
+        "csv_upload": "Téléchargez un fichier CSV, Parquet ou Arrow",
+        "csv_help": "Le fichier doit contenir: t2m_min, t2m_max, tp_total, sd_total, i10fg_max, sf_max, is_weekend, is_holiday, is_school_vacation (ou une colonne date à la place des trois derniers)",
         "loaded_rows": "Lignes chargées",
         "missing_columns": "Colonnes manquantes:",
         "csv_error": "Erreur lors de la lecture:",
-        "download_btn": "Télécharger les prédictions (CSV)",
+        "download_btn": "Télécharger les prédictions",
+        "output_format": "Format du fichier de résultats",
+        "batch_progress": "Lignes prédites :",
+        "invalid_rows": "lignes invalides n'ont pas été prédites (valeur manquante, non numérique ou hors des bornes de saisie).",
+        "invalid_download": "Télécharger le rapport d'erreurs (CSV)",
+        "batch_summary": "Synthèse des prédictions",
+        "batch_total": "Total",
+        "batch_mean": "Moyenne par ligne",
+        "batch_min": "Minimum",
+        "batch_max": "Maximum",
+        "batch_daily": "Total prédit par jour",
+        "batch_flag_means": "Prédiction moyenne selon chaque indicateur (0 / 1)",
+        "batch_page_size": "Lignes par page",
+        "batch_page": "Page",
+
+        # Scenario sweep
+        "sweep_tab": "Scénarios",
+        "sweep_help": "Les autres paramètres reprennent les valeurs de l'onglet Prédiction simple.",
+        "sweep_x": "Paramètre balayé",
+        "sweep_start": "Début",
+        "sweep_stop": "Fin",
+        "sweep_step": "Pas",
+        "sweep_series": "Second paramètre (une courbe par valeur)",
+        "sweep_none": "Aucun",
+        "sweep_values": "Valeurs, séparées par des virgules",
+        "sweep_btn": "Calculer la grille",
+        "sweep_points": "Points de la grille",
+        "sweep_download": "Télécharger la grille (CSV)",
+
+        # Debug panel
+        "debug_title": "Débogage : performances",
+        "debug_load": "Chargement du modèle :",
+        "debug_trees": "arbres",
+        "debug_empty": "Aucune prédiction depuis le chargement.",
+        "debug_stage": "Étape",
+        "debug_calls": "Appels",
+        "debug_mean_ms": "Moyenne (ms)",
+        "debug_max_ms": "Max (ms)",
+        "debug_rows_s": "Lignes/s",
+        "debug_cache": "Cache :",
+        "debug_hits": "succès",
+        "debug_misses": "échecs",
+        "debug_entries": "entrées",
+
+        # Drift monitor
+        "drift_title": "Surveillance de dérive",
+        "drift_no_reference": "Pas de distribution de référence : lancez train.py ou drift.py.",
+        "drift_rows": "lignes observées",
+        "drift_ok": "Aucune dérive détectée.",
+        "drift_psi": "distribution décalée (PSI)",
+        "drift_ks": "distribution décalée (KS)",
+        "drift_out_of_range": "valeurs hors de la plage d'entraînement",
+        "drift_anomaly": "résidu anormal",
+        "drift_bias": "biais persistant",
+        "drift_offline": "compteur hors ligne ? jours à zéro :",
+        "actuals_recorded": "Comptages observés transmis à la surveillance :",
         
         # Display helpers
         "temp_range": "Température:",
@@ -169,17 +273,75 @@ TRANSLATIONS = {
         "predict_btn": "Predict",
         "success": "Prediction successful!",
         "predicted": "Predicted bike count",
+        "interval": "Range across trees (p10 – p90):",
+        "contrib_title": "Contribution of each parameter (bikes)",
+        "contrib_bias": "Model average:",
         "error": "Error during prediction:",
         "input_summary": "Parameter summary",
         
         # Batch prediction
         "batch_title": "Batch predictions",
-        "csv_upload": "Upload a CSV file",
-        "csv_help": "CSV must contain: t2m_min, t2m_max, tp_total, sd_total, i10fg_max, sf_max, is_weekend, is_holiday, is_school_vacation",
+        "csv_upload": "Upload a CSV, Parquet or Arrow file",
+        "csv_help": "The file must contain: t2m_min, t2m_max, tp_total, sd_total, i10fg_max, sf_max, is_weekend, is_holiday, is_school_vacation (or a date column instead of the last three)",
         "loaded_rows": "Rows loaded",
         "missing_columns": "Missing columns:",
         "csv_error": "Error reading file:",
-        "download_btn": "Download predictions (CSV)",
+        "download_btn": "Download predictions",
+        "output_format": "Output file format",
+        "batch_progress": "Rows predicted:",
+        "invalid_rows": "invalid rows were not predicted (missing, non-numeric or outside the input bounds).",
+        "invalid_download": "Download the error report (CSV)",
+        "batch_summary": "Prediction summary",
+        "batch_total": "Total",
+        "batch_mean": "Mean per row",
+        "batch_min": "Minimum",
+        "batch_max": "Maximum",
+        "batch_daily": "Total predicted per day",
+        "batch_flag_means": "Mean prediction by flag (0 / 1)",
+        "batch_page_size": "Rows per page",
+        "batch_page": "Page",
+
+        # Scenario sweep
+        "sweep_tab": "Scenarios",
+        "sweep_help": "Other parameters take the values of the Single prediction tab.",
+        "sweep_x": "Swept parameter",
+        "sweep_start": "Start",
+        "sweep_stop": "Stop",
+        "sweep_step": "Step",
+        "sweep_series": "Second parameter (one line per value)",
+        "sweep_none": "None",
+        "sweep_values": "Values, comma separated",
+        "sweep_btn": "Compute grid",
+        "sweep_points": "Grid points",
+        "sweep_download": "Download grid (CSV)",
+
+        # Debug panel
+        "debug_title": "Debug: performance",
+        "debug_load": "Model load:",
+        "debug_trees": "trees",
+        "debug_empty": "No prediction since the model was loaded.",
+        "debug_stage": "Stage",
+        "debug_calls": "Calls",
+        "debug_mean_ms": "Mean (ms)",
+        "debug_max_ms": "Max (ms)",
+        "debug_rows_s": "Rows/s",
+        "debug_cache": "Cache:",
+        "debug_hits": "hits",
+        "debug_misses": "misses",
+        "debug_entries": "entries",
+
+        # Drift monitor
+        "drift_title": "Drift monitor",
+        "drift_no_reference": "No reference distribution: run train.py or drift.py.",
+        "drift_rows": "rows observed",
+        "drift_ok": "No drift detected.",
+        "drift_psi": "distribution shift (PSI)",
+        "drift_ks": "distribution shift (KS)",
+        "drift_out_of_range": "values outside the training range",
+        "drift_anomaly": "anomalous residual",
+        "drift_bias": "persistent bias",
+        "drift_offline": "counter offline? zero days:",
+        "actuals_recorded": "Observed counts sent to the monitor:",
         
         # Display helpers
         "temp_range": "Temperature:",
@@ -201,8 +363,32 @@ TRANSLATIONS = {
 @st.cache_resource
 def load_predictor():
     """Load the model once and cache it."""
-    model_path = Path(__file__).parent / "data" / "bike_count_model.pkl"
-    return BikeCountPredictor(model_path)
+    from predictor import BikeCountPredictor
+    data_dir = Path(__file__).parent / "data"
+    model_path = data_dir / "bike_count_model.pkl"
+    monitor = load_monitor(model_path)
+    # An exported bundle is memory-mapped: fast start, shared between workers
+    bundle_path = data_dir / "bike_count_model.bundle"
+    if bundle_path.exists():
+        return BikeCountPredictor(bundle_path, engine="compiled", cache_size=4096, metrics=True,
+                                  monitor=monitor)
+    return BikeCountPredictor(model_path, cache_size=4096, metrics=True, monitor=monitor)
+
+
+def load_monitor(model_path):
+    """Drift monitor of the model, shared by all sessions; None without a reference."""
+    from drift import DriftMonitor, reference_path
+    path = reference_path(model_path)
+    if not path.exists():
+        return None
+    return DriftMonitor.load(path)
+
+
+@st.cache_resource
+def load_explainer():
+    """Build the explainer of the cached predictor once."""
+    from explain import ForestExplainer
+    return ForestExplainer(load_predictor())
 
 
 @st.cache_data
@@ -239,6 +425,64 @@ def process_markdown_images(content):
     return content
 
 
+# Markdown images of the README: ![alt text](captures/...)
+IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\((captures/[^\)]+)\)')
+# Widest image Streamlit displays; larger ones are resized by st.image on every run
+DOC_IMAGE_WIDTH = 2 * 730
+
+
+def load_doc_image(path):
+    """PNG bytes of a capture, downscaled once to the widest displayed size."""
+    from io import BytesIO
+    from PIL import Image
+
+    image = Image.open(path)
+    if image.width <= DOC_IMAGE_WIDTH and image.format == "PNG":
+        return path.read_bytes()
+    if image.width > DOC_IMAGE_WIDTH:
+        height = int(1.0 * image.height * DOC_IMAGE_WIDTH / image.width)
+        image = image.resize((DOC_IMAGE_WIDTH, height), resample=Image.BILINEAR)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def documentation_plan(lang):
+    """
+    Blocks of the documentation page, built once per language.
+
+    Returns a list of ``(kind, content, caption)`` tuples: ``("markdown", text,
+    None)``, ``("image", png_bytes, alt_text)`` or ``("warning", message, None)``
+    for a missing image; None when the README cannot be found. Reruns only
+    replay the blocks, without reading or resizing the captures again.
+    """
+    readme_content = load_readme(lang)
+    if not readme_content:
+        return None
+    # Process markdown and images for Streamlit compatibility
+    readme_content = process_markdown_images(readme_content)
+
+    # Split content by images: text, alt_text, image_path, text, alt_text, image_path, ...
+    parts = IMAGE_PATTERN.split(readme_content)
+    plan = []
+    for i in range(0, len(parts), 3):
+        if parts[i].strip():
+            plan.append(("markdown", parts[i], None))
+        if i + 2 >= len(parts):
+            break
+        alt_text, image_path = parts[i + 1], parts[i + 2]
+        full_path = Path(__file__).parent / image_path
+        try:
+            if full_path.exists():
+                plan.append(("image", load_doc_image(full_path), alt_text))
+            else:
+                plan.append(("warning", f"Image not found: {image_path}", None))
+        except Exception as e:
+            plan.append(("warning", f"Could not load image {image_path}: {str(e)}", None))
+    return plan
+
+
 def get_text(key, lang):
     """Get translated text by key."""
     if lang not in TRANSLATIONS:
@@ -256,60 +500,329 @@ def format_number(value, lang):
         return f"{int(value):,}"
 
 
+def debug_panel(lang):
+    """Sidebar panel with the predictor's stage timings and cache stats."""
+    import pandas as pd
+    t = lambda key: get_text(key, lang)
+    try:
+        predictor = load_predictor()
+    except Exception:
+        return
+    snapshot = predictor.metrics_snapshot()
+
+    with st.expander(t("debug_title")):
+        gauges = snapshot["gauges"]
+        if "model_load_seconds" in gauges:
+            st.caption(
+                f"{t('debug_load')} {gauges['model_load_seconds']:.2f} s, "
+                f"{gauges['model_trees']} {t('debug_trees')}"
+            )
+        stages = snapshot["stages"]
+        stages = {name: stats for name, stats in stages.items() if name != "load_model"}
+        if stages:
+            table = pd.DataFrame(
+                {
+                    t("debug_calls"): [stats["calls"] for stats in stages.values()],
+                    t("debug_mean_ms"): [
+                        1000 * stats["seconds"] / stats["calls"] for stats in stages.values()
+                    ],
+                    t("debug_max_ms"): [1000 * stats["max_seconds"] for stats in stages.values()],
+                    t("debug_rows_s"): [stats["rows_per_second"] for stats in stages.values()],
+                },
+                index=pd.Index(list(stages), name=t("debug_stage")),
+            )
+            st.dataframe(table.round(2), width="stretch")
+        else:
+            st.caption(t("debug_empty"))
+        cache = snapshot["cache"]
+        if cache:
+            st.caption(
+                f"{t('debug_cache')} {cache['hits']} {t('debug_hits')}, "
+                f"{cache['misses']} {t('debug_misses')}, "
+                f"{cache['size']}/{cache['maxsize']} {t('debug_entries')}"
+            )
+
+
+def drift_panel(lang):
+    """Sidebar flags of the drift monitor."""
+    t = lambda key: get_text(key, lang)
+    try:
+        predictor = load_predictor()
+    except Exception:
+        return
+    st.markdown(f"**{t('drift_title')}**")
+    monitor = predictor.monitor
+    if monitor is None:
+        st.caption(t("drift_no_reference"))
+        return
+    rows = int(monitor.feature_report()["rows"].max())
+    flags = monitor.flags()
+    st.caption(f"{format_number(rows, lang)} {t('drift_rows')}")
+    if not flags:
+        st.caption(f"✅ {t('drift_ok')}")
+    for flag in flags:
+        if flag["kind"] == "offline":
+            detail = f"{int(flag['value'])}"
+        elif flag["kind"] == "out_of_range":
+            detail = f"{flag['value']:.1%}"
+        else:
+            detail = f"{flag['value']:.2f} > {flag['threshold']:.2f}"
+        st.warning(f"{flag['subject']} : {t('drift_' + flag['kind'])} {detail}", icon="⚠️")
+
+
+def record_batch_actuals(monitor, path, file_format):
+    """Send the observed counts of a scored batch file, if it has any, to the monitor."""
+    import pandas as pd
+    from drift import ACTUAL_COLUMN, COUNTER_COLUMN, TOTAL_COUNTER
+    from predictor import PREDICTION_COLUMN, read_head
+    # Only these columns are read, whatever the width of the result file
+    header = read_head(path, file_format, n_rows=1).columns
+    wanted = (ACTUAL_COLUMN, PREDICTION_COLUMN, COUNTER_COLUMN)
+    columns = [name for name in wanted if name in header]
+    if ACTUAL_COLUMN not in columns:
+        return 0
+    if file_format == "csv":
+        scored = pd.read_csv(path, usecols=columns)
+    elif file_format == "parquet":
+        scored = pd.read_parquet(path, columns=columns)
+    else:
+        scored = pd.read_feather(path, columns=columns)
+    counters = scored[COUNTER_COLUMN] if COUNTER_COLUMN in scored.columns else TOTAL_COUNTER
+    monitor.record_actuals(counters, scored[PREDICTION_COLUMN], scored[ACTUAL_COLUMN])
+    return len(scored)
+
+
+def upload_digest(uploaded_file):
+    """Content hash of an upload, computed once per upload."""
+    cached = st.session_state.get("upload_digest")
+    if cached is None or cached[0] != uploaded_file.file_id:
+        digest = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+        cached = st.session_state.upload_digest = (uploaded_file.file_id, digest)
+    return cached[1]
+
+
+def score_batch(uploaded_file, input_format, output_format, batch_key, has_actuals, lang):
+    """Score an upload to a temporary file and keep the result in the session."""
+    import pandas as pd
+    from predictor import DEFAULT_QUANTILES
+    t = lambda key: get_text(key, lang)
+    predictor = load_predictor()
+    progress_bar = st.progress(0.0, text=t("batch_progress"))
+
+    def on_progress(rows_done, fraction):
+        progress_bar.progress(
+            fraction or 0.0,
+            text=f"{t('batch_progress')} {format_number(rows_done, lang)}",
+        )
+
+    # Results are streamed to a file instead of memory. Its directory belongs
+    # to the session: it is removed when replaced, or when the session (or the
+    # server) ends and the TemporaryDirectory is garbage-collected.
+    directory = tempfile.TemporaryDirectory(prefix="bike_batch_")
+    output_path = str(Path(directory.name) / f"predictions{OUTPUT_FORMATS[output_format][1]}")
+    error_reports = []
+    try:
+        n_rows = predictor.predict_file(
+            uploaded_file,
+            output_path,
+            input_format=input_format,
+            output_format=output_format,
+            progress=on_progress,
+            quantiles=DEFAULT_QUANTILES,
+            on_invalid=error_reports.append,
+        )
+        n_actuals = 0
+        if predictor.monitor is not None and has_actuals:
+            n_actuals = record_batch_actuals(predictor.monitor, output_path, output_format)
+        summary = batch_summary(output_path, output_format)
+    except Exception:
+        directory.cleanup()
+        raise
+    finally:
+        progress_bar.empty()
+
+    previous = st.session_state.get("batch_result")
+    if previous is not None:
+        previous["directory"].cleanup()
+    result = {
+        "key": batch_key,
+        "directory": directory,
+        "path": output_path,
+        "format": output_format,
+        "rows": n_rows,
+        "actuals": n_actuals,
+        "errors": pd.concat(error_reports, ignore_index=True) if error_reports else None,
+        "summary": summary,
+    }
+    st.session_state.batch_result = result
+    return result
+
+
+def batch_summary(path, file_format):
+    """Aggregates of a scored batch file, computed in one streaming pass."""
+    import numpy as np
+    import pandas as pd
+    from predictor import DATE_COLUMN, FLAG_COLUMNS, PREDICTION_COLUMN, read_batches, read_head
+    header = read_head(path, file_format, 1).columns
+    flags = [name for name in FLAG_COLUMNS if name in header]
+    has_date = DATE_COLUMN in header
+    columns = [PREDICTION_COLUMN] + flags + ([DATE_COLUMN] if has_date else [])
+
+    rows, total = 0, 0.0
+    low, high = np.inf, -np.inf
+    daily, flag_sums = [], []
+    for chunk in read_batches(path, file_format, columns):
+        predictions = pd.to_numeric(chunk[PREDICTION_COLUMN], errors="coerce")
+        chunk = chunk[predictions.notna()]
+        predictions = predictions[predictions.notna()].astype(np.float64)
+        if chunk.empty:
+            continue
+        rows += len(chunk)
+        total += predictions.sum()
+        low, high = min(low, predictions.min()), max(high, predictions.max())
+        if has_date:
+            daily.append(predictions.groupby(chunk[DATE_COLUMN].astype(str)).sum())
+        for name in flags:
+            grouped = predictions.groupby(chunk[name].astype(np.int64))
+            flag_sums.append(pd.DataFrame({
+                "flag": name, "value": grouped.sum().index, "sum": grouped.sum().to_numpy(),
+                "count": grouped.size().to_numpy(),
+            }))
+
+    summary = {"rows": rows, "total": total, "mean": total / rows if rows else None,
+               "min": low if rows else None, "max": high if rows else None,
+               "daily": None, "flags": None}
+    if daily:
+        totals = pd.concat(daily).groupby(level=0).sum()
+        totals.index = pd.to_datetime(totals.index, errors="coerce")
+        summary["daily"] = totals[totals.index.notna()].sort_index().rename(PREDICTION_COLUMN)
+    if flag_sums:
+        sums = pd.concat(flag_sums).groupby(["flag", "value"])[["sum", "count"]].sum()
+        means = (sums["sum"] / sums["count"]).unstack("value")
+        summary["flags"] = means.reindex([name for name in flags if name in means.index]).round()
+    return summary
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_batch_page(path, file_format, start, n_rows):
+    """One page of a scored batch file; cached, as the file never changes once written."""
+    from predictor import read_rows
+    return read_rows(path, file_format, start, n_rows)
+
+
+def show_batch_result(result, lang):
+    """Summary, paginated table and downloads of a scored batch."""
+    from predictor import DEFAULT_QUANTILES, FEATURE_COLUMNS, PREDICTION_COLUMN, quantile_column
+    t = lambda key: get_text(key, lang)
+    label, suffix, mime = OUTPUT_FORMATS[result["format"]]
+    st.success(t("success"))
+    st.info(f"{t('loaded_rows')}: {format_number(result['rows'], lang)}")
+    if result["actuals"]:
+        st.caption(f"{t('actuals_recorded')} {format_number(result['actuals'], lang)}")
+
+    errors = result["errors"]
+    if errors is not None:
+        n_invalid = errors["row"].nunique()
+        st.warning(f"{format_number(n_invalid, lang)} {t('invalid_rows')}")
+        st.dataframe(errors.head(BATCH_PREVIEW_ROWS), width="stretch")
+        st.download_button(
+            label=t("invalid_download"),
+            data=lambda: errors.to_csv(index=False),
+            file_name="errors.csv",
+            mime="text/csv",
+            on_click="ignore",
+            key="batch_errors_download",
+        )
+
+    summary = result["summary"]
+    if summary["rows"]:
+        st.markdown(f"**{t('batch_summary')}**")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(t("batch_total"), format_number(summary["total"], lang))
+        col2.metric(t("batch_mean"), format_number(summary["mean"], lang))
+        col3.metric(t("batch_min"), format_number(summary["min"], lang))
+        col4.metric(t("batch_max"), format_number(summary["max"], lang))
+        if summary["daily"] is not None and len(summary["daily"]) > 1:
+            st.caption(t("batch_daily"))
+            st.line_chart(summary["daily"])
+        if summary["flags"] is not None:
+            st.caption(t("batch_flag_means"))
+            st.dataframe(summary["flags"], width="stretch")
+
+    # Only the page shown is read from the results file
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox(t("batch_page_size"), BATCH_PAGE_SIZES,
+                                 index=BATCH_PAGE_SIZES.index(BATCH_PREVIEW_ROWS),
+                                 key="batch_page_size")
+    n_pages = max(-(-result["rows"] // page_size), 1)
+    with col2:
+        page = st.number_input(f"{t('batch_page')} (1 - {n_pages})", min_value=1,
+                               max_value=n_pages, value=1, step=1,
+                               key=f"batch_page_{result['path']}_{page_size}")
+    page_rows = load_batch_page(result["path"], result["format"], (page - 1) * page_size, page_size)
+    columns = [PREDICTION_COLUMN] + [quantile_column(q) for q in DEFAULT_QUANTILES] + FEATURE_COLUMNS
+    st.dataframe(page_rows[[name for name in columns if name in page_rows.columns]],
+                 width="stretch")
+
+    # Read from disk only when clicked, outside the script run
+    st.download_button(
+        label=f"{t('download_btn')} ({label})",
+        data=Path(result["path"]).read_bytes,
+        file_name=f"predictions{suffix}",
+        mime=mime,
+        on_click="ignore",
+        width="stretch",
+        key="batch_download",
+    )
+
+
 def page_documentation(lang):
     """Documentation page with README and images."""
     t = lambda key: get_text(key, lang)
     
-    readme_content = load_readme(lang)
-    if readme_content:
-        # Process markdown and images for Streamlit compatibility
-        readme_content = process_markdown_images(readme_content)
-        
-        # Split content by images and render
-        import re
-        
-        # Pattern to find markdown images
-        pattern = r'!\[(.*?)\]\((captures/[^\)]+)\)'
-        parts = re.split(pattern, readme_content)
-        
-        # Render parts alternately (text, alt_text, image_path, text, alt_text, image_path, ...)
-        i = 0
-        while i < len(parts):
-            if i % 3 == 0:
-                # Text part
-                if parts[i].strip():
-                    st.markdown(parts[i])
-            else:
-                # Image part (alt_text is at i, path is at i+1)
-                if i + 1 < len(parts):
-                    alt_text = parts[i]
-                    image_path = parts[i + 1]
-                    
-                    # Try to load and display the image
-                    try:
-                        full_path = Path(__file__).parent / image_path
-                        if full_path.exists():
-                            st.image(str(full_path), caption=alt_text, use_column_width=True)
-                        else:
-                            st.warning(f"Image not found: {image_path}")
-                    except Exception as e:
-                        st.warning(f"Could not load image {image_path}: {str(e)}")
-                i += 1
-            i += 1
-    else:
+    plan = documentation_plan(lang)
+    if plan is None:
         st.error(t("readme_error"))
         st.info(f"README_{lang}.md should be located in: `my-streamlit-app/README_{lang}.md`")
+        return
+
+    for kind, content, caption in plan:
+        if kind == "markdown":
+            st.markdown(content)
+        elif kind == "image":
+            st.image(content, caption=caption, width="stretch")
+        else:
+            st.warning(content)
 
 
 def page_prediction(lang):
     """Prediction page with single and batch predictions."""
+    import pandas as pd
+    from drift import ACTUAL_COLUMN
+    from explain import BIAS_COLUMN
+    from predictor import (
+        BATCH_FORMATS,
+        DATE_COLUMN,
+        DEFAULT_QUANTILES,
+        FEATURE_COLUMNS,
+        FLAG_COLUMNS,
+        FORMAT_SUFFIXES,
+        PREDICTION_COLUMN,
+        detect_format,
+        quantile_column,
+        read_head,
+    )
+    from sweep import grid_values, sweep
     t = lambda key: get_text(key, lang)
     
     st.title(t("pred_title"))
     st.markdown(t("pred_subtitle"))
     
     # Create tabs for single and batch
-    tab_single, tab_batch = st.tabs([t("single_pred"), t("batch_pred")])
+    tab_single, tab_batch, tab_sweep = st.tabs(
+        [t("single_pred"), t("batch_pred"), t("sweep_tab")]
+    )
     
     # ==================== SINGLE PREDICTION ====================
     with tab_single:
@@ -448,20 +961,24 @@ def page_prediction(lang):
         st.divider()
 
         # Predict button
-        if st.button(t("predict_btn"), use_container_width=True, type="primary", key="single_pred_btn"):
+        if st.button(t("predict_btn"), width="stretch", type="primary", key="single_pred_btn"):
             try:
                 predictor = load_predictor()
-                prediction = predictor.predict(
-                    t2m_min=t2m_min,
-                    t2m_max=t2m_max,
-                    tp_total=tp_total,
-                    sd_total=sd_total,
-                    i10fg_max=i10fg_max,
-                    sf_max=sf_max,
-                    is_weekend=int(is_weekend),
-                    is_holiday=int(is_holiday),
-                    is_school_vacation=int(is_school_vacation),
-                )
+                inputs = {
+                    "t2m_min": t2m_min,
+                    "t2m_max": t2m_max,
+                    "tp_total": tp_total,
+                    "sd_total": sd_total,
+                    "i10fg_max": i10fg_max,
+                    "sf_max": sf_max,
+                    "is_weekend": int(is_weekend),
+                    "is_holiday": int(is_holiday),
+                    "is_school_vacation": int(is_school_vacation),
+                }
+                result = predictor.predict(**inputs, quantiles=DEFAULT_QUANTILES)
+                prediction = result[PREDICTION_COLUMN]
+                low = result[quantile_column(DEFAULT_QUANTILES[0])]
+                high = result[quantile_column(DEFAULT_QUANTILES[-1])]
 
                 st.success(t("success"))
                 
@@ -471,6 +988,20 @@ def page_prediction(lang):
                         label=t("predicted"),
                         value=format_number(prediction, lang),
                     )
+                    st.caption(
+                        f"{t('interval')} {format_number(low, lang)} – {format_number(high, lang)}"
+                    )
+
+                    explained = load_explainer().contributions(
+                        predictor.fill_features(inputs)
+                    ).iloc[0]
+                    contributions = pd.Series(
+                        {t(FEATURE_LABELS[name]): explained[name] for name in FEATURE_COLUMNS},
+                        name=t("contrib_title"),
+                    )
+                    st.markdown(f"**{t('contrib_title')}**")
+                    st.bar_chart(contributions)
+                    st.caption(f"{t('contrib_bias')} {format_number(explained[BIAS_COLUMN], lang)}")
 
                 with col2:
                     temp_str = f"{t('temp_range')} {t2m_min}°C {t('to')} {t2m_max}°C"
@@ -504,60 +1035,132 @@ def page_prediction(lang):
 
         uploaded_file = st.file_uploader(
             t("csv_upload"),
-            type="csv",
+            type=sorted(suffix.lstrip(".") for suffix in FORMAT_SUFFIXES),
             help=t("csv_help"),
         )
 
         if uploaded_file is not None:
             try:
-                df = pd.read_csv(uploaded_file)
-
-                st.info(f"{t('loaded_rows')}: {len(df)}")
-                st.dataframe(df.head(), use_container_width=True)
-
-                required_cols = [
-                    "t2m_min",
-                    "t2m_max",
-                    "tp_total",
-                    "sd_total",
-                    "i10fg_max",
-                    "sf_max",
-                    "is_weekend",
-                    "is_holiday",
-                    "is_school_vacation",
+                input_format = detect_format(uploaded_file)
+                preview = read_head(uploaded_file, input_format)
+
+                st.dataframe(preview, width="stretch")
+
+                required_cols = FEATURE_COLUMNS
+                # Day flags can be derived from a date column
+                derivable = FLAG_COLUMNS if DATE_COLUMN in preview.columns else []
+                missing_cols = [
+                    col for col in required_cols
+                    if col not in preview.columns and col not in derivable
                 ]
-                missing_cols = [col for col in required_cols if col not in df.columns]
 
                 if missing_cols:
                     st.error(f"{t('missing_columns')} {', '.join(missing_cols)}")
                 else:
-                    if st.button(t("predict_btn"), use_container_width=True, type="primary", key="batch_pred_btn"):
-                        try:
-                            predictor = load_predictor()
-                            predictions = predictor.predict_batch(df[required_cols])
-                            df["predicted_bikes"] = predictions
-
-                            st.success(t("success"))
-                            st.dataframe(
-                                df[["predicted_bikes"] + required_cols],
-                                use_container_width=True,
-                            )
-
-                            csv = df.to_csv(index=False)
-                            st.download_button(
-                                label=t("download_btn"),
-                                data=csv,
-                                file_name="predictions.csv",
-                                mime="text/csv",
-                                use_container_width=True,
-                            )
-
-                        except Exception as e:
-                            st.error(f"{t('error')} {str(e)}")
+                    output_format = st.selectbox(
+                        t("output_format"),
+                        BATCH_FORMATS,
+                        index=BATCH_FORMATS.index(input_format),
+                        format_func=lambda file_format: OUTPUT_FORMATS[file_format][0],
+                        key="batch_output_format",
+                    )
+                    # Scored results stay in the session until the upload or format changes
+                    batch_key = (upload_digest(uploaded_file), output_format)
+                    result = st.session_state.get("batch_result")
+                    if result is not None and result["key"] != batch_key:
+                        result = None
+
+                    if st.button(t("predict_btn"), width="stretch", type="primary", key="batch_pred_btn"):
+                        if result is None:
+                            try:
+                                result = score_batch(
+                                    uploaded_file, input_format, output_format, batch_key,
+                                    ACTUAL_COLUMN in preview.columns, lang,
+                                )
+                            except Exception as e:
+                                st.error(f"{t('error')} {str(e)}")
+
+                    if result is not None:
+                        show_batch_result(result, lang)
 
             except Exception as e:
                 st.error(f"{t('csv_error')} {str(e)}")
 
+    # ==================== SCENARIO SWEEP ====================
+    with tab_sweep:
+        st.subheader(t("sweep_tab"))
+        st.caption(t("sweep_help"))
+
+        x_feature = st.selectbox(
+            t("sweep_x"),
+            list(SWEEP_FEATURES),
+            format_func=lambda name: t(SWEEP_FEATURES[name][0]),
+            key="sweep_x_feature",
+        )
+        start, stop, step = SWEEP_FEATURES[x_feature][1]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            x_start = st.number_input(t("sweep_start"), value=start, step=step,
+                                      format="%g", key=f"sweep_start_{x_feature}")
+        with col2:
+            x_stop = st.number_input(t("sweep_stop"), value=stop, step=step,
+                                     format="%g", key=f"sweep_stop_{x_feature}")
+        with col3:
+            x_step = st.number_input(t("sweep_step"), value=step, min_value=step / 100,
+                                     step=step, format="%g", key=f"sweep_step_{x_feature}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            series_feature = st.selectbox(
+                t("sweep_series"),
+                [None] + [name for name in SWEEP_FEATURES if name != x_feature],
+                format_func=lambda name: t("sweep_none") if name is None
+                else t(SWEEP_FEATURES[name][0]),
+                key="sweep_series_feature",
+            )
+        with col2:
+            series_text = st.text_input(
+                t("sweep_values"),
+                value="0, 0.005, 0.01" if series_feature == "tp_total" else "",
+                disabled=series_feature is None,
+                key=f"sweep_values_{series_feature}",
+            )
+
+        if st.button(t("sweep_btn"), width="stretch", type="primary", key="sweep_btn"):
+            try:
+                predictor = load_predictor()
+                ranges = {x_feature: grid_values(x_start, x_stop, x_step)}
+                if series_feature is not None:
+                    ranges[series_feature] = [
+                        float(value) for value in series_text.split(",") if value.strip()
+                    ]
+                base = {
+                    name: float(st.session_state.get(key, default))
+                    for name, (key, default) in SWEEP_BASE_WIDGETS.items()
+                }
+                grid = sweep(predictor, ranges, base)
+
+                st.info(f"{t('sweep_points')}: {format_number(len(grid), lang)}")
+                if series_feature is None:
+                    chart = grid.set_index(x_feature)[PREDICTION_COLUMN]
+                else:
+                    chart = grid.pivot(
+                        index=x_feature, columns=series_feature, values=PREDICTION_COLUMN
+                    )
+                    chart.columns = [f"{series_feature} = {value:g}" for value in chart.columns]
+                st.line_chart(chart)
+                st.dataframe(grid, width="stretch")
+                st.download_button(
+                    label=t("sweep_download"),
+                    data=grid.to_csv(index=False),
+                    file_name="scenarios.csv",
+                    mime="text/csv",
+                    width="stretch",
+                )
+
+            except Exception as e:
+                st.error(f"{t('error')} {str(e)}")
+
 
 def main():
     """Main application with page navigation."""
@@ -580,7 +1183,7 @@ def main():
         with col1:
             if st.button(
                 get_text("page_doc", st.session_state.lang),
-                use_container_width=True,
+                width="stretch",
                 type="primary",
                 key="btn_doc"
             ):
@@ -589,13 +1192,15 @@ def main():
         with col2:
             if st.button(
                 get_text("page_pred", st.session_state.lang),
-                use_container_width=True,
+                width="stretch",
                 type="primary",
                 key="btn_pred"
             ):
                 st.session_state.page = "pred"
         
         st.markdown("---")
+        # Filled after the page runs, so it includes this run's predictions
+        debug_slot = st.empty()
         st.caption(get_text("footer", st.session_state.lang))
 
     # ==================== TOP RIGHT LANGUAGE SELECTION ====================
@@ -620,6 +1225,9 @@ def main():
         page_documentation(st.session_state.lang)
     else:
         page_prediction(st.session_state.lang)
+        with debug_slot.container():
+            drift_panel(st.session_state.lang)
+            debug_panel(st.session_state.lang)
 
 
 if __name__ == "__main__":
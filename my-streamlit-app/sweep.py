@@ -0,0 +1,157 @@
+"""
+Balayage de scénarios : grille de sensibilité sur les features du modèle.
+
+Builds the Cartesian grid of any subset of the 9 features (the others held
+at base values) and scores it in one batched call. Before scoring, each swept
+axis is collapsed to one representative value per interval between the
+forest's split thresholds for that feature: values in the same interval take
+the same path through every tree, so only the distinct combinations are
+evaluated and the predictions are broadcast back to the full grid.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from predictor import FEATURE_COLUMNS, FLAG_COLUMNS, PREDICTION_COLUMN
+
+# Largest grid accepted by ``sweep``
+MAX_GRID_POINTS = 5_000_000
+
+
+def grid_values(start, stop, step):
+    """
+    Evenly spaced values from ``start`` to ``stop`` inclusive.
+
+    Parameters
+    ----------
+    start, stop : float
+        First and last values
+    step : float
+        Positive spacing
+
+    Returns
+    -------
+    np.ndarray of float64
+        Values rounded to 10 decimals, so e.g. 0.1 steps stay exact
+    """
+    if not step > 0:
+        raise ValueError(f"step must be positive, got {step!r}")
+    if stop < start:
+        raise ValueError(f"stop ({stop}) is lower than start ({start})")
+    n_values = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return np.round(start + step * np.arange(n_values), 10)
+
+
+def sweep(predictor, ranges, base=None, quantiles=None):
+    """
+    Score every combination of the swept feature values.
+
+    Parameters
+    ----------
+    predictor : BikeCountPredictor
+        Model to evaluate
+    ranges : mapping
+        Feature name to the values to sweep (see ``grid_values``), in the
+        order of the grid axes; the first feature varies slowest
+    base : mapping, optional
+        Values of the features that are not swept
+    quantiles : sequence of float, optional
+        Also return these quantiles of the per-tree outputs, see
+        ``BikeCountPredictor.predict_batch``
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per grid point: the swept features followed by
+        ``predicted_bikes`` (and the quantile columns)
+
+    Raises
+    ------
+    ValueError
+        If a feature is unknown, a base value is missing or invalid, a swept
+        value is not allowed, or the grid exceeds ``MAX_GRID_POINTS``
+    """
+    names = list(ranges)
+    unknown = [name for name in names if name not in FEATURE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)}")
+    if not names:
+        raise ValueError("Nothing to sweep: ranges is empty")
+    axes = [np.asarray(ranges[name], dtype=np.float64).ravel() for name in names]
+    for name, values in zip(names, axes):
+        if len(values) == 0:
+            raise ValueError(f"No values to sweep for {name}")
+        if not np.isfinite(values).all():
+            raise ValueError(f"{name} values must be finite")
+        if name in FLAG_COLUMNS and not np.isin(values, (0.0, 1.0)).all():
+            raise ValueError(f"{name} values must be 0 or 1")
+    shape = tuple(len(values) for values in axes)
+    n_points = math.prod(shape)
+    if n_points > MAX_GRID_POINTS:
+        raise ValueError(f"Grid of {n_points:,} points exceeds {MAX_GRID_POINTS:,}")
+
+    # Validates the base values; swept features take their first value
+    values = dict(base or {})
+    values.update({name: axis[0] for name, axis in zip(names, axes)})
+    base_row = predictor.fill_features(values)
+
+    representatives, inverses = zip(
+        *(collapse_values(predictor, name, axis) for name, axis in zip(names, axes))
+    )
+    reduced_shape = tuple(len(values) for values in representatives)
+
+    columns = predictor.feature_columns
+    X = np.tile(base_row, (math.prod(reduced_shape), 1))
+    for position, (name, values) in enumerate(zip(names, representatives)):
+        X[:, columns.index(name)] = _along_axis(values, position, reduced_shape)
+    # Synthetic grid: kept out of the drift monitor
+    scored = predictor.predict_batch(X, quantiles, observe=False)
+    if quantiles is None:
+        scored = pd.DataFrame({PREDICTION_COLUMN: scored})
+
+    # Map every grid point to its reduced-grid row
+    rows = np.ravel_multi_index(np.ix_(*inverses), reduced_shape).ravel()
+    result = {name: _along_axis(axis, position, shape) for position, (name, axis) in
+              enumerate(zip(names, axes))}
+    for name in scored.columns:
+        result[name] = scored[name].to_numpy()[rows]
+    return pd.DataFrame(result)
+
+
+def collapse_values(predictor, name, values):
+    """
+    Keep one value per interval between the forest's thresholds for a feature.
+
+    Parameters
+    ----------
+    predictor : BikeCountPredictor
+        Model whose split thresholds are used
+    name : str
+        Feature of the values
+    values : np.ndarray
+        Candidate values of the feature
+
+    Returns
+    -------
+    representatives : np.ndarray
+        One of ``values`` per distinct interval, by increasing interval
+    inverse : np.ndarray of int
+        Position in ``representatives`` of each of ``values``
+    """
+    # Features are compared as float32 against the thresholds, like scikit-learn does
+    bins = np.searchsorted(
+        predictor.split_thresholds()[name],
+        np.asarray(values).astype(np.float32).astype(np.float64),
+        side="left",
+    )
+    _, first, inverse = np.unique(bins, return_index=True, return_inverse=True)
+    return np.asarray(values)[first], inverse.ravel()
+
+
+def _along_axis(values, axis, shape):
+    """Flatten ``values`` broadcast along ``axis`` of a C-ordered grid."""
+    view = [1] * len(shape)
+    view[axis] = len(values)
+    return np.broadcast_to(values.reshape(view), shape).ravel()
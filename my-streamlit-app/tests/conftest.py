@@ -0,0 +1,43 @@
+"""
+Fixtures partagées des tests : une petite forêt synthétique et ses données.
+"""
+
+import sys
+from pathlib import Path
+
+import joblib
+import pytest
+
+# The app's modules are flat files next to this directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import make_features, make_model  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def forest():
+    """Small RandomForestRegressor fitted on synthetic daily features."""
+    model = make_model(n_estimators=12, n_train=3000, seed=0)
+    # Threads add the trees in completion order: keep predict deterministic
+    model.n_jobs = 1
+    return model
+
+
+@pytest.fixture(scope="session")
+def train_features():
+    """The training rows of ``forest``."""
+    return make_features(3000, seed=0)
+
+
+@pytest.fixture(scope="session")
+def features():
+    """Rows the forest was not trained on."""
+    return make_features(2000, seed=1)
+
+
+@pytest.fixture(scope="session")
+def model_path(forest, tmp_path_factory):
+    """``forest`` dumped with joblib, as ``BikeCountPredictor`` loads it."""
+    path = tmp_path_factory.mktemp("model") / "bike_count_model.pkl"
+    joblib.dump(forest, path)
+    return path
@@ -0,0 +1,64 @@
+"""
+Tests du backtest : cache des plis sur disque.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import FixedModel, FoldCache, backtest, weather_regime
+
+ORIGINS = np.array(["2023-03-01", "2023-04-01"], dtype="datetime64[D]")
+
+
+@pytest.fixture
+def history(features):
+    """120 days of one counter, with the columns of ``load_history``."""
+    frame = features.head(120).reset_index(drop=True)
+    days = pd.date_range("2023-01-01", periods=len(frame)).to_numpy().astype("datetime64[s]")
+    frame.insert(0, "date", days)
+    frame.insert(1, "counter_id", "total")
+    frame["season"] = "winter"
+    frame["regime"] = weather_regime(frame)
+    frame["bike_count"] = np.arange(len(frame), dtype=np.float64)
+    return frame
+
+
+def test_cached_folds_equal_fresh_folds(model_path, history, tmp_path):
+    cache = FoldCache(tmp_path / "folds")
+    fresh = backtest(history, [FixedModel(model_path)], ORIGINS, cache=cache, jobs=1)
+    cached = backtest(history, [FixedModel(model_path)], ORIGINS, cache=cache, jobs=1)
+
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cached.equals(fresh)
+
+
+def test_changed_rows_only_recompute_their_fold(model_path, history, tmp_path):
+    cache = FoldCache(tmp_path / "folds")
+    backtest(history, [FixedModel(model_path)], ORIGINS, cache=cache, jobs=1)
+    changed = history.copy()
+    changed.loc[changed["date"] == np.datetime64("2023-04-10"), "t2m_max"] += 5.0
+
+    result = backtest(changed, [FixedModel(model_path)], ORIGINS, cache=cache, jobs=1)
+
+    assert (cache.hits, cache.misses) == (1, 3)
+    # The stale version of the recomputed fold is replaced, not kept
+    assert len(list((tmp_path / "folds").rglob("*.parquet"))) == 2
+    fresh = backtest(changed, [FixedModel(model_path)], ORIGINS, jobs=1)
+    assert result.equals(fresh)
+
+
+def test_new_model_file_recomputes_every_fold(model_path, history, tmp_path):
+    model = tmp_path / model_path.name
+    shutil.copyfile(model_path, model)
+    cache = FoldCache(tmp_path / "folds")
+    backtest(history, [FixedModel(model)], ORIGINS, cache=cache, jobs=1)
+    stat = model.stat()
+    os.utime(model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    backtest(history, [FixedModel(model)], ORIGINS, cache=cache, jobs=1)
+
+    assert (cache.hits, cache.misses) == (0, 4)
@@ -0,0 +1,62 @@
+"""
+Tests des bundles compacts et de l'élagage.
+"""
+
+import numpy as np
+import pytest
+
+from forest_engine import CompactForest, CompiledForest
+from predictor import BikeCountPredictor
+
+
+@pytest.mark.parametrize("thresholds", ["float32", "binned"])
+def test_compact_bundle_matches_float64_forest(forest, train_features, tmp_path, thresholds):
+    compiled = CompiledForest.from_sklearn(forest)
+    CompactForest.from_forest(compiled, thresholds=thresholds).save(tmp_path / "bundle")
+    predictor = BikeCountPredictor(tmp_path / "bundle", engine="compiled")
+    assert isinstance(predictor.compiled, CompactForest)
+
+    X = train_features.to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(predictor.predict_raw(X), forest.predict(train_features))
+    np.testing.assert_array_equal(predictor.apply(X), compiled.apply(X))
+
+
+def test_float32_values_stay_close(forest, train_features):
+    compact = CompactForest.from_forest(
+        CompiledForest.from_sklearn(forest), value_dtype=np.float32
+    )
+    np.testing.assert_allclose(
+        compact.predict(train_features.to_numpy(dtype=np.float64)),
+        forest.predict(train_features),
+        rtol=1e-6,
+    )
+
+
+def _node_depths(tree):
+    """Depth of every node of a fitted scikit-learn tree."""
+    depth = np.zeros(tree.node_count, dtype=np.int64)
+    for node in range(tree.node_count):
+        for child in (tree.children_left[node], tree.children_right[node]):
+            if child >= 0:
+                depth[child] = depth[node] + 1
+    return depth
+
+
+def test_prune_keeps_first_trees_cut_at_depth(forest, train_features):
+    n_trees, max_depth = 5, 4
+    pruned = CompiledForest.from_sklearn(forest).prune(n_trees=n_trees, max_depth=max_depth)
+    assert pruned.n_trees == n_trees
+
+    # Each kept tree outputs the value of the deepest node of the row's path
+    # at depth max_depth or less
+    expected = np.empty((len(train_features), n_trees))
+    for t, estimator in enumerate(forest.estimators_[:n_trees]):
+        tree = estimator.tree_
+        depth = _node_depths(tree)
+        path = estimator.decision_path(train_features.to_numpy(dtype=np.float32)).tocsr()
+        for row in range(len(train_features)):
+            nodes = path.indices[path.indptr[row]:path.indptr[row + 1]]
+            nodes = nodes[depth[nodes] <= max_depth]
+            expected[row, t] = tree.value[nodes[np.argmax(depth[nodes])], 0, 0]
+    X = train_features.to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(pruned.tree_outputs(X), expected)
@@ -0,0 +1,59 @@
+"""
+Tests de la surveillance de dérive : histogrammes, PSI et alertes.
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmarks.synthetic import make_target
+from drift import DriftMonitor, Histogram, psi
+from predictor import BikeCountPredictor
+
+
+def test_same_distribution_raises_no_flag(train_features, features):
+    monitor = DriftMonitor.from_frame(train_features)
+    monitor.observe(features.to_numpy(dtype=np.float64))
+    assert monitor.flags() == []
+    assert (monitor.feature_report()["rows"] == len(features)).all()
+
+
+def test_shifted_feature_is_flagged(train_features, features):
+    monitor = DriftMonitor.from_frame(train_features)
+    shifted = features.copy()
+    shifted["t2m_max"] += 15.0
+    monitor.observe(shifted.to_numpy(dtype=np.float64))
+    flagged = {(flag["subject"], flag["kind"]) for flag in monitor.flags()}
+    assert ("t2m_max", "psi") in flagged
+    assert ("t2m_max", "out_of_range") in flagged
+    assert {subject for subject, _ in flagged} == {"t2m_max"}
+
+
+def test_psi_is_zero_for_identical_histograms():
+    edges = np.array([0.0, 1.0, 2.0])
+    values = np.array([-1.0, 0.5, 1.5, 2.5, 0.5])
+    expected, actual = Histogram(edges), Histogram(edges)
+    expected.update(values)
+    actual.update(values, weight=3.0)
+    assert psi(expected, actual) == 0.0
+
+
+def test_predictor_observes_in_model_column_order(train_features, features, tmp_path):
+    # A model fitted on the same features in reverse column order
+    permuted = train_features[train_features.columns[::-1]]
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0)
+    model.fit(permuted, make_target(train_features))
+    joblib.dump(model, tmp_path / "permuted.pkl")
+
+    expected = DriftMonitor.from_frame(train_features)
+    expected.observe(features.to_numpy(dtype=np.float64))
+    for engine in ("sklearn", "compiled"):
+        monitor = DriftMonitor.from_frame(train_features)
+        predictor = BikeCountPredictor(tmp_path / "permuted.pkl", engine=engine,
+                                       monitor=monitor)
+        assert predictor.feature_columns != list(features.columns)
+        predictor.predict_batch(features)
+        pd.testing.assert_frame_equal(monitor.feature_report(), expected.feature_report())
+        predictor.predict(**features.iloc[0].to_dict())
+        assert (monitor.feature_report()["rows"] == len(features) + 1).all()
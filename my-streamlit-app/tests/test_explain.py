@@ -0,0 +1,25 @@
+"""
+Tests des explications : le biais et les contributions redonnent la prédiction.
+"""
+
+import numpy as np
+import pytest
+
+from explain import BIAS_COLUMN, ForestExplainer
+from predictor import DEFAULT_QUANTILES, PREDICTION_COLUMN, BikeCountPredictor
+
+
+@pytest.mark.parametrize("engine", ["sklearn", "compiled"])
+def test_contributions_add_up_to_the_displayed_prediction(model_path, features, engine):
+    # Configured like the app: cached predictor, single predict with quantiles
+    predictor = BikeCountPredictor(model_path, engine=engine, cache_size=64)
+    explainer = ForestExplainer(predictor)
+    for values in features.head(20).to_dict("records"):
+        explained = explainer.contributions(predictor.fill_features(values)).iloc[0]
+        total = explained[BIAS_COLUMN] + explained[predictor.feature_columns].sum()
+        for _ in range(2):  # computed, then served by the cache
+            shown = predictor.predict(**values, quantiles=DEFAULT_QUANTILES)
+            assert shown[PREDICTION_COLUMN] == round(total)
+        np.testing.assert_allclose(
+            total, predictor.predict_raw(predictor.fill_features(values)[None])[0], rtol=1e-12
+        )
@@ -0,0 +1,99 @@
+"""
+Tests des prévisions : modèles refusés, fournisseurs météo et cache disque.
+"""
+
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast import FileWeatherProvider, WeatherCache, WeatherProvider, forecast
+from lag_features import LAG_COLUMNS
+from predictor import FEATURE_COLUMNS
+
+CELL = (47.5, 0.75)
+DAYS = np.arange(np.datetime64("2024-06-01"), np.datetime64("2024-06-04"))
+
+
+@pytest.fixture
+def provider(tmp_path):
+    """Three days of hourly weather, served from a Parquet file."""
+    times = pd.date_range("2024-06-01", periods=72, freq="h", tz="UTC")
+    hourly = pd.DataFrame({
+        "time": times,
+        "t2m": np.linspace(285.0, 295.0, len(times)),
+        "tp": 0.0,
+        "sd": 0.0,
+        "i10fg": 5.0,
+        "sf": 0.0,
+    })
+    hourly.to_parquet(tmp_path / "hourly.parquet", index=False)
+    return FileWeatherProvider(tmp_path / "hourly.parquet")
+
+
+def _age(cache, seconds):
+    """Make every cache entry ``seconds`` old."""
+    then = time.time() - seconds
+    for path in cache.directory.glob("*/*/*.npy"):
+        os.utime(path, (then, then))
+
+
+def test_fresh_entries_are_not_fetched_again(provider, tmp_path):
+    cache = WeatherCache(tmp_path / "cache", ttl=3600)
+    first = cache.hourly(provider, CELL, DAYS)
+    second = cache.hourly(provider, CELL, DAYS)
+
+    assert provider.requests == 1
+    assert (cache.misses, cache.hits) == (15, 15)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_expired_entries_are_fetched_again(provider, tmp_path):
+    cache = WeatherCache(tmp_path / "cache", ttl=3600)
+    cache.hourly(provider, CELL, DAYS)
+    _age(cache, 7200)
+
+    cache.hourly(provider, CELL, DAYS)
+
+    assert provider.requests == 2
+    assert (cache.misses, cache.hits) == (30, 0)
+
+
+def test_evict_deletes_expired_entries_only(provider, tmp_path):
+    cache = WeatherCache(tmp_path / "cache", ttl=3600)
+    cache.hourly(provider, CELL, DAYS[:1])
+    _age(cache, 7200)
+    cache.hourly(provider, CELL, DAYS[1:])
+
+    assert cache.evict() == 5
+    assert len(list(cache.directory.glob("*/*/*.npy"))) == 10
+
+
+def test_entries_without_ttl_never_expire(provider, tmp_path):
+    cache = WeatherCache(tmp_path / "cache", ttl=None)
+    cache.hourly(provider, CELL, DAYS)
+    _age(cache, 365 * 86400)
+
+    cache.hourly(provider, CELL, DAYS)
+
+    assert provider.requests == 1
+    assert cache.evict() == 0
+
+
+@pytest.mark.parametrize("history_column", LAG_COLUMNS)
+def test_models_with_count_history_are_refused(history_column):
+    predictor = SimpleNamespace(feature_columns=FEATURE_COLUMNS + [history_column])
+
+    with pytest.raises(ValueError, match="count history"):
+        forecast(predictor, provider=None)
+
+
+def test_providers_must_implement_fetch():
+    class Incomplete(WeatherProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
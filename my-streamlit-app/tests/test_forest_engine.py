@@ -0,0 +1,55 @@
+"""
+Tests du moteur compilé : mêmes prédictions que scikit-learn.
+"""
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import CompiledForest
+from predictor import BikeCountPredictor
+
+
+def test_compiled_matches_sklearn(forest, features):
+    X = features.to_numpy(dtype=np.float64)
+    compiled = CompiledForest.from_sklearn(forest)
+    np.testing.assert_array_equal(compiled.predict(X), forest.predict(features))
+
+
+def test_compiled_matches_sklearn_on_thresholds(forest, features):
+    # Values equal to a split threshold, or just around it, take the same branch
+    compiled = CompiledForest.from_sklearn(forest)
+    X = np.repeat(features.to_numpy(dtype=np.float64)[:1], 3 * compiled.n_nodes, axis=0)
+    feature = np.tile(np.asarray(compiled.feature), 3)
+    threshold = np.asarray(compiled.threshold)
+    X[np.arange(len(X)), feature] = np.concatenate(
+        [threshold, np.nextafter(threshold, -np.inf), np.nextafter(threshold, np.inf)]
+    )
+    expected = forest.predict(pd.DataFrame(X, columns=features.columns))
+    np.testing.assert_array_equal(compiled.predict(X), expected)
+
+
+def test_compiled_leaves_match_sklearn(forest, features):
+    compiled = CompiledForest.from_sklearn(forest)
+    offsets = np.asarray(compiled.roots)
+    np.testing.assert_array_equal(
+        compiled.apply(features.to_numpy(dtype=np.float64)), forest.apply(features) + offsets
+    )
+
+
+def test_predictor_engines_agree(model_path, features):
+    sklearn = BikeCountPredictor(model_path, engine="sklearn")
+    compiled = BikeCountPredictor(model_path, engine="compiled")
+    np.testing.assert_array_equal(
+        compiled.predict_batch(features), sklearn.predict_batch(features)
+    )
+    X = features.to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(compiled.predict_raw(X), sklearn.predict_raw(X))
+
+
+def test_interval_mean_is_the_prediction(model_path, features):
+    for engine in ("sklearn", "compiled"):
+        predictor = BikeCountPredictor(model_path, engine=engine)
+        intervals = predictor.predict_batch(features, quantiles=(0.1, 0.9))
+        np.testing.assert_array_equal(
+            intervals["predicted_bikes"].to_numpy(), predictor.predict_batch(features)
+        )
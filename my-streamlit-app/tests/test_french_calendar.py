@@ -0,0 +1,20 @@
+"""
+Tests du calendrier : les vacances connues et la fin des données.
+"""
+
+import pytest
+
+from french_calendar import FrenchCalendar
+
+
+def test_school_year_2026_2027():
+    flags = FrenchCalendar().flags(["2026-10-20", "2026-12-25", "2027-01-04"])
+    assert flags["is_school_vacation"].tolist() == [1, 1, 0]
+    assert flags["is_holiday"].tolist() == [0, 1, 0]
+
+
+def test_dates_past_the_vacation_data_raise():
+    calendar = FrenchCalendar()
+    calendar.flags([calendar.last_day])
+    with pytest.raises(ValueError, match="outside the calendar range"):
+        calendar.flags(["2027-12-01"])
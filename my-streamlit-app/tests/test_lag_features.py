@@ -0,0 +1,51 @@
+"""
+Tests des features d'historique : le tampon circulaire et la grille hors ligne.
+"""
+
+import numpy as np
+import pandas as pd
+
+from lag_features import LAG_COLUMNS, CountHistory, lag_features
+
+
+def make_counts(seed=0):
+    """Integer daily counts of two counters, with short and long gaps."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for counter in ("a", "b"):
+        days = pd.date_range("2024-01-01", periods=200, freq="D")
+        keep = rng.random(len(days)) > 0.15
+        keep[60:65] = False  # gap shorter than the buffer
+        keep[100:140] = False  # gap longer than the buffer
+        frames.append(pd.DataFrame({
+            "counter_id": counter,
+            "date": days[keep],
+            "bike_count": rng.integers(0, 5000, keep.sum()).astype(float),
+        }))
+    # Shuffled: both versions accept any row order
+    return pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=seed)
+
+
+def test_ring_buffer_matches_offline_grid():
+    counts = make_counts()
+    expected = lag_features(counts, counter_column="counter_id")
+    history = CountHistory()
+    online = pd.DataFrame(index=counts.index, columns=LAG_COLUMNS, dtype=float)
+    for i in counts.sort_values(["counter_id", "date"]).index:
+        counter, date, count = counts.loc[i, ["counter_id", "date", "bike_count"]]
+        # Features of the row's day, from the days recorded before it
+        online.loc[i] = history.features(counter, date)
+        history.update(counter, date, count)
+    np.testing.assert_array_equal(online.to_numpy(), expected[LAG_COLUMNS].to_numpy())
+
+
+def test_next_day_features_match_offline_grid():
+    counts = make_counts(seed=1)
+    history = CountHistory.from_frame(counts, counter_column="counter_id")
+    next_day = counts["date"].max() + pd.Timedelta(days=1)
+    future = pd.DataFrame({"counter_id": ["a", "b"], "date": next_day, "bike_count": np.nan})
+    expected = lag_features(pd.concat([counts, future], ignore_index=True),
+                            counter_column="counter_id").tail(2)
+    for counter, row in zip(["a", "b"], expected[LAG_COLUMNS].to_numpy()):
+        features = history.features(counter, next_day)
+        np.testing.assert_array_equal([features[name] for name in LAG_COLUMNS], row)
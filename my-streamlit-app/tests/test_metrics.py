@@ -0,0 +1,76 @@
+"""
+Tests de l'instrumentation : compteurs par étape et format Prometheus.
+"""
+
+import pytest
+
+from metrics import DISABLED, Metrics, to_prometheus
+from predictor import BikeCountPredictor
+
+
+def test_stages_accumulate_calls_time_and_rows():
+    metrics = Metrics()
+    metrics.record("evaluate", 0.5, rows=100)
+    metrics.record("evaluate", 1.5, rows=300)
+    with metrics.stage("parse") as timer:
+        timer.rows = 7
+    metrics.set_gauge("model_trees", 12)
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["stages"]["evaluate"] == {
+        "calls": 2, "seconds": 2.0, "max_seconds": 1.5, "rows": 400, "rows_per_second": 200.0,
+    }
+    assert snapshot["stages"]["parse"]["calls"] == 1
+    assert snapshot["stages"]["parse"]["rows"] == 7
+    assert snapshot["gauges"] == {"model_trees": 12}
+    metrics.reset()
+    assert metrics.snapshot() == {"stages": {}, "gauges": {}}
+
+
+def test_failed_stage_is_still_recorded():
+    metrics = Metrics()
+
+    with pytest.raises(RuntimeError):
+        with metrics.stage("evaluate", rows=5):
+            raise RuntimeError("boom")
+
+    assert metrics.snapshot()["stages"]["evaluate"]["calls"] == 1
+
+
+def test_disabled_metrics_record_nothing():
+    with DISABLED.stage("evaluate", rows=5):
+        DISABLED.record("parse", 1.0)
+    DISABLED.set_gauge("model_trees", 12)
+
+    assert DISABLED.snapshot() == {"stages": {}, "gauges": {}}
+
+
+def test_prometheus_text():
+    text = to_prometheus({
+        "stages": {"evaluate": {"calls": 2, "seconds": 2.0, "max_seconds": 1.5, "rows": 400}},
+        "gauges": {"model_trees": 12, "unset": None},
+        "cache": {"hits": 3, "misses": 1, "evictions": 0, "size": 1, "maxsize": 8},
+    })
+
+    lines = text.splitlines()
+    assert "# TYPE bike_predictor_stage_calls_total counter" in lines
+    assert 'bike_predictor_stage_calls_total{stage="evaluate"} 2.0' in lines
+    assert 'bike_predictor_stage_rows_total{stage="evaluate"} 400.0' in lines
+    assert 'bike_predictor_stage_max_seconds{stage="evaluate"} 1.5' in lines
+    assert "bike_predictor_model_trees 12.0" in lines
+    assert "bike_predictor_cache_hits_total 3.0" in lines
+    assert not any("unset" in line for line in lines)
+    assert text.endswith("\n")
+
+
+def test_predictor_records_its_stages(model_path, features):
+    predictor = BikeCountPredictor(model_path, cache_size=8, metrics=True)
+
+    predictor.predict_batch(features)
+
+    snapshot = predictor.metrics_snapshot()
+    assert snapshot["stages"]["evaluate"]["rows"] == len(features)
+    assert snapshot["stages"]["load_model"]["calls"] == 1
+    assert snapshot["gauges"]["model_trees"] == 12
+    assert snapshot["cache"]["maxsize"] == 8
@@ -0,0 +1,56 @@
+"""
+Tests du registre de modèles : budget mémoire et prédictions par compteur.
+"""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry
+from predictor import BikeCountPredictor
+
+
+@pytest.fixture
+def models(model_path, tmp_path):
+    """Three copies of the test forest, as a directory of per-counter models."""
+    for counter in ("a", "b", "c"):
+        shutil.copyfile(model_path, tmp_path / f"{counter}.pkl")
+    return tmp_path
+
+
+def test_least_recently_used_model_is_evicted_over_budget(models, model_path):
+    size = model_path.stat().st_size
+    registry = ModelRegistry(models, memory_budget=2 * size)
+
+    for counter in ("a", "b", "a", "c"):
+        registry.get(counter)
+
+    stats = registry.stats()
+    assert stats["loaded"] == ["a", "c"]
+    assert (stats["loads"], stats["evictions"]) == (3, 1)
+    assert stats["loaded_bytes"] == 2 * size <= stats["memory_budget"]
+
+
+def test_model_in_use_is_kept_whatever_the_budget(models):
+    registry = ModelRegistry(models, memory_budget=0)
+
+    predictor = registry.get("a")
+
+    assert registry.stats()["loaded"] == ["a"]
+    assert registry.get("a") is predictor
+    registry.get("b")
+    assert registry.stats()["loaded"] == ["b"]
+
+
+def test_batches_are_scored_by_each_counter_model(models, features):
+    registry = ModelRegistry(models, groups={"d": "b"}, memory_budget=0)
+    batch = features.head(300).assign(counter_id=np.resize(["a", "b", "c", "d"], 300))
+
+    predictions = registry.predict_batch(batch)
+
+    expected = BikeCountPredictor(models / "a.pkl").predict_batch(batch)
+    np.testing.assert_array_equal(predictions, expected)
+    assert registry.stats()["loads"] == 3
+    with pytest.raises(KeyError, match="No model for counter 'e'"):
+        registry.resolve("e")
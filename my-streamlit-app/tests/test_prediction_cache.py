@@ -0,0 +1,58 @@
+"""
+Tests du cache de prédictions : éviction LRU et résultats identiques sans cache.
+"""
+
+import numpy as np
+
+from prediction_cache import PredictionCache
+from predictor import BikeCountPredictor
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    assert cache.get("a") == 1.0
+    cache.put("c", 3.0)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1.0, 3.0)
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "maxsize": 2}
+
+
+def test_cached_batches_match_uncached(model_path, features):
+    rows = features.head(200)
+    # Repeated rows are scored once and share the cached value
+    batch = rows.iloc[np.tile(np.arange(len(rows)), 3)]
+    predictor = BikeCountPredictor(model_path, cache_size=len(batch))
+    expected = BikeCountPredictor(model_path).predict_batch(batch)
+
+    first = predictor.predict_batch(batch)
+    second = predictor.predict_batch(batch)
+
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+    assert predictor.cache.stats()["size"] == len(rows)
+    assert predictor.cache.hits == len(rows)
+
+
+def test_batches_larger_than_the_cache_bypass_it(model_path, features):
+    predictor = BikeCountPredictor(model_path, cache_size=10)
+
+    predictor.predict_batch(features.head(11))
+
+    assert predictor.cache.stats()["size"] == 0
+
+
+def test_cached_single_predictions_and_intervals_match_uncached(model_path, features):
+    row = features.iloc[0].to_dict()
+    cached = BikeCountPredictor(model_path, cache_size=8)
+    uncached = BikeCountPredictor(model_path)
+
+    for _ in range(2):
+        assert cached.predict(**row) == uncached.predict(**row)
+        assert cached.predict(**row, quantiles=(0.1, 0.9)) == uncached.predict(
+            **row, quantiles=(0.1, 0.9)
+        )
+
+    assert cached.cache.hits == 2 and len(cached.cache) == 2
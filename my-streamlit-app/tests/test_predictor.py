@@ -0,0 +1,166 @@
+"""
+Tests du prédicteur : fichiers de lot, validation des entrées et indicateurs de jour.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictor import (
+    DATE_COLUMN,
+    FEATURE_COLUMNS,
+    FLAG_COLUMNS,
+    VALIDATION_COLUMNS,
+    BikeCountPredictor,
+    read_features,
+    validate_features,
+)
+
+
+@pytest.fixture
+def dated(features):
+    """Weather features with a date column instead of the day flags."""
+    frame = features.head(400).drop(columns=FLAG_COLUMNS)
+    frame.insert(0, DATE_COLUMN, pd.date_range("2023-01-01", periods=len(frame)).date.astype(str))
+    return frame
+
+
+def _write(frame, path):
+    if path.suffix == ".csv":
+        frame.to_csv(path, index=False)
+    elif path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.reset_index(drop=True).to_feather(path)
+    return path
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".arrow"])
+def test_projected_file_derives_day_flags_from_dates(model_path, dated, tmp_path, suffix):
+    predictor = BikeCountPredictor(model_path)
+    source = _write(dated, tmp_path / f"dated{suffix}")
+    destination = tmp_path / "scored.parquet"
+
+    rows = predictor.predict_file(source, destination, chunksize=128, keep_columns=False)
+
+    scored = pd.read_parquet(destination)
+    assert rows == len(dated)
+    assert DATE_COLUMN not in scored.columns
+    assert sorted(scored.columns) == sorted(FEATURE_COLUMNS + ["predicted_bikes"])
+    assert scored["predicted_bikes"].tolist() == predictor.predict_batch(dated).tolist()
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".arrow"])
+def test_read_features_derives_day_flags_from_dates(model_path, dated, tmp_path, suffix):
+    predictor = BikeCountPredictor(model_path)
+    source = _write(dated, tmp_path / f"dated{suffix}")
+
+    frame = read_features(source)
+
+    assert list(frame.columns) == FEATURE_COLUMNS
+    expected = predictor.day_flags(dated[DATE_COLUMN])
+    assert (frame[FLAG_COLUMNS].to_numpy() == expected.to_numpy()).all()
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".arrow"])
+@pytest.mark.parametrize("keep_columns", [True, False])
+def test_missing_feature_column_is_reported(model_path, features, tmp_path, suffix, keep_columns):
+    predictor = BikeCountPredictor(model_path)
+    source = _write(features.head(50).drop(columns=["sd_total"]), tmp_path / f"partial{suffix}")
+
+    with pytest.raises(ValueError, match="Missing columns: sd_total"):
+        predictor.predict_file(source, tmp_path / "scored.parquet", keep_columns=keep_columns)
+
+
+def test_validate_features_accepts_clean_rows(features):
+    checked, valid, errors = validate_features(features)
+
+    assert valid.all() and errors.empty
+    assert list(errors.columns) == VALIDATION_COLUMNS
+    assert checked["t2m_max"].dtype == "float32"
+    assert checked["is_weekend"].dtype == "UInt8"
+    np.testing.assert_array_equal(checked.to_numpy(dtype=np.float64),
+                                  features.to_numpy(dtype=np.float32))
+
+
+def test_validate_features_reports_every_failed_check(features):
+    frame = features.head(6).astype(object)
+    frame.loc[0, "t2m_min"] = None
+    frame.loc[1, "tp_total"] = "wet"
+    frame.loc[2, "is_weekend"] = 7
+    frame.loc[3, "i10fg_max"] = -1.0
+    frame.loc[4, "t2m_min"] = frame.loc[4, "t2m_max"] + 1.0
+    frame.loc[5, "sf_max"] = float("inf")
+
+    checked, valid, errors = validate_features(frame, first_row=100)
+
+    assert valid.tolist() == [False] * 6
+    assert list(zip(errors["row"], errors["column"], errors["error"])) == [
+        (100, "t2m_min", "missing"),
+        (101, "tp_total", "not a number"),
+        (102, "is_weekend", "not 0 or 1"),
+        (103, "i10fg_max", "outside [0, 50]"),
+        (104, "t2m_min", "above t2m_max"),
+        (105, "sf_max", "outside [0, 5]"),
+    ]
+    assert errors.loc[1, "value"] == "wet"
+    assert checked["is_weekend"].isna().tolist() == [False, False, True, False, False, False]
+
+
+@pytest.mark.parametrize("quantiles", [None, (0.1, 0.9)])
+def test_csv_chunks_match_predict_batch(model_path, features, tmp_path, quantiles):
+    predictor = BikeCountPredictor(model_path)
+    source = _write(features, tmp_path / "features.csv")
+    progress = []
+
+    chunks = list(predictor.predict_csv_chunks(
+        source, chunksize=300, quantiles=quantiles,
+        progress=lambda rows, fraction: progress.append((rows, fraction)),
+    ))
+
+    expected = predictor.predict_batch(features, quantiles)
+    scored = pd.concat(chunks, ignore_index=True)
+    assert [len(chunk) for chunk in chunks] == [300] * 6 + [200]
+    assert progress[-1] == (len(features), 1.0)
+    if quantiles is None:
+        np.testing.assert_array_equal(scored["predicted_bikes"].to_numpy(), expected)
+    else:
+        pd.testing.assert_frame_equal(scored[list(expected.columns)], expected)
+
+
+def test_csv_chunks_report_invalid_rows_across_chunks(model_path, features, tmp_path):
+    predictor = BikeCountPredictor(model_path)
+    frame = features.head(500).copy()
+    frame.loc[350, "is_holiday"] = 3
+    source = _write(frame, tmp_path / "features.csv")
+    reports = []
+
+    scored = pd.concat(
+        predictor.predict_csv_chunks(source, chunksize=200, on_invalid=reports.append),
+        ignore_index=True,
+    )
+
+    errors = pd.concat(reports, ignore_index=True)
+    assert errors[["row", "column"]].values.tolist() == [[350, "is_holiday"]]
+    assert scored["predicted_bikes"].isna().tolist() == [i == 350 for i in range(500)]
+    valid = frame.drop(index=350)
+    np.testing.assert_array_equal(
+        scored["predicted_bikes"].dropna().to_numpy(dtype=np.int64), predictor.predict_batch(valid)
+    )
+
+
+@pytest.mark.parametrize("engine", ["sklearn", "compiled"])
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_parallel_shards_match_predict_batch(model_path, features, engine, backend):
+    predictor = BikeCountPredictor(model_path, engine=engine)
+
+    predictions = predictor.predict_batch_parallel(
+        features, n_workers=2, shard_size=300, backend=backend
+    )
+
+    np.testing.assert_array_equal(predictions, predictor.predict_batch(features))
+
+
+def test_parallel_rejects_unknown_backend(model_path, features):
+    with pytest.raises(ValueError, match="Unknown backend"):
+        BikeCountPredictor(model_path).predict_batch_parallel(features, backend="gpu")
@@ -0,0 +1,112 @@
+"""
+Tests du service HTTP : les deux points d'entrée et la validation des requêtes.
+"""
+
+import asyncio
+import json
+
+from predictor import BikeCountPredictor
+from serve import PredictionServer
+
+
+def _exchange(predictor, requests):
+    """Send raw HTTP requests to a server on a free port; return (status, body) pairs."""
+
+    async def run():
+        server = PredictionServer(predictor, window_ms=1.0)
+        server.batcher.start()
+        listener = await asyncio.start_server(server._handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        responses = []
+        try:
+            for request in requests:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                headers = dict(line.lower().split(": ", 1) for line in lines[1:] if line)
+                body = await reader.readexactly(int(headers["content-length"]))
+                responses.append((int(lines[0].split()[1]), json.loads(body)))
+                writer.close()
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            await server.batcher.close()
+        return responses
+
+    return asyncio.run(run())
+
+
+def _post(path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    return (
+        f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    ).encode("latin-1") + body
+
+
+def test_both_endpoints_match_predict_batch(model_path, features):
+    predictor = BikeCountPredictor(model_path)
+    rows = features.head(5)
+    expected = predictor.predict_batch(rows).tolist()
+    records = [
+        {name: (int(value) if name.startswith("is_") else float(value))
+         for name, value in row.items()}
+        for row in rows.to_dict("records")
+    ]
+
+    responses = _exchange(
+        predictor,
+        [_post("/predict/batch", {"rows": records})] + [_post("/predict", r) for r in records],
+    )
+
+    assert responses[0] == (200, {"predicted_bikes": expected})
+    assert [body["predicted_bikes"] for _, body in responses[1:]] == expected
+
+
+def test_invalid_rows_are_refused_with_their_errors(model_path, features):
+    predictor = BikeCountPredictor(model_path)
+    records = features.head(3).to_dict("records")
+    records[1]["t2m_min"] = None
+    records[2]["is_weekend"] = 7
+    del records[2]["tp_total"]
+
+    [(status, body)] = _exchange(predictor, [_post("/predict/batch", records)])
+
+    assert status == 400
+    failed = {(error["row"], error["column"], error["error"]) for error in body["errors"]}
+    assert failed == {
+        (1, "t2m_min", "missing"),
+        (2, "is_weekend", "not 0 or 1"),
+        (2, "tp_total", "missing"),
+    }
+
+
+def test_invalid_single_row_is_refused(model_path, features):
+    predictor = BikeCountPredictor(model_path)
+    record = features.iloc[0].to_dict()
+    record["is_holiday"] = 2
+
+    [(status, body)] = _exchange(predictor, [_post("/predict", record)])
+
+    assert status == 400
+    assert "is_holiday" in body["error"]
+
+
+def test_bad_content_length_is_refused(model_path):
+    predictor = BikeCountPredictor(model_path)
+    requests = [
+        f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode("latin-1")
+        for length in ("abc", "-5")
+    ]
+
+    responses = _exchange(predictor, requests)
+
+    assert [status for status, _ in responses] == [400, 400]
+    assert all("Content-Length" in body["error"] for _, body in responses)
+
+
+def test_empty_batch(model_path):
+    [(status, body)] = _exchange(BikeCountPredictor(model_path), [_post("/predict/batch", [])])
+
+    assert (status, body) == (200, {"predicted_bikes": []})
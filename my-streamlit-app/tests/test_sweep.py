@@ -0,0 +1,36 @@
+"""
+Tests des scénarios : la grille est évaluée sans alimenter la surveillance.
+"""
+
+import numpy as np
+
+from drift import DriftMonitor
+from predictor import BikeCountPredictor
+from sweep import grid_values, sweep
+
+
+def test_sweep_matches_predict_batch(model_path, features):
+    predictor = BikeCountPredictor(model_path)
+    base = features.iloc[0].to_dict()
+    result = sweep(predictor, {"t2m_max": grid_values(-5.0, 35.0, 0.5)}, base=base)
+    rows = features.iloc[[0] * len(result)].reset_index(drop=True)
+    rows["t2m_max"] = result["t2m_max"].to_numpy()
+    np.testing.assert_array_equal(
+        result["predicted_bikes"].to_numpy(), predictor.predict_batch(rows)
+    )
+
+
+def test_sweep_leaves_the_monitor_unchanged(model_path, train_features, features):
+    monitor = DriftMonitor.from_frame(train_features)
+    predictor = BikeCountPredictor(model_path, cache_size=64, monitor=monitor)
+    predictor.predict_batch(features)
+    before = monitor.feature_report()
+
+    sweep(
+        predictor,
+        {"t2m_max": grid_values(-5.0, 35.0, 0.5), "tp_total": [0.0, 0.01, 0.03]},
+        base=features.iloc[0].to_dict(),
+        quantiles=(0.1, 0.9),
+    )
+    assert monitor.feature_report().equals(before)
+    assert monitor.flags() == []
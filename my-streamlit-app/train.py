@@ -0,0 +1,318 @@
+"""
+Entraînement reproductible du modèle, avec un magasin de features mensuel.
+
+Daily features (see ``features.build_features``) and the daily bike count
+target are kept in an on-disk feature store: one Parquet file per month plus
+a ``manifest.json`` holding a fingerprint of each month's inputs. A refresh
+only rebuilds the months that are new or whose counts or weather changed,
+typically the current month. The model is then retrained on the whole store:
+from scratch, or by growing the existing forest with ``warm_start`` so the
+existing trees are kept and only the added trees are fitted. With
+``--lags`` the model also uses the history features of ``lag_features.py``.
+The training feature distribution is saved next to the model as the
+reference of ``drift.DriftMonitor``.
+
+Usage::
+
+    python train.py --counts counts.csv --weather era5_hourly.parquet
+    python train.py --counts counts.csv --weather era5_hourly.parquet --add-trees 20
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from drift import DriftMonitor, reference_path
+from features import build_features, to_day_numbers
+from lag_features import LAG_COLUMNS, lag_features
+from predictor import DATE_COLUMN, FEATURE_COLUMNS, FORMAT_SUFFIXES
+
+DATA_DIR = Path(__file__).parent / "data"
+
+TARGET_COLUMN = "bike_count"
+
+MANIFEST = "manifest.json"
+# Bump when the feature computation changes: every partition is rebuilt
+FEATURE_STORE_VERSION = 1
+
+
+def read_table(path):
+    """Read a CSV, Parquet or Arrow IPC file into a DataFrame."""
+    path = Path(path)
+    file_format = FORMAT_SUFFIXES.get(path.suffix.lower())
+    if file_format == "csv":
+        return pd.read_csv(path)
+    if file_format == "parquet":
+        return pd.read_parquet(path)
+    if file_format == "arrow":
+        return pd.read_feather(path)
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def daily_counts(counts, date_column=DATE_COLUMN, count_column=TARGET_COLUMN):
+    """
+    Sum bike counts per day, over all counters.
+
+    Parameters
+    ----------
+    counts : pd.DataFrame
+        One row per day (and counter), with a date and a count column
+    date_column, count_column : str
+        Column names
+
+    Returns
+    -------
+    pd.Series
+        Daily totals indexed by day number (see ``features.to_day_numbers``)
+    """
+    days = to_day_numbers(counts[date_column])
+    totals = pd.Series(counts[count_column].to_numpy(dtype=np.float64)).groupby(days).sum()
+    totals.index.name = "day"
+    return totals
+
+
+class FeatureStore:
+    """Monthly Parquet partitions of daily features and target."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def partition_path(self, month):
+        """File of a month partition, e.g. ``month=2024-05.parquet``."""
+        return self.directory / f"month={month}.parquet"
+
+    def manifest(self):
+        """Fingerprint of the inputs of each stored month."""
+        path = self.directory / MANIFEST
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != FEATURE_STORE_VERSION:
+            return {}
+        return manifest["months"]
+
+    def months(self):
+        """Stored months, oldest first."""
+        return sorted(self.manifest())
+
+    def refresh(self, counts, hourly, time_column="time", timezone=None, calendar=None):
+        """
+        Rebuild the partitions whose inputs are new or changed.
+
+        Days with a count but no weather yet (ERA5 is published with a
+        delay) are left out; their month is rebuilt once the weather arrives
+        since its fingerprint changes.
+
+        Parameters
+        ----------
+        counts : pd.Series
+            Daily totals indexed by day number, see ``daily_counts``
+        hourly : pd.DataFrame
+            Hourly ERA5-style weather, see ``features.daily_weather``
+        time_column : str, default "time"
+            Timestamp column of ``hourly``
+        timezone : str, optional
+            Time zone in which days are cut, see ``features.to_day_numbers``
+        calendar : french_calendar.FrenchCalendar, optional
+            Calendar of the day flags
+
+        Returns
+        -------
+        list of str
+            Months rebuilt
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest = self.manifest()
+
+        count_months = _months(counts.index.to_numpy())
+        weather_days = to_day_numbers(
+            hourly.index if isinstance(hourly.index, pd.DatetimeIndex) else hourly[time_column],
+            timezone,
+        )
+        weather_months = _months(weather_days)
+
+        rebuilt = []
+        for month in np.unique(count_months):
+            month_counts = counts[count_months == month]
+            month_hourly = hourly[weather_months == month]
+            fingerprint = _fingerprint(month_counts.reset_index(), month_hourly)
+            if manifest.get(month) == fingerprint and self.partition_path(month).exists():
+                continue
+
+            days = month_counts.index.to_numpy()
+            days = days[np.isin(days, weather_days[weather_months == month])]
+            if len(days) == 0:
+                continue
+            dates = days.astype("datetime64[D]")
+            frame = build_features(
+                dates, month_hourly, calendar=calendar, time_column=time_column,
+                timezone=timezone,
+            )
+            frame.insert(0, DATE_COLUMN, dates)
+            frame[TARGET_COLUMN] = month_counts.loc[days].to_numpy()
+            _write_atomic(frame, self.partition_path(month))
+            manifest[month] = fingerprint
+            rebuilt.append(month)
+
+        with open(self.directory / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump({"version": FEATURE_STORE_VERSION, "months": manifest}, f, indent=2)
+        return rebuilt
+
+    def load(self, months=None):
+        """
+        Read stored partitions into one frame.
+
+        Parameters
+        ----------
+        months : list of str, optional
+            Months to read, all by default
+
+        Returns
+        -------
+        pd.DataFrame
+            ``date``, the 9 features and ``bike_count``, sorted by date
+        """
+        months = self.months() if months is None else months
+        frames = [pd.read_parquet(self.partition_path(month)) for month in months]
+        if not frames:
+            raise ValueError(f"Feature store {self.directory} is empty")
+        return pd.concat(frames, ignore_index=True).sort_values(DATE_COLUMN, ignore_index=True)
+
+
+def add_lag_features(frame):
+    """
+    Append the history features of the daily target, see ``lag_features``.
+
+    Days whose history is incomplete (the first weeks of the store) are
+    dropped.
+    """
+    frame = frame.join(lag_features(frame, count_column=TARGET_COLUMN))
+    return frame.dropna(subset=LAG_COLUMNS).reset_index(drop=True)
+
+
+def train(frame, model_path, n_estimators=100, add_trees=0, random_state=42, n_jobs=-1,
+          columns=FEATURE_COLUMNS):
+    """
+    Fit the forest on a feature frame and save it where the app loads it.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        The feature columns and ``bike_count``
+    model_path : str or Path
+        Output joblib file (also the model grown when ``add_trees`` > 0)
+    n_estimators : int, default 100
+        Trees of a model trained from scratch
+    add_trees : int, default 0
+        If positive and ``model_path`` exists, load that model and fit this
+        many additional trees (``warm_start``); the existing trees are kept
+    random_state : int, default 42
+        Seed of a model trained from scratch
+    n_jobs : int, default -1
+        Parallel jobs used for fitting
+    columns : list of str, default ``FEATURE_COLUMNS``
+        Model features, e.g. ``FEATURE_COLUMNS + LAG_COLUMNS``
+
+    Returns
+    -------
+    RandomForestRegressor
+    """
+    model_path = Path(model_path)
+    X = frame[list(columns)]
+    y = frame[TARGET_COLUMN].to_numpy()
+
+    if add_trees > 0 and model_path.exists():
+        model = joblib.load(model_path)
+        if list(getattr(model, "feature_names_in_", FEATURE_COLUMNS)) != list(columns):
+            raise ValueError(f"{model_path} was trained on other features")
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + add_trees,
+                         n_jobs=n_jobs)
+    else:
+        model = RandomForestRegressor(
+            n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs
+        )
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+
+    # Written next to the target then renamed, so a running app never reads half a file
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = model_path.with_name(model_path.name + ".tmp")
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+    return model
+
+
+def _months(days):
+    """``YYYY-MM`` month of each day number."""
+    return np.datetime_as_string(np.asarray(days).astype("datetime64[D]").astype("datetime64[M]"))
+
+
+def _fingerprint(*frames):
+    """Order-insensitive hash of the rows of some DataFrames."""
+    hashes = [
+        format(int(pd.util.hash_pandas_object(frame, index=False).sum()), "016x")
+        for frame in frames
+    ]
+    return "-".join(hashes)
+
+
+def _write_atomic(frame, path):
+    """Write a Parquet file under a temporary name, then rename it."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the feature store and train the model.")
+    parser.add_argument("--counts", type=Path, required=True,
+                        help="daily counts: date and bike_count columns (summed over counters)")
+    parser.add_argument("--weather", type=Path, required=True,
+                        help="hourly ERA5 weather: time, t2m, tp, sd, i10fg, sf")
+    parser.add_argument("--store", type=Path, default=DATA_DIR / "feature_store")
+    parser.add_argument("--model", type=Path, default=DATA_DIR / "bike_count_model.pkl")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--add-trees", type=int, default=0,
+                        help="grow the existing model by this many trees instead of refitting")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--lags", action="store_true",
+                        help="also train on lag and rolling-mean features of the counts")
+    parser.add_argument("--timezone", help="time zone in which days are cut (default UTC)")
+    parser.add_argument("--bundle", action="store_true",
+                        help="also export data/bike_count_model.bundle, see export_model.py")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.store)
+    rebuilt = store.refresh(
+        daily_counts(read_table(args.counts)), read_table(args.weather), timezone=args.timezone
+    )
+    print(f"Feature store {args.store}: rebuilt {len(rebuilt)} month(s) {' '.join(rebuilt)}")
+
+    frame = store.load()
+    columns = FEATURE_COLUMNS
+    if args.lags:
+        frame = add_lag_features(frame)
+        columns = FEATURE_COLUMNS + LAG_COLUMNS
+    model = train(frame, args.model, n_estimators=args.n_estimators,
+                  add_trees=args.add_trees, random_state=args.random_state, columns=columns)
+    print(f"Trained {len(model.estimators_)} trees on {len(frame)} days, saved to {args.model}")
+
+    DriftMonitor.from_frame(frame).save(reference_path(args.model))
+
+    if args.bundle:
+        from export_model import export_bundle
+
+        bundle_path = args.model.with_suffix(".bundle")
+        export_bundle(args.model, bundle_path)
+        print(f"Exported {bundle_path}")
+
+
+if __name__ == "__main__":
+    main()